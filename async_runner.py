@@ -0,0 +1,83 @@
+import os
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from contextvars import copy_context
+from functools import partial
+from typing import Any, Awaitable, Callable, Optional
+
+import httpx
+import litellm
+
+from cancellation import CancellationToken, RunCancelled
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundLoop:
+    """A single event loop thread that runs provider calls as coroutines.
+
+    Blocking callers wait on a future instead of owning a thread per request,
+    and cancelling that future aborts the request itself.
+    """
+
+    def __init__(self, name: str = "llm-loop"):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name=self.name, daemon=True).start()
+            return self._loop
+
+    def submit(self, coroutine: Awaitable) -> Future:
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def run(self, coroutine: Awaitable, token: Optional[CancellationToken] = None, poll: float = 0.25) -> Any:
+        """Block until ``coroutine`` finishes on the loop, cancelling it if ``token`` is cancelled"""
+        future = self.submit(coroutine)
+        while True:
+            try:
+                return future.result(timeout=poll)
+            except FutureTimeout:
+                if token and token.cancelled:
+                    future.cancel()
+                    raise RunCancelled(token.reason)
+
+
+llm_loop = BackgroundLoop()
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+async def ensure_http_client() -> httpx.AsyncClient:
+    """Pooled keep-alive client shared by every async provider call; lives on ``llm_loop``"""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=int(os.getenv("DOC_HTTP_MAX_CONNECTIONS", 200)),
+                max_keepalive_connections=int(os.getenv("DOC_HTTP_MAX_KEEPALIVE", 50)),
+                keepalive_expiry=float(os.getenv("DOC_HTTP_KEEPALIVE_SECONDS", 30)),
+            ),
+            timeout=httpx.Timeout(600.0, connect=10.0),
+        )
+        litellm.aclient_session = _http_client
+    return _http_client
+
+
+# Blocking work that has no async equivalent (crew kickoff, tool calls) runs here
+# instead of on asyncio's small default pool
+crew_executor = ThreadPoolExecutor(max_workers=int(os.getenv("DOC_CREW_WORKERS", 64)),
+                                   thread_name_prefix="crew")
+
+
+async def run_blocking(fn: Callable, *args, **kwargs) -> Any:
+    """Run ``fn`` on the crew executor, carrying context variables along like asyncio.to_thread"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(crew_executor, copy_context().run, partial(fn, *args, **kwargs))
@@ -0,0 +1,292 @@
+import os
+import math
+import time
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Approximate list prices in USD per million tokens and sustained output speed.
+# Keep these in sync with the providers' pricing pages.
+MODEL_PRICING: Dict[str, Dict[str, float]] = {
+    "gemini/gemini-1.5-flash-latest": {"prompt": 0.075, "completion": 0.30, "tokens_per_second": 150},
+    "groq/llama-3.3-70b-versatile": {"prompt": 0.59, "completion": 0.79, "tokens_per_second": 250},
+}
+
+# Fallback for models missing from MODEL_PRICING
+DEFAULT_PRICING = {"prompt": 1.0, "completion": 3.0, "tokens_per_second": 100}
+
+# Per-task prompt overhead (role, goal, instructions) and expected completion size.
+# A ``source_factor`` scales with the size of the file when the task rewrites it.
+TASK_PROFILES: Dict[str, Dict[str, float]] = {
+    "analysis": {"overhead": 600, "completion": 1200, "source_factor": 0.0},
+    "cleaning": {"overhead": 450, "completion": 200, "source_factor": 1.0},
+    "insight": {"overhead": 450, "completion": 900, "source_factor": 0.0},
+    "research": {"overhead": 900, "completion": 1000, "source_factor": 0.0},
+    "commenting": {"overhead": 450, "completion": 200, "source_factor": 1.3},
+    "documentation": {"overhead": 500, "completion": 1500, "source_factor": 0.0},
+}
+
+# Tasks the governor never drops, even when a run is close to its budget
+REQUIRED_TASKS = {"analysis", "commenting", "documentation"}
+
+# Fixed latency per LLM call on top of generation time
+CALL_LATENCY_SECONDS = 1.5
+
+# Rough size of a token in source text, for estimates made before any call
+CHARS_PER_TOKEN = 4
+
+
+def inline_source_chars() -> int:
+    """Files up to this size are put straight into task prompts instead of read through a tool"""
+    return int(os.getenv("DOC_INLINE_SOURCE_CHARS", 24_000))
+
+
+def source_turns(source_tokens: int) -> int:
+    """LLM turns a task needs to see the source: one if inlined, two with a tool read"""
+    return 1 if source_tokens * CHARS_PER_TOKEN <= inline_source_chars() else 2
+
+
+def get_pricing(model: str) -> Dict[str, float]:
+    return MODEL_PRICING.get(model, DEFAULT_PRICING)
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """Cost in USD of a call with the given token counts"""
+    pricing = get_pricing(model)
+    return (prompt_tokens * pricing["prompt"] + completion_tokens * pricing["completion"]) / 1_000_000
+
+
+def cheaper_model(model: str) -> Optional[str]:
+    """Return the next cheaper known model, or None if already the cheapest"""
+    current = estimate_cost(model, 1000, 1000)
+    candidates = [
+        (estimate_cost(name, 1000, 1000), name)
+        for name in MODEL_PRICING
+        if estimate_cost(name, 1000, 1000) < current
+    ]
+    return max(candidates)[1] if candidates else None
+
+
+@dataclass
+class TaskEstimate:
+    task: str
+    prompt_tokens: int
+    completion_tokens: int
+
+
+@dataclass
+class FileEstimate:
+    file_path: str
+    model: str
+    source_tokens: int
+    tasks: List[TaskEstimate] = field(default_factory=list)
+
+    @property
+    def prompt_tokens(self) -> int:
+        return sum(t.prompt_tokens for t in self.tasks)
+
+    @property
+    def completion_tokens(self) -> int:
+        return sum(t.completion_tokens for t in self.tasks)
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    @property
+    def cost(self) -> float:
+        return estimate_cost(self.model, self.prompt_tokens, self.completion_tokens)
+
+    @property
+    def seconds(self) -> float:
+        tps = get_pricing(self.model)["tokens_per_second"]
+        return self.completion_tokens / tps + CALL_LATENCY_SECONDS * source_turns(self.source_tokens) * len(self.tasks)
+
+
+@dataclass
+class RunEstimate:
+    files: List[FileEstimate]
+    concurrency: int = 1
+
+    @property
+    def prompt_tokens(self) -> int:
+        return sum(f.prompt_tokens for f in self.files)
+
+    @property
+    def completion_tokens(self) -> int:
+        return sum(f.completion_tokens for f in self.files)
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    @property
+    def cost(self) -> float:
+        return sum(f.cost for f in self.files)
+
+    @property
+    def seconds(self) -> float:
+        return sum(f.seconds for f in self.files) / max(1, self.concurrency)
+
+    def as_rows(self) -> List[Dict]:
+        """Per-file rows suitable for st.dataframe"""
+        return [
+            {
+                "file": f.file_path,
+                "model": f.model,
+                "prompt_tokens": f.prompt_tokens,
+                "completion_tokens": f.completion_tokens,
+                "cost_usd": round(f.cost, 4),
+                "seconds": round(f.seconds, 1),
+            }
+            for f in self.files
+        ]
+
+
+def estimate_file(file_path: str, task_names: List[str], model: str, source_tokens: Optional[int] = None) -> FileEstimate:
+    """Estimate prompt and completion tokens for running ``task_names`` on one file.
+
+    Tasks run sequentially, so every task sees the outputs of the ones before it.
+    Small files are inlined into the prompt; larger ones are read through a tool,
+    which costs an extra turn that carries the source in both the tool result and
+    the final prompt.
+    """
+    if source_tokens is None:
+        try:
+            source_tokens = math.ceil(os.path.getsize(file_path) / CHARS_PER_TOKEN)
+        except OSError:
+            source_tokens = 0
+
+    estimate = FileEstimate(file_path=file_path, model=model, source_tokens=source_tokens)
+    turns = source_turns(source_tokens)
+    previous_outputs = 0
+    for name in task_names:
+        profile = TASK_PROFILES.get(name, TASK_PROFILES["analysis"])
+        prompt = int((profile["overhead"] + source_tokens) * turns + previous_outputs)
+        completion = int(profile["completion"] + source_tokens * profile["source_factor"])
+        estimate.tasks.append(TaskEstimate(name, prompt, completion))
+        previous_outputs += completion
+    return estimate
+
+
+@dataclass
+class BudgetLimits:
+    max_cost: Optional[float] = None
+    max_tokens: Optional[int] = None
+    max_seconds: Optional[float] = None
+    # Fractions of the budget at which the governor starts degrading the run
+    downgrade_at: float = 0.6
+    drop_optional_at: float = 0.8
+
+    @classmethod
+    def from_env(cls) -> "BudgetLimits":
+        def _read(name, cast):
+            value = os.getenv(name)
+            return cast(value) if value else None
+
+        return cls(
+            max_cost=_read("DOC_MAX_COST_USD", float),
+            max_tokens=_read("DOC_MAX_TOKENS", int),
+            max_seconds=_read("DOC_MAX_SECONDS", float),
+        )
+
+
+@dataclass
+class FilePlan:
+    """What the governor allows for a single file"""
+    model: str
+    tasks: List[str]
+    downgraded: bool = False
+    dropped: List[str] = field(default_factory=list)
+
+
+class BudgetGovernor:
+    """Tracks spend during a run and enforces hard budgets"""
+
+    def __init__(self, limits: BudgetLimits):
+        self.limits = limits
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+        self.started = time.monotonic()
+        self.stopped = False
+        self._lock = threading.Lock()
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def usage_fraction(self, extra_cost: float = 0.0, extra_tokens: int = 0) -> float:
+        """Highest fraction of any configured limit that is (or would be) used"""
+        fractions = [0.0]
+        if self.limits.max_cost:
+            fractions.append((self.cost + extra_cost) / self.limits.max_cost)
+        if self.limits.max_tokens:
+            fractions.append((self.total_tokens + extra_tokens) / self.limits.max_tokens)
+        if self.limits.max_seconds:
+            fractions.append(self.elapsed / self.limits.max_seconds)
+        return max(fractions)
+
+    def record_usage(self, model: str, prompt_tokens: int, completion_tokens: int):
+        with self._lock:
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.cost += estimate_cost(model, prompt_tokens, completion_tokens)
+
+    def _fits(self, estimate: FileEstimate) -> bool:
+        return self.usage_fraction(estimate.cost, estimate.total_tokens) <= 1.0
+
+    def plan_file(self, file_path: str, task_names: List[str], model: str) -> Optional[FilePlan]:
+        """Decide model and tasks for the next file, or None to stop the run"""
+        with self._lock:
+            if self.stopped:
+                return None
+            if self.usage_fraction() >= 1.0:
+                logger.warning("Budget exhausted, stopping run")
+                self.stopped = True
+                return None
+
+            plan = FilePlan(model=model, tasks=list(task_names))
+            estimate = estimate_file(file_path, plan.tasks, plan.model)
+            pressure = self.usage_fraction(estimate.cost, estimate.total_tokens)
+
+            # Step down to cheaper models first
+            while pressure >= self.limits.downgrade_at:
+                cheaper = cheaper_model(plan.model)
+                if cheaper is None:
+                    break
+                plan.model = cheaper
+                plan.downgraded = True
+                estimate = estimate_file(file_path, plan.tasks, plan.model)
+                pressure = self.usage_fraction(estimate.cost, estimate.total_tokens)
+
+            # Then drop optional tasks
+            if pressure >= self.limits.drop_optional_at:
+                plan.dropped = [t for t in plan.tasks if t not in REQUIRED_TASKS]
+                plan.tasks = [t for t in plan.tasks if t in REQUIRED_TASKS]
+                estimate = estimate_file(file_path, plan.tasks, plan.model)
+
+            if not plan.tasks or not self._fits(estimate):
+                logger.warning(f"Budget cannot cover {file_path}, stopping run")
+                self.stopped = True
+                return None
+
+            if plan.downgraded or plan.dropped:
+                logger.info(f"Budget plan for {file_path}: model={plan.model}, dropped={plan.dropped}")
+            return plan
+
+    def summary(self) -> Dict:
+        return {
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cost_usd": round(self.cost, 4),
+            "elapsed_seconds": round(self.elapsed, 1),
+            "stopped": self.stopped,
+        }
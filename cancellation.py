@@ -0,0 +1,84 @@
+import time
+import logging
+import threading
+from contextvars import ContextVar
+from typing import List, Optional
+
+from llm_wrapper import WrappedLLM
+
+logger = logging.getLogger(__name__)
+
+
+class RunCancelled(Exception):
+    """Raised inside a run once its cancellation token has been cancelled"""
+
+
+class CancellationToken:
+    """Thread-safe flag that a run checks between (and during) units of work.
+
+    A token with a ``parent`` (e.g. one leg of a hedged call) is also cancelled
+    once its parent is, so it can be cancelled on its own without the run.
+    """
+
+    def __init__(self, parent: Optional["CancellationToken"] = None):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self.parent = parent
+        self.reason = ""
+
+    @property
+    def cancelled(self) -> bool:
+        if not self._event.is_set() and self.parent is not None and self.parent.cancelled:
+            self.cancel(self.parent.reason)
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "cancelled by user"):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+        logger.info(f"Run cancelled: {reason}")
+
+    def raise_if_cancelled(self):
+        if self.cancelled:
+            raise RunCancelled(self.reason)
+
+    def wait(self, timeout: Optional[float] = None, poll: float = 0.25) -> bool:
+        if self.parent is None:
+            return self._event.wait(timeout)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.cancelled:
+            remaining = poll if deadline is None else min(poll, deadline - time.monotonic())
+            if remaining <= 0:
+                return False
+            self._event.wait(remaining)
+        return True
+
+    def step_callback(self, *_):
+        """CrewAI step/task callback that stops the crew between agent steps"""
+        self.raise_if_cancelled()
+
+
+# Token of the run the current task or thread belongs to. asyncio.to_thread copies
+# the context, so LLM calls made inside crew.kickoff see their run's token.
+current_token: ContextVar[Optional[CancellationToken]] = ContextVar("current_token", default=None)
+
+class CancellableLLM(WrappedLLM):
+    """LLM whose calls stop as soon as the run is cancelled.
+
+    The call runs on the caller's thread. Streamed generations run as coroutines
+    on the shared event loop via ``llm_loop.run(coroutine, token)`` (see
+    StreamingLLM), which aborts the request itself on cancellation; a blocking,
+    non-streamed call is not interrupted, but its answer is discarded.
+    """
+
+    def call(self, messages, tools: Optional[List[dict]] = None, *args, **kwargs):
+        token = current_token.get()
+        if token is None:
+            return self.inner.call(messages, tools, *args, **kwargs)
+
+        token.raise_if_cancelled()
+        result = self.inner.call(messages, tools, *args, **kwargs)
+        token.raise_if_cancelled()
+        return result
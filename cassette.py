@@ -0,0 +1,128 @@
+import os
+import gzip
+import json
+import hashlib
+import logging
+import threading
+from collections import deque
+from typing import Any, List, Dict, Optional
+
+from crewai import LLM
+
+from llm_wrapper import WrappedLLM
+
+logger = logging.getLogger(__name__)
+
+MODES = {"off", "record", "replay"}
+
+
+class CassetteMiss(KeyError):
+    """Raised in replay mode when a request was never recorded"""
+
+
+def request_key(kind: str, name: str, payload: Any) -> str:
+    body = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(f"{kind}\0{name}\0{body}".encode()).hexdigest()
+
+
+class Cassette:
+    """Records LLM and tool I/O to a gzipped JSON-lines file and replays it deterministically"""
+
+    def __init__(self, path: str, mode: str = "off"):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self._lock = threading.Lock()
+        # key -> recorded responses in the order they were seen
+        self._responses: Dict[str, deque] = {}
+        self._last: Dict[str, Any] = {}
+
+        if mode == "replay":
+            self._load()
+        elif mode == "record":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            # Start a fresh cassette for every recording
+            open(path, "wb").close()
+
+    @classmethod
+    def from_env(cls) -> "Cassette":
+        return cls(
+            path=os.getenv("DOC_CASSETTE_PATH", os.path.join("cassettes", "run.jsonl.gz")),
+            mode=os.getenv("DOC_CASSETTE_MODE", "off").lower(),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    def _load(self):
+        count = 0
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                self._responses.setdefault(entry["key"], deque()).append(entry["response"])
+                count += 1
+        logger.info(f"Loaded {count} recorded interactions from {self.path}")
+
+    def record(self, kind: str, name: str, payload: Any, response: Any):
+        entry = {"kind": kind, "name": name, "key": request_key(kind, name, payload), "request": payload,
+                 "response": response}
+        line = json.dumps(entry, default=str) + "\n"
+        with self._lock:
+            # Each append is its own gzip member, which gzip readers concatenate
+            with gzip.open(self.path, "at", encoding="utf-8") as f:
+                f.write(line)
+
+    def replay(self, kind: str, name: str, payload: Any) -> Any:
+        key = request_key(kind, name, payload)
+        with self._lock:
+            queue = self._responses.get(key)
+            if queue:
+                self._last[key] = queue.popleft()
+            if key in self._last:
+                # Repeated identical requests get the recorded responses in order, then the last one
+                return self._last[key]
+        raise CassetteMiss(f"No recorded {kind} response for {name} ({key[:12]}) in {self.path}")
+
+    def wrap_llm(self, llm: LLM) -> LLM:
+        return CassetteLLM(llm, self) if self.enabled else llm
+
+    def wrap_tool(self, tool):
+        """Route a CrewAI tool's ``_run`` through the cassette"""
+        if not self.enabled:
+            return tool
+        run = tool._run
+        cassette = self
+
+        def _run(*args, **kwargs):
+            payload = {"args": list(args), "kwargs": kwargs}
+            if cassette.mode == "replay":
+                return cassette.replay("tool", tool.name, payload)
+            result = run(*args, **kwargs)
+            cassette.record("tool", tool.name, payload, result)
+            return result
+
+        # BaseTool is a pydantic model, so bypass its attribute validation
+        object.__setattr__(tool, "_run", _run)
+        return tool
+
+
+class CassetteLLM(WrappedLLM):
+    """LLM that records calls of an inner LLM, or answers them from a cassette"""
+
+    def __init__(self, inner: LLM, cassette: Cassette):
+        super().__init__(inner)
+        self.cassette = cassette
+
+    def call(self, messages, tools: Optional[List[dict]] = None, *args, **kwargs):
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "tools": [t.get("function", {}).get("name", t) for t in tools or []],
+        }
+        if self.cassette.mode == "replay":
+            return self.cassette.replay("llm", self.model, payload)
+        response = self.inner.call(messages, tools, *args, **kwargs)
+        self.cassette.record("llm", self.model, payload, response)
+        return response
@@ -0,0 +1,129 @@
+import os
+import re
+import logging
+from typing import Callable, Dict, List, Optional, Type
+
+from outputs import OutputStore
+from schemas import TaskOutput, merge_outputs, parse_output, render_markdown
+
+logger = logging.getLogger(__name__)
+
+SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+BULLET = re.compile(r"^\s*(?:[-*+]|\d+[.)])\s+")
+
+
+def digest_chars() -> int:
+    return int(os.getenv("DOC_DIGEST_CHARS", 1500))
+
+
+def _first_sentence(text: str, limit: int = 200) -> str:
+    sentence = SENTENCE_END.split(text, maxsplit=1)[0]
+    return sentence if len(sentence) <= limit else sentence[:limit].rstrip() + "…"
+
+
+def digest(text: str, max_chars: Optional[int] = None) -> str:
+    """Bounded structured digest of a task output.
+
+    Keeps headings, the first sentence of each paragraph and each bullet, and
+    replaces code blocks with a one-line marker. Anything past ``max_chars`` is
+    cut at a line boundary.
+    """
+    max_chars = max_chars or digest_chars()
+    lines: List[str] = []
+    in_code, code_lines = False, 0
+    paragraph_started = False
+
+    for raw in text.splitlines():
+        line = raw.strip()
+        if line.startswith("```"):
+            if in_code:
+                lines.append(f"[code block: {code_lines} lines]")
+            in_code, code_lines = not in_code, 0
+            continue
+        if in_code:
+            code_lines += 1
+            continue
+        if not line:
+            paragraph_started = False
+            continue
+        if line.startswith("#"):
+            lines.append(line)
+        elif BULLET.match(line):
+            lines.append("- " + _first_sentence(BULLET.sub("", line), 160))
+        elif not paragraph_started:
+            lines.append(_first_sentence(line))
+        paragraph_started = not line.startswith("#") and not BULLET.match(line)
+
+    result, size = [], 0
+    for line in lines:
+        if size + len(line) + 1 > max_chars:
+            result.append("[digest truncated]")
+            break
+        result.append(line)
+        size += len(line) + 1
+    return "\n".join(result)
+
+
+class TaskOutputCompactor:
+    """Task callbacks that keep the full output on disk and pass only a digest downstream.
+
+    Outputs of tasks with a schema are validated, stored as JSON and rendered to
+    markdown locally. With ``merge`` (a patch run that only covers what changed)
+    the previous run's entries are kept; otherwise the new output replaces them.
+    """
+
+    def __init__(self, store: OutputStore, key: str, max_chars: Optional[int] = None,
+                 schemas: Optional[Dict[str, Type[TaskOutput]]] = None, source: Optional[str] = None,
+                 merge: bool = False):
+        self.store = store
+        self.key = key
+        self.max_chars = max_chars
+        self.schemas = schemas or {}
+        # Current source text; previous entries only carry over while their symbol is still in it
+        self.source = source
+        self.merge = merge
+
+    def _structured(self, task_name: str, schema: Type[TaskOutput], output) -> Optional[str]:
+        """Store the validated output as JSON and return its markdown, or None if it did not validate"""
+        model = parse_output(schema, output.raw or "") or getattr(output, "pydantic", None)
+        if not isinstance(model, schema):
+            logger.warning(f"{task_name} output for {self.key} is not valid {schema.__name__}, keeping it as text")
+            return None
+        data = model.model_dump()
+        previous = self.store.read_json(self.key, task_name) if self.merge else None
+        if previous:
+            data = merge_outputs(schema, previous, data, self.source)
+        self.store.write_json(self.key, task_name, data)
+        return render_markdown(schema, data)
+
+    def callback(self, task_name: str, compact_output: bool = True) -> Callable:
+        schema = self.schemas.get(task_name)
+
+        def compact(output):
+            full = output.raw or ""
+            if schema:
+                rendered = self._structured(task_name, schema, output)
+                if rendered is not None:
+                    # Downstream tasks and the crew result see the rendered markdown, not the JSON
+                    full = output.raw = rendered
+            path = self.store.write(self.key, task_name, full)
+            if not compact_output:
+                return
+            short = digest(full, self.max_chars)
+            if len(short) < len(full):
+                # Later tasks read output.raw as their context
+                output.raw = f"{short}\n(Full {task_name} output: {path})"
+                logger.info(f"Compacted {task_name} output for {self.key}: {len(full)} -> {len(output.raw)} chars")
+        return compact
+
+    def attach(self, tasks: List, names: Optional[List[str]] = None):
+        """Store every task's output; compact all but the final one, whose text is the crew result"""
+        names = names or [self._task_name(task, i) for i, task in enumerate(tasks)]
+        for i, (task, name) in enumerate(zip(tasks, names)):
+            task.callback = self.callback(name, compact_output=i < len(tasks) - 1)
+
+    @staticmethod
+    def _task_name(task, index: int) -> str:
+        if task.output_file:
+            return os.path.splitext(os.path.basename(task.output_file.strip()))[0]
+        return f"task_{index + 1}"
@@ -0,0 +1,185 @@
+import os
+import re
+import ast
+import heapq
+import logging
+from typing import List, Dict, Set, Optional
+
+logger = logging.getLogger(__name__)
+
+JS_IMPORT_PATTERN = re.compile(
+    r"""(?:import\s[^'"]*?from\s*|import\s*|require\(\s*|import\(\s*)['"](\.{1,2}/[^'"]+)['"]"""
+)
+HTML_REF_PATTERN = re.compile(r"""<(?:script|link)\b[^>]*?(?:src|href)\s*=\s*['"]([^'"#?]+)['"]""", re.IGNORECASE)
+CSS_IMPORT_PATTERN = re.compile(r"""@import\s+(?:url\()?\s*['"]?([^'")\s;]+)""")
+JS_EXTENSIONS = ("", ".js", "/index.js")
+
+
+class DependencyGraph:
+    """Directory-wide import and call graph between code files"""
+
+    def __init__(self, files: List[str], root: str):
+        self.root = os.path.abspath(root)
+        self.files = [os.path.abspath(f) for f in files]
+        self._file_set = set(self.files)
+        self._modules = self._index_python_modules()
+        # file -> files it depends on
+        self.dependencies: Dict[str, Set[str]] = {f: set() for f in self.files}
+        # (file, dependency) -> names the file imports or calls from it
+        self.used_symbols: Dict[tuple, Set[str]] = {}
+        for f in self.files:
+            self._scan(f)
+
+    def _index_python_modules(self) -> Dict[str, str]:
+        modules = {}
+        for f in self.files:
+            if not f.endswith(".py"):
+                continue
+            rel = os.path.relpath(f, self.root)[:-3].replace(os.sep, ".")
+            if rel.endswith(".__init__"):
+                rel = rel[: -len(".__init__")]
+            modules[rel] = f
+            # Also allow imports relative to the file's own top-level package
+            modules.setdefault(rel.split(".", 1)[-1], f)
+        return modules
+
+    def _scan(self, file_path: str):
+        try:
+            with open(file_path, "r", encoding="utf-8", errors="replace") as f:
+                source = f.read()
+        except OSError as e:
+            logger.warning(f"Could not read {file_path}: {e}")
+            return
+
+        if file_path.endswith(".py"):
+            self._scan_python(file_path, source)
+        elif file_path.endswith(".js"):
+            self._add_paths(file_path, JS_IMPORT_PATTERN.findall(source), JS_EXTENSIONS)
+        elif file_path.endswith(".html"):
+            self._add_paths(file_path, HTML_REF_PATTERN.findall(source), ("",))
+        elif file_path.endswith(".css"):
+            self._add_paths(file_path, CSS_IMPORT_PATTERN.findall(source), ("",))
+
+    def _add_dependency(self, file_path: str, dependency: Optional[str], names=()):
+        if not dependency or dependency == file_path:
+            return
+        self.dependencies[file_path].add(dependency)
+        self.used_symbols.setdefault((file_path, dependency), set()).update(names)
+
+    def _add_paths(self, file_path: str, references: List[str], suffixes):
+        base = os.path.dirname(file_path)
+        for ref in references:
+            if "://" in ref:
+                continue
+            for suffix in suffixes:
+                candidate = os.path.normpath(os.path.join(base, ref + suffix))
+                if candidate in self._file_set:
+                    self._add_dependency(file_path, candidate)
+                    break
+
+    def _resolve_module(self, file_path: str, module: Optional[str], level: int) -> Optional[str]:
+        if level:
+            package = os.path.relpath(os.path.dirname(file_path), self.root).replace(os.sep, ".")
+            parts = [] if package == "." else package.split(".")
+            parts = parts[: len(parts) - (level - 1)] if level > 1 else parts
+            module = ".".join(parts + ([module] if module else []))
+        return self._modules.get(module) if module else None
+
+    def _scan_python(self, file_path: str, source: str):
+        try:
+            tree = ast.parse(source)
+        except SyntaxError as e:
+            logger.warning(f"Could not parse {file_path}: {e}")
+            return
+
+        aliases: Dict[str, str] = {}
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    target = self._resolve_module(file_path, alias.name, 0)
+                    if target:
+                        aliases[alias.asname or alias.name] = target
+                        self._add_dependency(file_path, target)
+            elif isinstance(node, ast.ImportFrom):
+                target = self._resolve_module(file_path, node.module, node.level)
+                for alias in node.names:
+                    # "from pkg import module" imports a submodule, not a symbol
+                    submodule = self._resolve_module(
+                        file_path, f"{node.module}.{alias.name}" if node.module else alias.name, node.level
+                    )
+                    if submodule:
+                        aliases[alias.asname or alias.name] = submodule
+                        self._add_dependency(file_path, submodule)
+                    elif target:
+                        self._add_dependency(file_path, target, [alias.name])
+
+        # Calls through module aliases, e.g. utils.load_config()
+        for node in ast.walk(tree):
+            if (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+                    and isinstance(node.func.value, ast.Name) and node.func.value.id in aliases):
+                self._add_dependency(file_path, aliases[node.func.value.id], [node.func.attr])
+
+    def dependents(self, file_path: str) -> Set[str]:
+        """Files that directly depend on ``file_path``"""
+        return {f for f, deps in self.dependencies.items() if file_path in deps}
+
+    def topological_order(self) -> List[str]:
+        """Dependencies before dependents; cycles are broken deterministically"""
+        remaining = {f: set(deps) for f, deps in self.dependencies.items()}
+        ready = [f for f, deps in remaining.items() if not deps]
+        heapq.heapify(ready)
+        order = []
+        while remaining:
+            if not ready:
+                # Cycle: release the file with the fewest unresolved dependencies
+                cycle_breaker = min(remaining, key=lambda f: (len(remaining[f]), f))
+                logger.info(f"Import cycle detected, processing {cycle_breaker} early")
+                remaining[cycle_breaker] = set()
+                heapq.heappush(ready, cycle_breaker)
+            current = heapq.heappop(ready)
+            if current not in remaining:
+                continue
+            del remaining[current]
+            order.append(current)
+            for f, deps in remaining.items():
+                if current in deps:
+                    deps.discard(current)
+                    if not deps:
+                        heapq.heappush(ready, f)
+        return order
+
+
+def compact_summary(text: str, max_chars: int = 600) -> str:
+    """Headings plus the opening prose of a generated document, bounded in size"""
+    headings, prose = [], []
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith("```"):
+            continue
+        if stripped.startswith("#"):
+            headings.append(stripped.lstrip("# "))
+        elif len(prose) < 3 and not stripped.startswith(("|", "-", "*")):
+            prose.append(stripped)
+    summary = " ".join(prose)
+    if headings:
+        summary += "\nSections: " + "; ".join(headings[:12])
+    return summary[:max_chars]
+
+
+def dependency_context(graph: DependencyGraph, file_path: str, summaries: Dict[str, str]) -> str:
+    """Prompt section with summaries of the file's already documented direct dependencies"""
+    file_path = os.path.abspath(file_path)
+    lines = []
+    for dep in sorted(graph.dependencies.get(file_path, ())):
+        if dep not in summaries:
+            continue
+        rel = os.path.relpath(dep, graph.root)
+        used = sorted(graph.used_symbols.get((file_path, dep), ()))
+        uses = f" (uses: {', '.join(used[:10])})" if used else ""
+        lines.append(f"- {rel}{uses}: {summaries[dep]}")
+    if not lines:
+        return ""
+    return (
+        "\nAlready documented dependencies of this file (do not re-read them):\n"
+        + "\n".join(lines) + "\n"
+    )
@@ -2,14 +2,44 @@ import streamlit as st
 import os
 from crewai.process import Process
 from crewai_tools import FileReadTool, SerperDevTool, DirectoryReadTool, FileWriterTool
-from tempfile import NamedTemporaryFile
 from crewai import Agent, Crew, Process, Task, LLM
 from dotenv import load_dotenv
 import shutil
 from concurrent.futures import ThreadPoolExecutor
-from typing import List, Dict
+from typing import Callable, List, Dict, Optional, Set
 import asyncio
 import logging
+import argparse
+import signal
+import sys
+import time
+import uuid
+import threading
+import weakref
+from functools import cached_property
+from async_runner import run_blocking
+from cancellation import CancellableLLM, CancellationToken, RunCancelled, current_token
+from cassette import Cassette
+from hedging import HedgeBudget, HedgedLLM, HedgePolicy
+from outputs import OutputStore
+from compaction import TaskOutputCompactor
+from schemas import TASK_SCHEMAS, AnalysisOutput, DocumentationOutput, InsightOutput, ResearchOutput
+from extractors import extract_outline
+from fake_llm import FakeLLM, fake_llm_enabled
+from profiling import ProfiledLLM, RunProfile, current_profile, profile_tool, profiling_enabled, stage, timed
+from source_compaction import CompactSource, compact_source, compaction_enabled, remapping_callback, renumber_outline
+from file_cache import FileContentCache, cached_file_read_tool
+from dependency_graph import DependencyGraph, compact_summary, dependency_context
+from watcher import WatchSession
+from viewer import DocumentationViewer, show_preview
+from search_index import SearchIndex
+from uploads import UploadError, UploadJob, cleanup_stale_jobs, upload_digest
+from scheduling import DirectoryScheduler
+from singleflight import FairScheduler, SingleFlight, content_key
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from streaming import StreamSink, StreamingLLM, current_stream, streaming_enabled
+from pipeline_config import FilePipeline, PipelineConfigError, PipelineSpec
+from budget import BudgetGovernor, BudgetLimits, FilePlan, RunEstimate, estimate_file, inline_source_chars
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -18,132 +48,219 @@ logger = logging.getLogger(__name__)
 load_dotenv()
 st.title("Code Documentation AI")
 
+@st.cache_resource
+def get_cassette() -> Cassette:
+    """Record/replay cassette from DOC_CASSETTE_MODE, shared across script reruns"""
+    return Cassette.from_env()
+
+@st.cache_resource
+def get_shared_runs() -> SingleFlight:
+    """Identical file runs from any session share one execution and its result"""
+    return SingleFlight(int(os.getenv("DOC_SHARED_RESULTS", 256)))
+
+@st.cache_resource
+def get_fair_scheduler() -> FairScheduler:
+    """Crew slots handed out round-robin per session"""
+    return FairScheduler(int(os.getenv("DOC_MAX_CONCURRENT_CREWS", 6)))
+
+@st.cache_resource
+def get_search_index() -> SearchIndex:
+    """Full-text index over generated sections, caught up once with outputs already on disk"""
+    index = SearchIndex()
+    updated = index.sync(OutputStore(os.path.join("documentation_output", "files")))
+    if updated:
+        logger.info(f"Indexed {updated} section(s) written before the search index existed")
+    return index
+
+@st.cache_resource
+def clean_upload_scratch() -> int:
+    """Remove upload scratch directories left by a previous process, once per process"""
+    return cleanup_stale_jobs()
+
+@st.cache_resource
+def get_hedge_budget(_policy: HedgePolicy) -> HedgeBudget:
+    """Process-wide cap on how many calls may be hedged"""
+    return HedgeBudget(_policy)
+
+cassette = get_cassette()
+shared_runs = get_shared_runs()
+fair_scheduler = get_fair_scheduler()
+search_index = get_search_index()
+clean_upload_scratch()
+
+def build_llm(model: str, **kwargs) -> LLM:
+    """Provider LLM, streaming unless DOC_STREAM=0, recorded through the cassette"""
+    if fake_llm_enabled():
+        # Offline stand-in for load tests: no provider calls, nothing to record
+        return ProfiledLLM(FakeLLM(model, **kwargs))
+    inner = LLM(model=model, **kwargs)
+    return ProfiledLLM(cassette.wrap_llm(StreamingLLM(inner) if streaming_enabled() else inner))
+
 # Initialize LLMs and tools
-llm = LLM("groq/llama-3.3-70b-versatile")
-documentation_llm = LLM(
+llm = build_llm("groq/llama-3.3-70b-versatile")
+documentation_llm = build_llm(
     model="gemini/gemini-1.5-flash-latest",
     temperature=0.7
 )
-search_tool = SerperDevTool()
-file_read_tool = FileReadTool()
-directory_tool = DirectoryReadTool()
-write_tool = FileWriterTool()
+# Optionally race slow calls against the other provider
+hedge_policy = HedgePolicy.from_env()
+if hedge_policy.enabled:
+    hedge_budget = get_hedge_budget(hedge_policy)
+    llm, documentation_llm = (
+        HedgedLLM(llm, documentation_llm, hedge_policy, hedge_budget),
+        HedgedLLM(documentation_llm, llm, hedge_policy, hedge_budget),
+    )
+# Let cancelled runs abandon in-flight calls
+llm = CancellableLLM(llm)
+documentation_llm = CancellableLLM(documentation_llm)
+
+class ToolSet:
+    """Tool instances for one crew, so crews running concurrently never share tool objects"""
+
+    def __init__(self, file_cache: Optional[FileContentCache] = None):
+        self.file_cache = file_cache
+
+    @staticmethod
+    def _wrap(tool):
+        return profile_tool(cassette.wrap_tool(tool))
+
+    @cached_property
+    def file_reader(self):
+        return self._wrap(cached_file_read_tool(self.file_cache) if self.file_cache else FileReadTool())
+
+    @cached_property
+    def directory(self):
+        return self._wrap(DirectoryReadTool())
+
+    @cached_property
+    def writer(self):
+        return self._wrap(FileWriterTool())
+
+    @cached_property
+    def search(self):
+        return self._wrap(SerperDevTool())
 
 class Agents:
     """Class to manage all agents"""
     
     @staticmethod
-    def create_code_analyzer():
+    def create_code_analyzer(model: LLM = None, toolset: Optional[ToolSet] = None):
+        toolset = toolset or ToolSet()
         return Agent(
             role="Code Analyzer",
             goal="Understand the structure and functionality of code files comprehensively.",
             backstory="Experienced software architect with expertise in reading and interpreting code across multiple languages and frameworks.",
             verbose=True,
-            llm=documentation_llm,
-            tools=[directory_tool, file_read_tool]
+            llm=model or documentation_llm,
+            tools=[toolset.directory, toolset.file_reader]
         )
 
     @staticmethod
-    def create_entity_cleaner():
+    def create_entity_cleaner(model: LLM = None, toolset: Optional[ToolSet] = None):
+        toolset = toolset or ToolSet()
         return Agent(
             role="Named Entity Cleaner",
             goal="Identify and sanitize sensitive information in code while maintaining functionality.",
             backstory="Security-focused code cleaner specializing in identifying and anonymizing sensitive information.",
             verbose=True,
-            llm=documentation_llm,
-            tools=[directory_tool, file_read_tool]
+            llm=model or documentation_llm,
+            tools=[toolset.directory, toolset.file_reader]
         )
 
     @staticmethod
-    def create_insight_gatherer():
+    def create_insight_gatherer(model: LLM = None, toolset: Optional[ToolSet] = None):
+        toolset = toolset or ToolSet()
         return Agent(
             role="Insight Gatherer",
             goal="Extract detailed insights about code structure, dependencies, and patterns.",
             backstory="Expert code reviewer who excels at identifying key components and patterns.",
             verbose=True,
-            llm=documentation_llm,
-            tools=[directory_tool, file_read_tool]
+            llm=model or documentation_llm,
+            tools=[toolset.directory, toolset.file_reader]
         )
 
     @staticmethod
-    def create_research_assistant():
+    def create_research_assistant(model: LLM = None, toolset: Optional[ToolSet] = None):
+        toolset = toolset or ToolSet()
         return Agent(
             role="Code Research Assistant",
             goal="Research and provide context about libraries, frameworks, and tools used.",
             backstory="Skilled researcher specializing in programming technologies and best practices.",
             verbose=True,
-            llm=documentation_llm,
+            llm=model or documentation_llm,
             memory=True,
-            tools=[search_tool]
+            tools=[toolset.search]
         )
 
     @staticmethod
-    def create_commenter():
+    def create_commenter(model: LLM = None, toolset: Optional[ToolSet] = None):
+        toolset = toolset or ToolSet()
         return Agent(
             role="Code Commenter",
             goal="Add detailed, context-aware comments to improve code readability.",
             backstory="Expert developer focused on code clarity and documentation.",
             verbose=True,
-            llm=documentation_llm,
-            tools=[file_read_tool, write_tool]
+            llm=model or documentation_llm,
+            tools=[toolset.file_reader, toolset.writer]
         )
 
     @staticmethod
-    def create_documenter():
+    def create_documenter(model: LLM = None, toolset: Optional[ToolSet] = None):
+        toolset = toolset or ToolSet()
         return Agent(
             role="Documentation Writer",
             goal="Create comprehensive, well-structured documentation for code.",
             backstory="Technical writer skilled at creating clear, thorough documentation.",
             verbose=True,
-            llm=documentation_llm,
-            tools=[file_read_tool, write_tool]
+            llm=model or documentation_llm,
+            tools=[toolset.file_reader, toolset.writer]
         )
 
     @staticmethod
-    def create_optimizer():
+    def create_optimizer(model: LLM = None):
         return Agent(
             role="Optimization Advisor",
             goal="Identify and suggest code optimizations and improvements.",
             backstory="Performance optimization specialist with extensive refactoring experience.",
             verbose=True,
-            llm=documentation_llm
+            llm=model or documentation_llm
         )
 
     @staticmethod
-    def create_error_handler():
+    def create_error_handler(model: LLM = None):
         return Agent(
             role="Error Handler Documenter",
             goal="Document error handling patterns and potential failure points.",
             backstory="Expert in defensive programming and robust error handling.",
             verbose=True,
-            llm=llm
+            llm=model or llm
         )
 
     @staticmethod
-    def create_tester():
+    def create_tester(model: LLM = None):
         return Agent(
             role="Test Case Documenter",
             goal="Design and document comprehensive test strategies.",
             backstory="QA engineer specializing in test coverage and quality assurance.",
             verbose=True,
-            llm=llm
+            llm=model or llm
         )
 
     @staticmethod
-    def create_usage_guide_creator():
+    def create_usage_guide_creator(model: LLM = None):
         return Agent(
             role="Usage Guide Creator",
             goal="Create practical guides and examples for code usage.",
             backstory="Developer advocate focused on creating user-friendly documentation.",
             verbose=True,
-            llm=documentation_llm
+            llm=model or documentation_llm
         )
 
 class Tasks:
     """Class to manage all tasks"""
     
     @staticmethod
-    def create_analysis_task(file_path: str, agent: Agent) -> Task:
+    def create_analysis_task(file_path: str, agent: Agent, context: str = "") -> Task:
         return Task(
             description=f"""Analyze code file at {file_path}:
             1. Identify overall structure and architecture
@@ -151,76 +268,75 @@ class Tasks:
             3. Analyze dependencies and imports
             4. Identify design patterns and architectural decisions
             5. Evaluate code organization and modularity
-            """,
-            expected_output="""Detailed analysis report including:
-            1. Code Structure Overview
-            2. Component Analysis
-            3. Dependency Map
-            4. Design Pattern Identification
-            5. Architecture Recommendations
-            """,
+            """ + context,
+            expected_output="""Analysis as JSON: a structure overview, one entry per component
+            (class, function, constant, ...), the dependency map, design patterns and
+            architecture recommendations""",
             agent=agent,
-            output_file=f"analysis_{os.path.basename(file_path)}.md"
+            output_pydantic=AnalysisOutput,
+            output_file=f"analysis_{os.path.basename(file_path)}.json"
         )
 
     @staticmethod
-    def create_cleaning_task(file_path: str, agent: Agent) -> Task:
+    def create_cleaning_task(file_path: str, agent: Agent, context: str = "") -> Task:
         return Task(
             description=f"""Review and sanitize {file_path}:
             1. Identify sensitive information (API keys, credentials, etc.)
             2. Detect and anonymize personal data
             3. Remove or mask security-sensitive details
             4. Document all sanitization actions
-            """,
+            """ + context,
             expected_output="Sanitized code file with documentation of changes",
             agent=agent,
             output_file=f"cleaned_{os.path.basename(file_path)}"
         )
 
     @staticmethod
-    def create_insight_task(file_path: str, agent: Agent) -> Task:
+    def create_insight_task(file_path: str, agent: Agent, context: str = "") -> Task:
         return Task(
             description=f"""Extract insights from {file_path}:
             1. Identify key functionalities
             2. Document code patterns
             3. Analyze complexity and maintainability
             4. Review error handling approaches
-            """,
-            expected_output="Comprehensive insights report",
+            """ + context,
+            expected_output="Insights as JSON: a summary, one entry per insight tagged with its symbol and category, and a maintainability assessment",
             agent=agent,
-            output_file=f"insights_{os.path.basename(file_path)}.md"
+            output_pydantic=InsightOutput,
+            output_file=f"insights_{os.path.basename(file_path)}.json"
         )
 
     @staticmethod
-    def create_research_task(file_path: str, agent: Agent) -> Task:
+    def create_research_task(file_path: str, agent: Agent, context: str = "") -> Task:
         return Task(
             description=f"""Research technologies used in {file_path}:
             1. Identify external dependencies
             2. Research best practices
             3. Find relevant documentation
             4. Gather community insights
-            """,
-            expected_output="Technology research report",
+            """ + context,
+            expected_output="Research as JSON: one entry per technology with its use, best practices and references",
             agent=agent,
-            output_file=f"research_{os.path.basename(file_path)}.md"
+            output_pydantic=ResearchOutput,
+            output_file=f"research_{os.path.basename(file_path)}.json"
         )
 
     @staticmethod
-    def create_commenting_task(file_path: str, agent: Agent) -> Task:
+    def create_commenting_task(file_path: str, agent: Agent, context: str = "") -> Task:
         return Task(
             description=f"""Add comprehensive comments to {file_path}:
             1. Document function purposes
             2. Explain complex logic
             3. Add context to important sections
             4. Include usage examples
-            """,
+            """ + context,
             expected_output="Well-commented code file",
             agent=agent,
             output_file=f"commented_{os.path.basename(file_path)}"
         )
 
     @staticmethod
-    def create_documentation_task(file_path: str, agent: Agent) -> Task:
+    def create_documentation_task(file_path: str, agent: Agent, context: str = "") -> Task:
         return Task(
             description=f"""Create complete documentation for {file_path}:
             1. Overview and purpose
@@ -228,92 +344,380 @@ class Tasks:
             3. Usage examples
             4. API documentation
             5. Configuration options
-            """,
-            expected_output="Complete markdown documentation",
+            """ + context,
+            expected_output="Documentation as JSON: title, overview, installation, usage examples, one API entry per public symbol and configuration options",
             agent=agent,
-            output_file=f"docs_{os.path.basename(file_path)}.md"
+            output_pydantic=DocumentationOutput,
+            output_file=f"docs_{os.path.basename(file_path)}.json"
         )
 
+CODE_EXTENSIONS = (".py", ".js", ".html", ".css")
+
+# Task name -> (agent key, task factory)
+TASK_REGISTRY = {
+    'analysis': ('analyzer', Tasks.create_analysis_task),
+    'cleaning': ('cleaner', Tasks.create_cleaning_task),
+    'insight': ('insight_gatherer', Tasks.create_insight_task),
+    'research': ('researcher', Tasks.create_research_task),
+    'commenting': ('commenter', Tasks.create_commenting_task),
+    'documentation': ('documenter', Tasks.create_documentation_task),
+}
+DEFAULT_TASKS = ['analysis', 'cleaning', 'insight', 'commenting', 'documentation']
+# Tasks that receive the file's local structure outline and summaries of its already documented dependencies
+CONTEXT_TASKS = {'analysis', 'documentation'}
+# Tasks that read a compacted copy of the source; the rest need its exact text
+COMPACT_SOURCE_TASKS = {'analysis', 'insight'}
+# Tasks that only need the file's imports and symbols; they get its outline in place of the source
+OUTLINE_TASKS = {'research'}
+
+# Agent key -> factory(model, toolset); agents are only built once a task needs them
+AGENT_REGISTRY = {
+    'analyzer': Agents.create_code_analyzer,
+    'cleaner': Agents.create_entity_cleaner,
+    'insight_gatherer': Agents.create_insight_gatherer,
+    'researcher': Agents.create_research_assistant,
+    'commenter': Agents.create_commenter,
+    'documenter': Agents.create_documenter,
+}
+
+def default_pipeline(root: str = ".") -> PipelineSpec:
+    """Pipeline from ``root``/pipeline.json or DOC_PIPELINE_CONFIG, else the built-in per-type rules"""
+    return PipelineSpec.load(root, DEFAULT_TASKS, documentation_llm.model, TASK_REGISTRY)
+
 class FileProcessor:
     """Handles the processing of individual files"""
     
-    def __init__(self):
-        self.agents = self._initialize_agents()
-        
-    def _initialize_agents(self) -> Dict[str, Agent]:
-        return {
-            'analyzer': Agents.create_code_analyzer(),
-            'cleaner': Agents.create_entity_cleaner(),
-            'insight_gatherer': Agents.create_insight_gatherer(),
-            #'researcher': Agents.create_research_assistant(),
-            'commenter': Agents.create_commenter(),
-            'documenter': Agents.create_documenter(),
-            #'optimizer': Agents.create_optimizer(),
-            #'error_handler': Agents.create_error_handler(),
-            #'tester': Agents.create_tester(),
-            #'usage_guide_creator': Agents.create_usage_guide_creator()
-        }
-
-    async def process_file(self, file_path: str) -> Dict:
-        """Process a single file through all agents concurrently"""
-        tasks = []
-        
-        # Create tasks for each agent
-        tasks.extend([
-            Tasks.create_analysis_task(file_path, self.agents['analyzer']),
-            Tasks.create_cleaning_task(file_path, self.agents['cleaner']),
-            Tasks.create_insight_task(file_path, self.agents['insight_gatherer']),
-            #Tasks.create_research_task(file_path, self.agents['researcher']),
-            Tasks.create_commenting_task(file_path, self.agents['commenter']),
-            Tasks.create_documentation_task(file_path, self.agents['documenter'])
-        ])
-        
-        # Create crew for concurrent processing
-        crew = Crew(
-            agents=list(self.agents.values()),
-            tasks=tasks,
-            process=Process.sequential,
-            verbose=True
+    def __init__(self, run_id: Optional[str] = None, store: Optional[OutputStore] = None,
+                 user_id: str = "default", pipeline: Optional[PipelineSpec] = None):
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.user_id = user_id
+        # Full task outputs; downstream tasks only see compact digests of them
+        if store is None:
+            store = OutputStore(os.path.join("documentation_output", "files"))
+            store.add_listener(search_index)
+        self.store = store
+        # Built-in rules until a run loads the directory's own pipeline.json, so a broken
+        # config surfaces where the run starts instead of on every page load
+        self.pipeline = pipeline or PipelineSpec(DEFAULT_TASKS, documentation_llm.model)
+        self.processed_files: List[str] = []
+        # Called with (file_path, task, text so far) while task outputs stream in
+        self.on_stream: Optional[Callable[[str, str, str], None]] = None
+        self.file_cache = FileContentCache()
+        self._llms: Dict[str, LLM] = {documentation_llm.model: documentation_llm, llm.model: llm}
+
+    def _llm_for(self, model: str) -> LLM:
+        if model not in self._llms:
+            self._llms[model] = CancellableLLM(build_llm(model))
+        return self._llms[model]
+
+    def _crew_agents(self, task_models: Dict[str, str]) -> Dict[str, Agent]:
+        """Agents for one crew, keyed by task; agents hold per-run state, so crews never share them"""
+        toolset = ToolSet(self.file_cache)
+        built: Dict[tuple, Agent] = {}
+        agents = {}
+        for name, model in task_models.items():
+            agent_key = TASK_REGISTRY[name][0]
+            if (model, agent_key) not in built:
+                built[(model, agent_key)] = AGENT_REGISTRY[agent_key](self._llm_for(model), toolset)
+            agents[name] = built[(model, agent_key)]
+        return agents
+
+    def _source_context(self, file_path: str, compacted: Optional[CompactSource] = None) -> str:
+        """Prompt section with the file's source, so agents need no tool turn to read it"""
+        if compacted:
+            source = compacted.text
+            label = (f"Compacted source of {file_path} (license header, blank-line runs and large "
+                     f"data literals elided; line numbers refer to this listing)")
+        else:
+            try:
+                source = self.file_cache.get(file_path)
+            except OSError as e:
+                logger.warning(f"Could not read {file_path}: {e}")
+                return ""
+            label = f"Source of {file_path}"
+        if len(source) > inline_source_chars():
+            return ""
+        language = os.path.splitext(file_path)[1].lstrip('.')
+        return (
+            f"\n{label} (already loaded, do not read it with a tool):\n"
+            f"```{language}\n{source}\n```\n"
         )
-        
+
+    def _outline_context(self, file_path: str) -> str:
+        """Prompt section with the file's locally extracted structure"""
         try:
-            results = await asyncio.to_thread(crew.kickoff)
-            return results
+            outline = extract_outline(file_path, self.file_cache.get(file_path))
+        except OSError:
+            return ""
+        if outline is None or not outline.sections:
+            return ""
+        return f"\nStructure of {file_path} ({outline.language}, extracted locally):\n{outline.render()}\n"
+
+    def _compact_source(self, file_path: str) -> Optional[CompactSource]:
+        """Compacted source with its line map, or None when compaction saves nothing"""
+        if not compaction_enabled():
+            return None
+        try:
+            source = self.file_cache.get(file_path)
+        except OSError:
+            return None
+        compacted = compact_source(source, os.path.splitext(file_path)[1].lstrip('.'))
+        if compacted.saved_ratio <= 0.01:
+            return None
+        logger.info(f"Compacted source of {file_path} by {compacted.saved_ratio:.0%}")
+        return compacted
+
+    async def process_file(self, file_path: str, plan: Optional[FilePlan] = None,
+                           governor: Optional[BudgetGovernor] = None, context: str = "",
+                           token: Optional[CancellationToken] = None, patch: bool = False) -> Dict:
+        """Process a single file through all agents concurrently.
+
+        With ``patch`` the structured outputs are merged into the stored ones, for
+        re-runs that only need to describe what changed; otherwise they replace them.
+        """
+        if token and token.cancelled:
+            return None
+        pipeline = self.pipeline.resolve(file_path)
+        task_names = plan.tasks if plan else pipeline.tasks
+        model = plan.model if plan else pipeline.model
+        # A budget downgrade applies to every task; otherwise per-task overrides stand
+        pipeline = FilePipeline(task_names, model, {} if plan and plan.downgraded else pipeline.task_models)
+
+        with stage("prepare"):
+            # Create tasks for each agent
+            source_context = self._source_context(file_path)
+            compacted = self._compact_source(file_path) if COMPACT_SOURCE_TASKS.intersection(task_names) else None
+            compact_context = self._source_context(file_path, compacted) if compacted else ""
+            outline_context = (self._outline_context(file_path)
+                               if (CONTEXT_TASKS | OUTLINE_TASKS).intersection(task_names) else "")
+            # Tasks reading the compacted listing cite its line numbers, so their outline must too
+            compact_outline = renumber_outline(outline_context, compacted) if compact_context else outline_context
+            tasks = []
+            crew_agents = []
+            names = []
+            agents = self._crew_agents({name: pipeline.model_for(name) for name in task_names})
+            for name in task_names:
+                factory = TASK_REGISTRY[name][1]
+                agent = agents[name]
+                if name in OUTLINE_TASKS and outline_context:
+                    source = outline_context + "(This structure is all the task needs; do not read the file with a tool.)\n"
+                elif name in COMPACT_SOURCE_TASKS and compact_context:
+                    source = compact_context
+                else:
+                    source = source_context
+                outline = compact_outline if name in COMPACT_SOURCE_TASKS else outline_context
+                task_context = source + (outline + context if name in CONTEXT_TASKS else "")
+                tasks.append(factory(file_path, agent, task_context))
+                if all(a is not agent for a in crew_agents):
+                    crew_agents.append(agent)
+                names.append(name)
+            try:
+                current_source = self.file_cache.get(file_path)
+            except OSError:
+                current_source = None
+            TaskOutputCompactor(self.store, file_path, schemas=TASK_SCHEMAS, source=current_source,
+                                merge=patch).attach(tasks, names)
+            if compact_context:
+                # Map line numbers the agents cite back to the original file
+                for task, name in zip(tasks, names):
+                    if name in COMPACT_SOURCE_TASKS:
+                        task.callback = remapping_callback(task.callback, compacted)
+            # Streamed tokens land in the running task's output file as they arrive
+            sink = StreamSink(self.store, file_path, names, on_chunk=timed("ui", self.on_stream))
+            sink.attach(tasks)
+
+            # Create crew for concurrent processing
+            crew = Crew(
+                agents=crew_agents,
+                tasks=tasks,
+                process=Process.sequential,
+                verbose=True,
+                step_callback=token.step_callback if token else None,
+            )
+
+        def kickoff():
+            # Wait for this session's turn, so one large directory job cannot starve others
+            # Time waiting for a slot apart from the crew's own orchestration and calls
+            with stage("queue"), fair_scheduler.slot(self.user_id, token), stage("crew"):
+                results = crew.kickoff()
+            executed.append(True)
+            return results, {name: (self.store.read(file_path, name), self.store.read_json(file_path, name))
+                             for name in names}
+
+        # Same file, source, tasks, model and context give the same result, whoever asks
+        parts = (names, [pipeline.model_for(n) for n in names], context, patch)
+        try:
+            # Hash the mapped file in place instead of copying it out of the cache
+            with self.file_cache.view(file_path) as source:
+                key = content_key(file_path, source, *parts)
+        except OSError:
+            key = content_key(file_path, None, *parts)
+        executed = []
+
+        # LLM calls made inside kickoff pick the token up from the copied context
+        current_token.set(token)
+        current_stream.set(sink)
+        try:
+            results, outputs = await shared_runs.run_async(key, kickoff, retry_on=(RunCancelled,),
+                                                         runner=run_blocking, token=token)
+        except RunCancelled:
+            logger.info(f"Cancelled while processing {file_path}")
+            return None
         except Exception as e:
+            if token and token.cancelled:
+                logger.info(f"Cancelled while processing {file_path}")
+                return None
             logger.error(f"Error processing file {file_path}: {str(e)}")
             return None
+        if not executed:
+            logger.info(f"Reused a shared result for {file_path}")
+            for name, (text, data) in outputs.items():
+                if data is not None:
+                    self.store.write_json(file_path, name, data)
+                if text is not None:
+                    self.store.write(file_path, name, text)
+        if file_path not in self.processed_files:
+            self.processed_files.append(file_path)
+
+        if governor and executed:
+            usage = getattr(results, 'token_usage', None)
+            if usage and usage.total_tokens:
+                governor.record_usage(model, usage.prompt_tokens, usage.completion_tokens)
+        return results
 
 class DocumentationGenerator:
     """Manages the overall documentation generation process"""
     
-    def __init__(self, output_dir: str = "documentation_output"):
+    def __init__(self, output_dir: str = "documentation_output", chunk_size: int = 3,
+                 user_id: str = "default", profile: Optional[bool] = None):
         self.output_dir = output_dir
-        self.file_processor = FileProcessor()
+        self.chunk_size = chunk_size
+        self.run_id = uuid.uuid4().hex[:12]
+        # Per run, so concurrent sessions sharing output_dir never overwrite each other's download
+        self.doc_path = os.path.join(output_dir, f"complete_documentation_{self.run_id}.md")
+        self.store = OutputStore(os.path.join(output_dir, "files"))
+        # Sections become searchable as soon as they are written
+        self.store.add_listener(search_index)
+        self.file_processor = FileProcessor(self.run_id, self.store, user_id)
+        self.graph: Optional[DependencyGraph] = None
+        # Compact summaries of documented modules, keyed by absolute path
+        self.summaries: Dict[str, str] = {}
+        # Opt-in stage timings and stack samples of directory runs (DOC_PROFILE=1)
+        self.profile = profiling_enabled() if profile is None else profile
+        self.last_profile: Optional[RunProfile] = None
+        self.file_cache_stats: Optional[dict] = None
         os.makedirs(output_dir, exist_ok=True)
 
-    async def process_directory(self, directory_path: str) -> List[Dict]:
-        """Process all files in directory with chunking"""
+    def preflight(self, directory_path: str) -> RunEstimate:
+        """Estimate tokens, cost and duration of a directory run before starting it"""
         files = self._get_code_files(directory_path)
+        spec = default_pipeline(directory_path)
+        pipelines = [spec.resolve(f) for f in files]
+        return RunEstimate(
+            files=[estimate_file(f, p.tasks, p.model) for f, p in zip(files, pipelines)],
+            concurrency=self.chunk_size,
+        )
+
+    async def process_directory(self, directory_path: str,
+                                governor: Optional[BudgetGovernor] = None,
+                                priority: str = "dependency",
+                                respect_dependencies: bool = True,
+                                on_result: Optional[Callable[[str, object], None]] = None,
+                                token: Optional[CancellationToken] = None) -> List[Dict]:
+        """Process all files by priority with a pool of ``chunk_size`` workers.
+
+        With ``respect_dependencies`` a file only starts once the files it imports are
+        documented, so their summaries can be injected into its prompts.
+        """
+        files = self._get_code_files(directory_path)
+        self.file_processor.pipeline = default_pipeline(directory_path)
+        self.graph = DependencyGraph(files, directory_path)
+        scheduler = DirectoryScheduler(self.graph.files, self.graph, priority,
+                                       documentation_llm.model, respect_dependencies)
         results = []
-        
-        # Process files in chunks
-        chunk_size = 3
-        for i in range(0, len(files), chunk_size):
-            chunk = files[i:i + chunk_size]
-            chunk_results = await asyncio.gather(
-                *[self.file_processor.process_file(f) for f in chunk]
-            )
-            results.extend(chunk_results)
-            
-            # Update progress
-            progress = (i + len(chunk)) / len(files)
-            st.progress(progress)
-        
+        progress_bar = st.progress(0.0)
+        changed = asyncio.Condition()
+
+        async def worker():
+            while True:
+                async with changed:
+                    while (f := scheduler.next_file()) is None:
+                        if scheduler.exhausted:
+                            return
+                        await changed.wait()
+
+                if governor:
+                    pipeline = self.file_processor.pipeline.resolve(f)
+                    plan = governor.plan_file(f, pipeline.tasks, pipeline.model)
+                else:
+                    plan = None
+                result = None
+                if (governor and plan is None) or (token and token.cancelled):
+                    scheduler.stop()
+                else:
+                    context = dependency_context(self.graph, f, self.summaries)
+                    with stage("file", cpu=False):
+                        result = await self.file_processor.process_file(f, plan, governor, context, token)
+                    if result is not None:
+                        results.append(result)
+                    docs = self._documentation_text(result)
+                    if docs:
+                        self.summaries[f] = self._summary(f, docs)
+                    if on_result:
+                        with stage("ui"):
+                            on_result(f, result)
+
+                # Update progress
+                progress_bar.progress(len(scheduler.finished | {f}) / len(files))
+                async with changed:
+                    scheduler.mark_done(f)
+                    changed.notify_all()
+
+        profile = RunProfile(self.run_id) if self.profile else None
+        if profile:
+            # Workers and the threads they hand off to inherit the profile through the context
+            current_profile.set(profile)
+            profile.start()
+        try:
+            if files:
+                await asyncio.gather(*[worker() for _ in range(self.chunk_size)])
+        finally:
+            if profile:
+                profile.stop()
+                profile.write(os.path.join(self.output_dir, "profiles"))
+                self.last_profile = profile
+            # Mappings are only reused within a run; release them with it
+            self.file_cache_stats = self.file_processor.file_cache.stats()
+            self.file_processor.file_cache.close()
+            logger.info(f"File cache: {self.file_cache_stats}")
+        if governor and governor.stopped:
+            logger.warning(f"Stopped after {len(results)} of {len(files)} files: budget reached")
+        if token and token.cancelled:
+            logger.warning(f"Cancelled after {len(results)} of {len(files)} files")
         return results
 
+    @staticmethod
+    def _documentation_text(result) -> Optional[str]:
+        """Raw output of the documentation task in a crew result"""
+        outputs = getattr(result, 'tasks_output', None) or []
+        for output in outputs:
+            if output.agent == "Documentation Writer":
+                return output.raw
+        return outputs[-1].raw if outputs else None
+
+    def _summary(self, file_path: str, docs: str) -> str:
+        """Summary for the prompts of files importing ``file_path``, from its structured documentation if stored"""
+        data = self.store.read_json(file_path, "documentation")
+        if data:
+            try:
+                return DocumentationOutput.model_validate(data).summary()
+            except ValueError:
+                pass
+        return compact_summary(docs)
+
     def _get_code_files(self, directory_path: str) -> List[str]:
         """Get all supported code files from directory"""
-        extensions = {".py", ".js", ".html", ".css"}
+        extensions = CODE_EXTENSIONS
         files = []
         for root, _, filenames in os.walk(directory_path):
             for filename in filenames:
@@ -321,17 +725,47 @@ class DocumentationGenerator:
                     files.append(os.path.join(root, filename))
         return files
 
-    def consolidate_documentation(self, results: List[Dict]) -> str:
-        """Combine all documentation into a single comprehensive document"""
-        consolidated = []
-        
-        for result in results:
-            if result and isinstance(result, dict):
-                for agent_role, content in result.items():
-                    if content:
-                        consolidated.append(f"## {agent_role}\n\n{content}\n\n")
-        
-        return "\n".join(consolidated)
+    async def refresh_files(self, directory_path: str, paths: Set[str],
+                            token: Optional[CancellationToken] = None):
+        """Re-document only ``paths`` after they changed on disk and rebuild the consolidated document"""
+        files = self._get_code_files(directory_path)
+        self.file_processor.pipeline = default_pipeline(directory_path)
+        self.graph = DependencyGraph(files, directory_path)
+        for path in paths - set(self.graph.files):
+            # Deleted or renamed away
+            self.store.remove(path)
+            self.summaries.pop(path, None)
+            if path in self.file_processor.processed_files:
+                self.file_processor.processed_files.remove(path)
+
+        for f in self.graph.topological_order():
+            if f not in paths:
+                continue
+            context = dependency_context(self.graph, f, self.summaries)
+            if token and token.cancelled:
+                return
+            result = await self.file_processor.process_file(f, context=context, token=token, patch=True)
+            docs = self._documentation_text(result)
+            if docs:
+                self.summaries[f] = self._summary(f, docs)
+
+        documented = [f for f in self.graph.topological_order() if self.store.tasks(f)]
+        self.consolidate_documentation(documented)
+
+    def watch(self, directory_path: str, debounce: float = 1.0) -> WatchSession:
+        """Keep documentation of ``directory_path`` up to date in the background"""
+        files = {os.path.abspath(f) for f in self._get_code_files(directory_path)}
+        undocumented = {f for f in files if not self.store.tasks(f)}
+        # Stopping the session also abandons the LLM calls of the refresh in flight
+        token = CancellationToken()
+        session = WatchSession(directory_path, CODE_EXTENSIONS,
+                               lambda paths: self.refresh_files(directory_path, paths, token), debounce,
+                               on_stop=lambda: token.cancel("watch stopped"))
+        return session.start(undocumented)
+
+    def consolidate_documentation(self, keys: Optional[List[str]] = None) -> str:
+        """Combine all documentation of this run into a single document and return its path"""
+        return self.store.consolidate(self.doc_path, keys or self.file_processor.processed_files)
 
 def main():
     st.sidebar.image("LOGO.png", use_container_width=True)
@@ -339,60 +773,348 @@ def main():
     st.sidebar.info(
         "Advanced AI-powered code documentation generator with concurrent processing!"
     )
+    if cassette.enabled:
+        st.sidebar.warning(f"📼 Cassette {cassette.mode} mode: {cassette.path}")
+    if fake_llm_enabled():
+        st.sidebar.warning("🧪 Fake LLM mode: answers are generated locally")
+    if hedge_policy.enabled:
+        st.sidebar.caption(f"🏁 Hedging: {hedge_budget.summary()}")
+    shared = shared_runs.stats()
+    st.sidebar.caption(f"🔁 Shared runs: {shared['executions']} executed, {shared['shared']} reused")
 
-    input_method = st.radio("Select input method:", ["Upload Single File", "Enter Directory Path"])
+    input_method = st.radio("Select input method:", ["Upload Files or Archive", "Enter Directory Path"])
     
-    doc_generator = DocumentationGenerator()
+    profile = st.sidebar.toggle("🩺 Profile runs", value=profiling_enabled(),
+                                help="Time pipeline stages and sample stacks; adds a little overhead")
+    doc_generator = DocumentationGenerator(user_id=current_session_id(), profile=profile)
+
+    search_panel()
 
-    if input_method == "Upload Single File":
-        handle_single_file_upload(doc_generator)
+    if input_method == "Upload Files or Archive":
+        handle_upload(doc_generator)
     else:
         handle_directory_input(doc_generator)
+    show_saved_results()
 
-def handle_single_file_upload(doc_generator):
-    uploaded_file = st.file_uploader("📂 Upload Your Code File", 
-                                   type=["py", "js", "html", "css"], 
-                                   accept_multiple_files=False)
+def search_panel():
+    """Search box over every generated section, served from the full-text index"""
+    with st.expander("🔎 Search documentation"):
+        col1, col2 = st.columns([3, 1])
+        query = col1.text_input("Search for a symbol, topic or phrase", key="search_query")
+        task = col2.selectbox("Section", ["all"] + list(TASK_REGISTRY), key="search_task")
+        if not query:
+            st.caption(f"{search_index.stats()['chunks']} indexed chunks")
+            return
+        started = time.perf_counter()
+        hits = search_index.search(query, limit=20, task=None if task == "all" else task)
+        st.caption(f"{len(hits)} result(s) in {(time.perf_counter() - started) * 1000:.1f} ms")
+        for hit in hits:
+            title = f"**{os.path.basename(hit.file)}** · {hit.task}"
+            if hit.heading:
+                title += f" · {hit.heading}"
+            st.markdown(title)
+            st.caption(hit.file)
+            st.markdown(hit.snippet)
+
+def current_session_id() -> str:
+    """Streamlit session of the current script run, used for fair scheduling"""
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else "default"
+
+def handle_upload(doc_generator):
+    uploaded_files = st.file_uploader("📂 Upload code files, or a zip/tar archive of a project",
+                                      type=["py", "js", "html", "css", "zip", "tar", "gz", "tgz"],
+                                      accept_multiple_files=True)
     
-    if uploaded_file and st.button("🌟 Generate Documentation"):
-        with st.spinner("Processing file..."):
-            with NamedTemporaryFile(delete=False, suffix=os.path.splitext(uploaded_file.name)[1]) as temp_file:
-                temp_file.write(uploaded_file.read())
-                results = asyncio.run(doc_generator.file_processor.process_file(temp_file.name))
-                display_results(results, doc_generator)
+    if uploaded_files and st.button("🌟 Generate Documentation"):
+        token = start_cancellable_run()
+        # Uploads are streamed into a per-job scratch directory that is removed when the job ends.
+        # It is named after the content, so re-uploads reuse their output keys and cassette prompts
+        name = upload_digest((f.name, f) for f in uploaded_files)
+        with UploadJob(CODE_EXTENSIONS, name=name) as job:
+            try:
+                for uploaded_file in uploaded_files:
+                    job.add(uploaded_file.name, uploaded_file)
+            except UploadError as e:
+                st.error(f"Upload rejected: {e}")
+                return
+            if not job.files:
+                st.warning("No code files found in the upload.")
+                return
+            st.caption(f"Extracted {len(job.files)} code file(s), {job.total_bytes / 1024:.0f} KiB"
+                       + (f"; skipped {job.skipped} other file(s)" if job.skipped else ""))
+            stream_panel = LiveStreamPanel()
+            doc_generator.file_processor.on_stream = stream_panel.update
+            with st.spinner("Processing upload..."):
+                try:
+                    results = run_until_cancelled(
+                        doc_generator.process_directory(job.root, BudgetGovernor(BudgetLimits.from_env()),
+                                                        on_result=lambda f, _: stream_panel.finish(f), token=token),
+                        token,
+                    )
+                except PipelineConfigError as e:
+                    st.error(f"Invalid pipeline config: {e}")
+                    return
+            display_results(results, doc_generator)
+            show_profile(doc_generator.last_profile)
+
+def start_cancellable_run() -> CancellationToken:
+    """New cancellation token for this run, with a Stop button wired to it"""
+    previous = st.session_state.get("run_token")
+    if previous:
+        previous.cancel("superseded by a new run")
+    token = CancellationToken()
+    st.session_state["run_token"] = token
+    st.button("⏹️ Stop", on_click=token.cancel, key=f"stop_{id(token)}")
+    return token
+
+def run_until_cancelled(coroutine, token: CancellationToken):
+    """Run ``coroutine``; if the script run is torn down (rerun, page closed), cancel the token"""
+    try:
+        results = asyncio.run(coroutine)
+    except BaseException:
+        token.cancel("script run interrupted")
+        raise
+    if token.cancelled:
+        st.warning("Run stopped. Finished results were kept.")
+    return results
+
+PRIORITY_LABELS = {
+    "dependency": "Dependency order",
+    "shortest_job": "Shortest job first",
+    "entry_points": "Entry points and public API first",
+    "recent": "Recently changed first",
+}
+
+class LiveStreamPanel:
+    """Shows each file's task output while it streams in, from the LLM worker threads"""
+
+    def __init__(self):
+        self.container = st.container()
+        self.ctx = get_script_run_ctx()
+        self.slots: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def update(self, file_path: str, task: str, text: str):
+        # Worker threads need the script run context to update the page
+        add_script_run_ctx(threading.current_thread(), self.ctx)
+        with self._lock:
+            if file_path not in self.slots:
+                self.slots[file_path] = self.container.empty()
+            slot = self.slots[file_path]
+        slot.markdown(f"**✍️ {os.path.basename(file_path)} · {task}**\n\n{text[-2000:]}")
+
+    def finish(self, file_path: str):
+        with self._lock:
+            slot = self.slots.pop(file_path, None)
+        if slot:
+            slot.empty()
+
+def budget_sidebar() -> BudgetLimits:
+    """Budget inputs in the sidebar, defaulting to the DOC_MAX_* environment variables"""
+    defaults = BudgetLimits.from_env()
+    st.sidebar.markdown("### 💰 Run Budget")
+    max_cost = st.sidebar.number_input("Max cost (USD, 0 = unlimited)", min_value=0.0,
+                                       value=float(defaults.max_cost or 0.0), step=0.5)
+    max_tokens = st.sidebar.number_input("Max tokens (0 = unlimited)", min_value=0,
+                                         value=int(defaults.max_tokens or 0), step=100_000)
+    max_minutes = st.sidebar.number_input("Max minutes (0 = unlimited)", min_value=0.0,
+                                          value=float((defaults.max_seconds or 0) / 60), step=5.0)
+    return BudgetLimits(
+        max_cost=max_cost or None,
+        max_tokens=max_tokens or None,
+        max_seconds=max_minutes * 60 or None,
+    )
+
+def show_preflight(estimate: RunEstimate):
+    st.markdown("### 🧮 Preflight Estimate")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Estimated tokens", f"{estimate.total_tokens:,}")
+    col2.metric("Estimated cost", f"${estimate.cost:.2f}")
+    col3.metric("Estimated duration", f"{estimate.seconds / 60:.1f} min")
+    with st.expander("Per-file estimate"):
+        st.dataframe(estimate.as_rows())
 
 def handle_directory_input(doc_generator):
     directory_path = st.text_input("📁 Enter Directory Path")
     
-    if directory_path and os.path.isdir(directory_path) and st.button("🌟 Generate Documentation"):
-        with st.spinner("Processing directory..."):
-            results = asyncio.run(doc_generator.process_directory(directory_path))
+    if directory_path and os.path.isdir(directory_path):
+        limits = budget_sidebar()
+        try:
+            show_preflight(doc_generator.preflight(directory_path))
+        except PipelineConfigError as e:
+            st.error(f"Invalid pipeline config: {e}")
+            return
+
+        priority = st.selectbox("Processing order", DirectoryScheduler.POLICIES,
+                                format_func=lambda p: PRIORITY_LABELS[p])
+        respect_dependencies = st.checkbox("Document dependencies before the files that import them", value=True)
+
+        if st.toggle("👀 Watch mode: keep documentation up to date as files change"):
+            handle_watch_mode(directory_path)
+            return
+        stop_watch_session()
+
+        if st.button("🌟 Generate Documentation"):
+            governor = BudgetGovernor(limits)
+            st.markdown("### ⏱️ Results as they land")
+            live_results = st.container()
+
+            stream_panel = LiveStreamPanel()
+            doc_generator.file_processor.on_stream = stream_panel.update
+
+            def show_result(file_path, result):
+                stream_panel.finish(file_path)
+                docs = doc_generator._documentation_text(result)
+                label = os.path.relpath(file_path, directory_path)
+                with live_results.expander(label):
+                    if docs:
+                        show_preview(docs, os.path.basename(file_path) + ".md", key=f"live_download_{label}")
+                    else:
+                        st.markdown("_No documentation produced_")
+
+            token = start_cancellable_run()
+            with st.spinner("Processing directory..."):
+                results = run_until_cancelled(doc_generator.process_directory(
+                    directory_path, governor, priority, respect_dependencies,
+                    on_result=show_result, token=token
+                ), token)
+            if governor.stopped:
+                st.warning("Run stopped early because the budget was reached.")
+            st.caption(f"Spend: {governor.summary()}")
+            cache = doc_generator.file_cache_stats
+            if cache:
+                st.caption(f"File cache: {cache['files']} files mapped, {cache['hits']} hits, {cache['misses']} misses")
             display_results(results, doc_generator)
+            show_profile(doc_generator.last_profile)
+
+class WatchHandle:
+    """Session-state entry owning a background watch.
+
+    Streamlit has no session-end hook, but it drops a session's state when the
+    browser session ends; the finalizer then stops the watch.
+    """
+
+    def __init__(self, directory_path: str, generator: DocumentationGenerator):
+        self.directory_path = directory_path
+        # The session outlives this script run, so it owns its own generator
+        self.generator = generator
+        self.session = generator.watch(directory_path)
+        self.stop = weakref.finalize(self, self.session.stop)
+
+def stop_watch_session():
+    handle = st.session_state.pop("watch_session", None)
+    if handle:
+        handle.stop()
+
+def handle_watch_mode(directory_path: str):
+    """Start (or keep) a background watch of ``directory_path`` and show its live document"""
+    directory_path = os.path.abspath(directory_path)
+    current = st.session_state.get("watch_session")
+    if not current or current.directory_path != directory_path:
+        stop_watch_session()
+        st.session_state["watch_session"] = WatchHandle(directory_path, DocumentationGenerator())
+    handle = st.session_state["watch_session"]
+    session, watch_generator = handle.session, handle.generator
+
+    @st.fragment(run_every="2s")
+    def live_document():
+        st.info(f"Watching {directory_path}: {session.status}")
+        if session.last_changed:
+            st.caption("Last refreshed: " + ", ".join(os.path.relpath(p, directory_path) for p in sorted(session.last_changed)))
+        if session.version:
+            store = watch_generator.store
+            keys = [k for k in store.files() if k.startswith(directory_path + os.sep)]
+            DocumentationViewer(store, keys, download_path=watch_generator.doc_path, widget_key="watch_viewer").render()
+
+    live_document()
 
 def display_results(results: List[Dict], doc_generator: DocumentationGenerator):
     if results:
         st.success("Documentation generated successfully!")
-        
-        # Consolidate documentation
-        consolidated_docs = doc_generator.consolidate_documentation(results)
-        
-        # Save consolidated documentation
-        doc_path = os.path.join(doc_generator.output_dir, "complete_documentation.md")
-        with open(doc_path, 'w') as f:
-            f.write(consolidated_docs)
-        
-        # Display and download options
-        st.markdown("### 📖 Generated Documentation")
-        st.download_button(
-            "⬇️ Download Complete Documentation",
-            consolidated_docs,
-            file_name="complete_documentation.md"
-        )
-        
-        with st.expander("👀 View Documentation", expanded=True):
-            st.markdown("documentation.md")
+        # Consolidate documentation from the full outputs on disk; the viewer reads it back lazily
+        doc_path = doc_generator.consolidate_documentation()
+        st.session_state["results_view"] = (doc_generator.store.root,
+                                            list(doc_generator.file_processor.processed_files), doc_path)
     else:
         st.error("Failed to generate documentation. Please check the logs for details.")
 
+def show_profile(profile: Optional[RunProfile]):
+    """Where the run's time went: stage breakdown, CPU versus wait, and the hottest local frames"""
+    if profile is None:
+        return
+    with st.expander("🩺 Run profile"):
+        summary = profile.summary()
+        samples = summary["samples"]
+        total = sum(samples.values()) or 1
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Run time", f"{summary['seconds']:.1f} s")
+        col2.metric("Samples on CPU", f"{samples.get('cpu', 0) / total:.0%}")
+        col3.metric("Samples waiting", f"{samples.get('wait', 0) / total:.0%}")
+        st.caption("Self time excludes nested stages; wait is self time the stage's thread spent off CPU, "
+                   "e.g. on providers (llm:*) or for a crew slot (queue)")
+        st.dataframe(summary["stages"])
+        if summary["hot_frames"]:
+            st.markdown("**Hottest frames on CPU**")
+            st.dataframe([{"frame": frame, "samples": count} for frame, count in summary["hot_frames"]])
+        folded = profile.folded()
+        st.download_button("📥 Download flame graph stacks", data=folded, file_name=f"{profile.run_id}.folded",
+                           mime="text/plain", key=f"profile_{profile.run_id}")
+
+def show_saved_results():
+    """Browse the last run's documentation; kept in the session so navigation survives reruns"""
+    saved = st.session_state.get("results_view")
+    if not saved:
+        return
+    # doc_path is the run's own consolidated file; the store re-reads the shared index
+    root, keys, doc_path = saved
+    st.markdown("### 📖 Generated Documentation")
+    DocumentationViewer(OutputStore(root), keys, download_path=doc_path).render()
+
+def cli(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point: ``python example.py DIRECTORY [--watch]``"""
+    parser = argparse.ArgumentParser(description="Generate documentation for a code directory")
+    parser.add_argument("directory")
+    parser.add_argument("--watch", action="store_true", help="keep documentation up to date as files change")
+    parser.add_argument("--debounce", type=float, default=1.0, help="seconds of quiet before refreshing")
+    parser.add_argument("--profile", action="store_true", help="time stages and sample stacks of the run")
+    args = parser.parse_args(argv)
+
+    doc_generator = DocumentationGenerator(profile=args.profile or None)
+    if not args.watch:
+        token = CancellationToken()
+
+        def handle_sigint(signum, frame):
+            # First Ctrl+C stops cleanly, a second one aborts
+            print("Cancelling, press Ctrl+C again to abort", file=sys.stderr)
+            token.cancel("interrupted")
+            signal.signal(signal.SIGINT, signal.default_int_handler)
+
+        signal.signal(signal.SIGINT, handle_sigint)
+        try:
+            asyncio.run(doc_generator.process_directory(
+                args.directory, BudgetGovernor(BudgetLimits.from_env()), token=token
+            ))
+        except PipelineConfigError as e:
+            print(f"Invalid pipeline config: {e}", file=sys.stderr)
+            return 2
+        print(doc_generator.consolidate_documentation())
+        if doc_generator.last_profile:
+            for row in doc_generator.last_profile.rows():
+                print(f"{row['stage']:<40} {row['calls']:>6} {row['self_s']:>10.2f}s", file=sys.stderr)
+        return 130 if token.cancelled else 0
+
+    session = doc_generator.watch(args.directory, args.debounce)
+    print(f"Watching {args.directory}, press Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        session.stop()
+    return 0
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if st.runtime.exists():
+        main()
+    else:
+        sys.exit(cli())
\ No newline at end of file
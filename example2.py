@@ -1,10 +1,14 @@
 import streamlit as st
 import os
+import uuid
 from crewai.process import Process
 from crewai_tools import FileReadTool, SerperDevTool,DirectoryReadTool
 from tempfile import NamedTemporaryFile
 from crewai import Agent, Crew, Process, Task, LLM
 from dotenv import load_dotenv
+from local_memory import LocalMemoryStore, crew_memory
+from outputs import OutputStore
+from compaction import TaskOutputCompactor
 
 load_dotenv()
 st.title("Code Documentation Agent")
@@ -17,6 +21,10 @@ documentation_llm = LLM(
 search_tool=SerperDevTool()
 file_read_tool = FileReadTool()
 directory = DirectoryReadTool()
+# Bounded local store behind crew memory instead of CrewAI's default embedding stores
+memory_store = LocalMemoryStore()
+# Full task outputs, kept out of the prompts of later tasks
+output_store = OutputStore(os.path.join("documentation_output", "full"))
 
 def get_python_files(directory_path):
     """Get all Python files from the specified directory."""
@@ -277,11 +285,17 @@ def CodeCrew(directory_path=None):
     )
 
 
+    # Each run gets its own memory namespace so earlier runs never leak into the context
+    run_id = uuid.uuid4().hex[:12]
+    tasks=[analyze_code_task, clean_entities_task, gather_insights_task,research_entities_task,comment_code_task, generate_documentation_task, optimize_code_task, error_handling_task, test_documentation_task]
+    # Downstream tasks only see bounded digests; full outputs stay on disk for the final document
+    TaskOutputCompactor(output_store, run_id).attach(tasks)
     crew = Crew(
         agents=[code_analyzer, entity_cleaner, insight_gatherer,research_assistant, commenter, documenter, optimizer, error_handler, tester],
-        tasks=[analyze_code_task, clean_entities_task, gather_insights_task,research_entities_task,comment_code_task, generate_documentation_task, optimize_code_task, error_handling_task, test_documentation_task],
+        tasks=tasks,
         process=Process.sequential,
-        verbose=True
+        verbose=True,
+        **crew_memory(memory_store, f"{run_id}/{file_path or directory_path}")
     )
     
     
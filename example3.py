@@ -1,11 +1,16 @@
 import streamlit as st
 import asyncio
 import os
+import uuid
 from crewai.process import Process
 from crewai_tools import FileReadTool, SerperDevTool, DirectoryReadTool,FileWriterTool
 from tempfile import NamedTemporaryFile
 from crewai import Agent, Crew, Process, Task, LLM
 from dotenv import load_dotenv
+from local_memory import LocalMemoryStore, crew_memory
+from outputs import OutputStore
+from compaction import TaskOutputCompactor
+from viewer import DocumentationViewer
 import shutil
 
 load_dotenv()
@@ -20,6 +25,15 @@ search_tool = SerperDevTool()
 file_read_tool = FileReadTool()
 directory = DirectoryReadTool()
 write = FileWriterTool()
+# Bounded local store behind crew memory instead of CrewAI's default embedding stores
+memory_store = LocalMemoryStore()
+# Full task outputs, kept out of the prompts of later tasks
+output_store = OutputStore(os.path.join("documentation_output", "full"))
+
+
+def complete_doc_path(run_id):
+    """Consolidated document of one run; runs of different sessions never share it"""
+    return os.path.join("documentation_output", f"complete_documentation_{run_id}.md")
 
 def get_python_files(directory_path):
     """Get all files from the specified directory."""
@@ -42,7 +56,7 @@ def save_commented_file(original_path, content):
         f.write(content)
     return new_path
 
-def CodeCrew(directory_path=None,file_path=None):
+def CodeCrew(directory_path=None,file_path=None,run_id=None):
 
     code_analyzer = Agent(
         role="Code Analyzer",
@@ -304,11 +318,17 @@ def CodeCrew(directory_path=None,file_path=None):
         tools=[file_read_tool,directory]
     )
 
+    # Each run gets its own memory namespace so earlier runs never leak into the context
+    run_id = run_id or uuid.uuid4().hex[:12]
+    tasks=[analyze_code_task, clean_entities_task, gather_insights_task,research_entities_task,comment_code_task,refactoring_task,generate_documentation_task]
+    # Downstream tasks only see bounded digests; full outputs stay on disk for the final document
+    TaskOutputCompactor(output_store, run_id).attach(tasks)
     crew = Crew(
         agents=[code_analyzer, entity_cleaner, insight_gatherer,research_assistant, commenter,refactoring_agent, documenter],
-        tasks=[analyze_code_task, clean_entities_task, gather_insights_task,research_entities_task,comment_code_task,refactoring_task,generate_documentation_task],
+        tasks=tasks,
         process=Process.sequential,
-        verbose=True
+        verbose=True,
+        **crew_memory(memory_store, f"{run_id}/{file_path or directory_path}")
     )
     
    # Create output directory for documentation
@@ -365,19 +385,11 @@ if input_method == "Upload Single File":
             
         if st.button("🌟 **Generate Documentation**"):
             with st.spinner("Processing the file and generating documentation. Please wait..."):
-                documentation_content = CodeCrew(file_path=file_path)
-                if documentation_content:
+                run_id = uuid.uuid4().hex[:12]
+                if CodeCrew(file_path=file_path, run_id=run_id):
                     st.success("Documentation generated successfully!")
-                    
-                    st.subheader("📖 **Generated Documentation**")
-                    st.download_button(
-                        "Download Documentation",
-                        data=documentation_content,
-                        file_name="documentation.md"
-                    )
-                    
-                    with st.expander("Click here to view the documentation", expanded=True):
-                        st.markdown(documentation_content)
+                    st.session_state["viewer_runs"] = {run_id: uploaded_file.name}
+                    st.session_state["viewer_doc"] = output_store.consolidate(complete_doc_path(run_id), [run_id])
                 else:
                     st.error("Failed to generate documentation!")
 
@@ -398,32 +410,22 @@ else:
                     
             if st.button("🌟 **Generate Documentation for All Files**"):
                 with st.spinner("Processing all files and generating documentation. Please wait..."):
+                    runs = {}
                     for file_path in python_files:
                         st.write(f"Processing: {os.path.basename(file_path)}")
-                        results = CodeCrew(directory_path=directory_path, file_path=file_path)
-            
-                    documentation_path = '/Users/sam22ridhi/Downloads/project/documentation.md'
-                    if os.path.exists(documentation_path):
-                        with open(documentation_path, 'r') as doc_file:
-                            documentation_content = doc_file.read()
-                        
-                        st.subheader("📖 **Generated Documentation**")
-                        st.download_button("Download Documentation", data=documentation_content, file_name="documentation.md")
-                        st.markdown("""
-                            <style>
-                                .markdown-doc-container {
-                                    background-color: #ffffff;
-                                    border-radius: 10px;
-                                    padding: 20px;
-                                    box-shadow: 0 4px 8px rgba(0,0,0,0.1);
-                                }
-                            </style>
-                        """,unsafe_allow_html=True)
-                        
-                        with st.expander("Click here to view the documentation", expanded=True):
-                            st.markdown(f"<div class='markdown-doc-container'>{documentation_content}</div>", unsafe_allow_html=True)
-                    else:
-                        st.error("Documentation file not found!")
-                        
+                        run_id = uuid.uuid4().hex[:12]
+                        if CodeCrew(directory_path=directory_path, file_path=file_path, run_id=run_id):
+                            runs[run_id] = os.path.relpath(file_path, directory_path)
+                    st.session_state["viewer_runs"] = runs
+                    if runs:
+                        st.session_state["viewer_doc"] = output_store.consolidate(
+                            complete_doc_path(uuid.uuid4().hex[:12]), list(runs))
+
     elif directory_path:
         st.error("Invalid directory path. Please enter a valid directory path.")
+
+# Browse the full task outputs on disk a section at a time, across reruns
+if st.session_state.get("viewer_runs"):
+    runs = st.session_state["viewer_runs"]
+    st.subheader("📖 **Generated Documentation**")
+    DocumentationViewer(output_store, list(runs), labels=runs, download_path=st.session_state.get("viewer_doc")).render()
@@ -0,0 +1,218 @@
+import os
+import re
+import ast
+import logging
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+JS_COMMENT = re.compile(r"/\*.*?\*/|//[^\n]*", re.DOTALL)
+JS_IMPORT = re.compile(r"""(?:import\s[^'";]*?from\s*|import\s*|require\(\s*)['"]([^'"]+)['"]""")
+JS_EXPORT = re.compile(
+    r"\bexport\s+(default\s+)?(?:async\s+)?(?:function\*?|class|const|let|var)?\s*([A-Za-z_$][\w$]*)?"
+)
+JS_EXPORT_LIST = re.compile(r"\bexport\s*\{([^}]*)\}")
+JS_COMMONJS_EXPORT = re.compile(r"\b(?:module\.)?exports\.([A-Za-z_$][\w$]*)\s*=")
+JS_FUNCTION = re.compile(r"\b(async\s+)?function\*?\s+([A-Za-z_$][\w$]*)\s*\(([^)]*)\)")
+JS_ARROW = re.compile(
+    r"\b(?:const|let|var)\s+([A-Za-z_$][\w$]*)\s*=\s*(async\s+)?(?:function\b[^(]*\(([^)]*)\)|\(([^)]*)\)\s*=>|([A-Za-z_$][\w$]*)\s*=>)"
+)
+JS_CLASS = re.compile(r"\bclass\s+([A-Za-z_$][\w$]*)(?:\s+extends\s+([\w$.]+))?\s*\{")
+JS_METHOD = re.compile(r"^\s+(?:static\s+)?(?:async\s+)?(?:get\s+|set\s+)?([A-Za-z_$][\w$]*)\s*\([^)]*\)\s*\{", re.MULTILINE)
+JS_KEYWORDS = {"if", "for", "while", "switch", "catch", "function", "return", "constructor"}
+
+CSS_COMMENT = re.compile(r"/\*.*?\*/", re.DOTALL)
+CSS_RULE = re.compile(r"(?:^|[{};])\s*([^{}@;]+?)\s*\{")
+CSS_CUSTOM_PROPERTY = re.compile(r"(--[\w-]+)\s*:\s*([^;}]+)")
+CSS_AT_RULE = re.compile(r"@(media|supports|keyframes|font-face|import|layer|container)\b\s*([^{;]*)")
+
+
+@dataclass
+class FileOutline:
+    """Locally extracted structure of one source file"""
+    language: str
+    # Section title -> entries, in source order
+    sections: Dict[str, List[str]] = field(default_factory=dict)
+
+    def add(self, section: str, entry: str):
+        entries = self.sections.setdefault(section, [])
+        if entry not in entries:
+            entries.append(entry)
+
+    def render(self, max_chars: int = 2000, max_entries: int = 25) -> str:
+        lines = []
+        for section, entries in self.sections.items():
+            if not entries:
+                continue
+            shown = entries[:max_entries]
+            more = f" (+{len(entries) - len(shown)} more)" if len(entries) > len(shown) else ""
+            lines.append(f"- {section}{more}: " + "; ".join(shown))
+        text = "\n".join(lines)
+        return text if len(text) <= max_chars else text[:max_chars].rsplit("\n", 1)[0] + "\n- …"
+
+
+def _line_of(source: str, offset: int) -> int:
+    return source.count("\n", 0, offset) + 1
+
+
+def extract_python(source: str) -> FileOutline:
+    outline = FileOutline("python")
+    try:
+        tree = ast.parse(source)
+    except SyntaxError as e:
+        outline.add("Parse error", str(e))
+        return outline
+    doc = ast.get_docstring(tree)
+    if doc:
+        outline.add("Module docstring", doc.strip().splitlines()[0])
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                outline.add("Imports", alias.name)
+        elif isinstance(node, ast.ImportFrom):
+            outline.add("Imports", "." * node.level + (node.module or ""))
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            prefix = "async " if isinstance(node, ast.AsyncFunctionDef) else ""
+            outline.add("Functions", f"{prefix}{node.name}({ast.unparse(node.args)}) L{node.lineno}")
+        elif isinstance(node, ast.ClassDef):
+            bases = ", ".join(ast.unparse(b) for b in node.bases)
+            methods = [n.name for n in node.body if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))]
+            outline.add("Classes", f"{node.name}({bases}) L{node.lineno} [{', '.join(methods)}]")
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            for target in targets:
+                if isinstance(target, ast.Name) and target.id.isupper():
+                    outline.add("Constants", target.id)
+        elif isinstance(node, ast.If) and "__main__" in ast.unparse(node.test):
+            outline.add("Entry point", f"if __name__ == '__main__' L{node.lineno}")
+    return outline
+
+
+def extract_javascript(source: str) -> FileOutline:
+    outline = FileOutline("javascript")
+    code = JS_COMMENT.sub(lambda m: "\n" * m.group(0).count("\n"), source)
+    for module in JS_IMPORT.findall(code):
+        outline.add("Imports", module)
+    for match in JS_EXPORT.finditer(code):
+        default, name = match.groups()
+        if name or default:
+            outline.add("Exports", f"default {name or ''}".strip() if default else name)
+    for names in JS_EXPORT_LIST.findall(code):
+        for name in names.split(","):
+            if name.strip():
+                outline.add("Exports", name.strip())
+    for name in JS_COMMONJS_EXPORT.findall(code):
+        outline.add("Exports", name)
+    for match in JS_CLASS.finditer(code):
+        name, base = match.groups()
+        # Methods are the indented `name(...) {` heads up to the class's closing brace
+        depth, end = 0, match.end() - 1
+        for end in range(match.end() - 1, len(code)):
+            depth += {"{": 1, "}": -1}.get(code[end], 0)
+            if depth == 0:
+                break
+        methods = [m for m in JS_METHOD.findall(code, match.end(), end) if m not in JS_KEYWORDS]
+        extends = f" extends {base}" if base else ""
+        outline.add("Classes", f"{name}{extends} L{_line_of(code, match.start())} [{', '.join(methods)}]")
+    for match in JS_FUNCTION.finditer(code):
+        is_async, name, params = match.groups()
+        outline.add("Functions", f"{'async ' if is_async else ''}{name}({params.strip()}) L{_line_of(code, match.start())}")
+    for match in JS_ARROW.finditer(code):
+        name, is_async, fn_params, arrow_params, single = match.groups()
+        params = next((p for p in (fn_params, arrow_params, single) if p is not None), "")
+        outline.add("Functions", f"{'async ' if is_async else ''}{name}({params.strip()}) L{_line_of(code, match.start())}")
+    return outline
+
+
+class _HTMLOutlineParser(HTMLParser):
+    def __init__(self, outline: FileOutline):
+        super().__init__(convert_charrefs=True)
+        self.outline = outline
+        self.inline_scripts = 0
+        self._form: Optional[List[str]] = None
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if attrs.get("id"):
+            self.outline.add("Element ids", f"{tag}#{attrs['id']}")
+        if tag == "title":
+            self._in_title = True
+        elif tag == "script":
+            if attrs.get("src"):
+                self.outline.add("Scripts", attrs["src"])
+            else:
+                self.inline_scripts += 1
+        elif tag == "link" and attrs.get("href"):
+            rel = attrs.get("rel") or "link"
+            self.outline.add("Stylesheets" if "stylesheet" in rel else "Links", attrs["href"])
+        elif tag == "a" and attrs.get("href") and not attrs["href"].startswith("#"):
+            self.outline.add("Links", attrs["href"])
+        elif tag == "form":
+            self._form = [f"{(attrs.get('method') or 'get').upper()} {attrs.get('action') or '(same page)'}"]
+        elif tag in ("input", "select", "textarea", "button") and self._form is not None:
+            name = attrs.get("name") or attrs.get("id")
+            if name:
+                self._form.append(f"{name}:{attrs.get('type') or tag}")
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self._in_title = False
+        elif tag == "form" and self._form is not None:
+            head, *fields = self._form
+            self.outline.add("Forms", f"{head} [{', '.join(fields)}]")
+            self._form = None
+
+    def handle_data(self, data):
+        if self._in_title and data.strip():
+            self.outline.add("Title", data.strip())
+
+
+def extract_html(source: str) -> FileOutline:
+    outline = FileOutline("html")
+    parser = _HTMLOutlineParser(outline)
+    try:
+        parser.feed(source)
+        parser.close()
+    except Exception as e:
+        outline.add("Parse error", str(e))
+    if parser.inline_scripts:
+        outline.add("Scripts", f"{parser.inline_scripts} inline script(s)")
+    return outline
+
+
+def extract_css(source: str) -> FileOutline:
+    outline = FileOutline("css")
+    code = CSS_COMMENT.sub("", source)
+    for name, value in CSS_AT_RULE.findall(code):
+        outline.add("At-rules", f"@{name} {value.strip()}".strip())
+    for name, value in CSS_CUSTOM_PROPERTY.findall(code):
+        outline.add("Custom properties", f"{name}: {value.strip()}")
+    for head in CSS_RULE.findall(code):
+        head = " ".join(head.split())
+        # Keyframe steps and at-rule preludes are not selectors
+        if head and not re.fullmatch(r"(?:from|to|[\d.]+%)(?:\s*,\s*(?:from|to|[\d.]+%))*", head):
+            for selector in head.split(","):
+                outline.add("Selectors", selector.strip())
+    return outline
+
+
+EXTRACTORS: Dict[str, Callable[[str], FileOutline]] = {
+    ".py": extract_python,
+    ".js": extract_javascript,
+    ".mjs": extract_javascript,
+    ".jsx": extract_javascript,
+    ".html": extract_html,
+    ".htm": extract_html,
+    ".css": extract_css,
+}
+
+
+def extract_outline(file_path: str, source: str) -> Optional[FileOutline]:
+    """Structure of ``source`` by file extension, or None for unsupported file types"""
+    extractor = EXTRACTORS.get(os.path.splitext(file_path)[1].lower())
+    if extractor is None:
+        return None
+    return extractor(source)
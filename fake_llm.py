@@ -0,0 +1,119 @@
+import os
+import json
+import time
+import random
+import hashlib
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Type, get_args, get_origin
+
+from crewai import LLM
+from pydantic import BaseModel
+
+from cancellation import RunCancelled, current_token
+from schemas import TASK_SCHEMAS
+from streaming import current_stream
+
+logger = logging.getLogger(__name__)
+
+SECTIONS = ("Overview", "Key Components", "Usage", "Dependencies", "Notes")
+FILLER = ("This part of the code handles input validation, error reporting and the hand-off "
+          "to the next processing step. It keeps its state local and returns plain values. ")
+
+
+def fake_llm_enabled() -> bool:
+    return os.getenv("DOC_FAKE_LLM", "0").lower() in ("1", "true", "yes")
+
+
+@dataclass
+class FakeSettings:
+    # Seconds per call, uniformly spread by +/- jitter
+    latency: float = 1.0
+    jitter: float = 0.5
+    # Fraction of calls that raise like a failing provider
+    failure_rate: float = 0.0
+    # Size of each answer
+    answer_chars: int = 1500
+    # Streamed answers arrive in this many chunks
+    chunks: int = 20
+
+    @classmethod
+    def from_env(cls) -> "FakeSettings":
+        return cls(
+            latency=float(os.getenv("DOC_FAKE_LLM_LATENCY", cls.latency)),
+            jitter=float(os.getenv("DOC_FAKE_LLM_JITTER", cls.jitter)),
+            failure_rate=float(os.getenv("DOC_FAKE_LLM_FAILURE_RATE", cls.failure_rate)),
+            answer_chars=int(os.getenv("DOC_FAKE_LLM_CHARS", cls.answer_chars)),
+        )
+
+
+def _fake_value(annotation, label: str):
+    """Plausible value of a schema field, so structured answers validate"""
+    if get_origin(annotation) in (list, List):
+        return [_fake_value(get_args(annotation)[0], f"{label}_1")]
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return _fake_instance(annotation, label)
+    if annotation is int or int in get_args(annotation):
+        return 1
+    return FILLER.strip() if label.endswith(("description", "overview", "summary", "note")) else label
+
+
+def _fake_instance(schema: Type[BaseModel], label: str) -> Dict:
+    return {name: _fake_value(field.annotation, f"{label}_{name}") for name, field in schema.model_fields.items()}
+
+
+class FakeLLM(LLM):
+    """Offline stand-in for a provider LLM, enabled with DOC_FAKE_LLM=1.
+
+    Answers every call with generated markdown, or JSON matching the task's output
+    schema when the prompt asks for one, after a simulated delay, streaming
+    it into the current StreamSink like a real provider would. Used by the load
+    test harness to exercise the app without API keys, cost or rate limits.
+    """
+
+    def __init__(self, model: str, settings: Optional[FakeSettings] = None, **kwargs):
+        super().__init__(model=model, temperature=kwargs.get("temperature"))
+        self.settings = settings or FakeSettings.from_env()
+
+    def _answer(self, messages) -> str:
+        prompt = messages if isinstance(messages, str) else "\n".join(str(m.get("content", "")) for m in messages)
+        digest = hashlib.sha256(prompt.encode()).hexdigest()
+        for schema in sorted(TASK_SCHEMAS.values(), key=lambda m: -len(m.model_fields)):
+            # CrewAI appends the schema of the expected output to the prompt
+            if all(f'"{name}"' in prompt for name in schema.model_fields):
+                answer = json.dumps(_fake_instance(schema, f"symbol_{digest[:6]}"), indent=1)
+                return "Thought: I now know the final answer\nFinal Answer: " + answer
+        lines = [f"# Generated notes {digest[:8]}"]
+        while sum(len(line) + 1 for line in lines) < self.settings.answer_chars:
+            lines.append(f"\n## {SECTIONS[(len(lines) - 1) % len(SECTIONS)]}\n")
+            lines.append(FILLER * 2)
+        return "Thought: I now know the final answer\nFinal Answer: " + "\n".join(lines)
+
+    def _sleep(self, seconds: float):
+        token = current_token.get()
+        if token is None:
+            time.sleep(seconds)
+        elif token.wait(seconds):
+            raise RunCancelled(token.reason)
+
+    def call(self, messages, tools: Optional[List[dict]] = None, callbacks=None,
+             available_functions: Optional[Dict] = None, *args, **kwargs):
+        settings = self.settings
+        delay = max(0.0, settings.latency + random.uniform(-settings.jitter, settings.jitter))
+        if random.random() < settings.failure_rate:
+            self._sleep(delay / 2)
+            raise RuntimeError(f"Simulated provider failure from {self.model}")
+
+        answer = self._answer(messages)
+        sink = current_stream.get()
+        if sink is None:
+            self._sleep(delay)
+            return answer
+
+        call_id = sink.begin()
+        step = max(1, len(answer) // settings.chunks)
+        for start in range(0, len(answer), step):
+            self._sleep(delay / settings.chunks)
+            sink.write(call_id, answer[start:start + step], answer[:start + step])
+        sink.write(call_id, "", answer, final=True)
+        return answer
@@ -0,0 +1,115 @@
+import os
+import mmap
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class FileContentCache:
+    """Per-run cache of memory-mapped source files with a byte budget and LRU eviction"""
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes or int(os.getenv("DOC_FILE_CACHE_BYTES", 64 * 1024 * 1024))
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        # abspath -> (mtime_ns, size, mmap or None for empty files)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        # Reentrant so a consumer may read another file while holding a view
+        self._lock = threading.RLock()
+
+    def _map(self, path: str, stat: os.stat_result) -> Optional[mmap.mmap]:
+        if stat.st_size == 0:
+            return None
+        with open(path, "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _evict(self):
+        while self.size > self.max_bytes and len(self._entries) > 1:
+            path, (_, size, mapped) = self._entries.popitem(last=False)
+            self.size -= size
+            if mapped is not None:
+                mapped.close()
+            logger.debug(f"Evicted {path} from file cache")
+
+    def _mapping(self, path: str) -> Optional[mmap.mmap]:
+        """Current mapping of ``path``, remapped if it changed on disk; called with the lock held"""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        entry = self._entries.get(path)
+        if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+            self.hits += 1
+            self._entries.move_to_end(path)
+        else:
+            # New or changed on disk since it was mapped
+            self.misses += 1
+            if entry:
+                self.size -= entry[1]
+                if entry[2] is not None:
+                    entry[2].close()
+            entry = (stat.st_mtime_ns, stat.st_size, self._map(path, stat))
+            self._entries[path] = entry
+            self.size += stat.st_size
+            self._evict()
+        return entry[2]
+
+    @contextmanager
+    def view(self, path: str) -> Iterator[memoryview]:
+        """Zero-copy view of the file's bytes, valid only inside the ``with`` block.
+
+        The lock is held meanwhile, so the mapping is not evicted or closed under the view.
+        """
+        with self._lock:
+            mapped = self._mapping(path)
+            with memoryview(mapped if mapped is not None else b"") as data:
+                yield data
+
+    def get(self, path: str) -> str:
+        with self._lock:
+            mapped = self._mapping(path)
+            # Decode straight from the mapping rather than copying it into bytes first
+            return str(mapped, "utf-8", "replace") if mapped is not None else ""
+
+    def read_lines(self, path: str, start_line: int = 1, line_count: Optional[int] = None) -> str:
+        lines = self.get(path).splitlines(keepends=True)
+        start = max(start_line, 1) - 1
+        end = None if line_count is None else start + line_count
+        return "".join(lines[start:end])
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"files": len(self._entries), "bytes": self.size, "hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        with self._lock:
+            for _, _, mapped in self._entries.values():
+                if mapped is not None:
+                    mapped.close()
+            self._entries.clear()
+            self.size = 0
+
+
+def cached_file_read_tool(cache: FileContentCache):
+    """FileReadTool that reads through ``cache`` instead of opening the file every call"""
+    from crewai_tools import FileReadTool
+
+    tool = FileReadTool()
+
+    def _run(**kwargs) -> str:
+        file_path = kwargs.get("file_path", getattr(tool, "file_path", None))
+        if not file_path:
+            return "Error: No file path provided."
+        try:
+            return cache.read_lines(file_path, kwargs.get("start_line", 1) or 1, kwargs.get("line_count"))
+        except FileNotFoundError:
+            return f"Error: File not found at path: {file_path}"
+        except OSError as e:
+            return f"Error: Failed to read file {file_path}. {str(e)}"
+
+    # BaseTool is a pydantic model, so bypass its attribute validation
+    object.__setattr__(tool, "_run", _run)
+    return tool
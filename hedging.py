@@ -0,0 +1,231 @@
+import os
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from contextvars import copy_context
+from dataclasses import dataclass
+from functools import partial
+from typing import List, Dict, Optional
+
+from crewai import LLM
+
+from async_runner import llm_loop
+from cancellation import CancellationToken, RunCancelled, current_token
+from llm_wrapper import WrappedLLM
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class HedgePolicy:
+    enabled: bool = False
+    # Hedge once a call runs longer than this percentile of recent latencies
+    percentile: float = 0.95
+    min_samples: int = 10
+    # Threshold used until enough samples have been collected
+    default_threshold: float = 30.0
+    # At most this fraction of calls, and this many in total, may be hedged
+    max_ratio: float = 0.1
+    max_hedges: Optional[int] = None
+
+    @classmethod
+    def from_env(cls) -> "HedgePolicy":
+        max_hedges = os.getenv("DOC_HEDGE_MAX")
+        return cls(
+            enabled=os.getenv("DOC_HEDGE", "0").lower() in ("1", "true", "yes"),
+            percentile=float(os.getenv("DOC_HEDGE_PERCENTILE", 0.95)),
+            max_ratio=float(os.getenv("DOC_HEDGE_MAX_RATIO", 0.1)),
+            max_hedges=int(max_hedges) if max_hedges else None,
+        )
+
+
+class LatencyTracker:
+    """Sliding window of call latencies per model"""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, model: str, seconds: float):
+        with self._lock:
+            self._samples.setdefault(model, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, model: str, p: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples.get(model, ()))
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(p * len(samples)))]
+
+    def count(self, model: str) -> int:
+        with self._lock:
+            return len(self._samples.get(model, ()))
+
+
+class HedgeBudget:
+    """Shared counters that cap how many calls get hedged"""
+
+    def __init__(self, policy: HedgePolicy):
+        self.policy = policy
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._lock = threading.Lock()
+
+    def count_call(self):
+        with self._lock:
+            self.calls += 1
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.policy.max_hedges is not None and self.hedges >= self.policy.max_hedges:
+                return False
+            if (self.hedges + 1) > self.policy.max_ratio * max(self.calls, 1):
+                return False
+            self.hedges += 1
+            return True
+
+    def record_win(self):
+        with self._lock:
+            self.hedge_wins += 1
+
+    def summary(self) -> Dict:
+        with self._lock:
+            return {"calls": self.calls, "hedges": self.hedges, "hedge_wins": self.hedge_wins}
+
+
+# Shared across all hedged LLMs in the process
+latency_tracker = LatencyTracker()
+hedge_executor = ThreadPoolExecutor(max_workers=int(os.getenv("DOC_HEDGE_WORKERS", 32)),
+                                    thread_name_prefix="hedge")
+
+
+class _HedgeRace:
+    """Shared state of one hedged call: whether it is settled, who won, and the backup leg"""
+
+    def __init__(self, primary_token: CancellationToken):
+        self.lock = threading.Lock()
+        self.settled = False
+        self.winner: Optional[str] = None
+        self.primary_token = primary_token
+        self.backup_token: Optional[CancellationToken] = None
+        self.backup: Optional[Future] = None
+
+    def claim(self, leg: str) -> bool:
+        """Make ``leg`` the winner unless the other one already is, and cancel the loser"""
+        with self.lock:
+            if self.winner is not None:
+                return self.winner == leg
+            self.winner = leg
+            loser = self.backup_token if leg == "primary" else self.primary_token
+        if loser is not None:
+            loser.cancel(f"hedged call won by the {leg}")
+        return True
+
+
+class HedgedLLM(WrappedLLM):
+    """LLM that re-sends slow calls to a backup provider and returns whichever answers first.
+
+    The primary leg runs on the calling thread; the backup leg only takes a
+    worker thread once the call has become slow. Each leg has its own
+    cancellation token (a child of the run's), and the loser's is cancelled,
+    which aborts a streamed generation. Python threads cannot be interrupted,
+    so a loser in a blocking, non-streamed call still runs to its end.
+    """
+
+    def __init__(self, primary: LLM, backup: LLM, policy: HedgePolicy, budget: HedgeBudget):
+        super().__init__(primary)
+        self.primary = primary
+        self.backup = backup
+        self.policy = policy
+        self.budget = budget
+
+    def wrapped(self) -> List[LLM]:
+        return [self.primary, self.backup]
+
+    def _threshold(self) -> float:
+        if latency_tracker.count(self.primary.model) < self.policy.min_samples:
+            return self.policy.default_threshold
+        return latency_tracker.percentile(self.primary.model, self.policy.percentile)
+
+    def _timed_call(self, llm: LLM, messages, tools, *args, **kwargs):
+        started = time.monotonic()
+        result = llm.call(messages, tools, *args, **kwargs)
+        latency_tracker.record(llm.model, time.monotonic() - started)
+        return result
+
+    def _leg(self, llm: LLM, token: CancellationToken, *args, **kwargs):
+        # Runs inside a copied context, so the leg's token does not leak into the caller's
+        current_token.set(token)
+        return self._timed_call(llm, *args, **kwargs)
+
+    def _backup_leg(self, race: _HedgeRace, *args, **kwargs):
+        result = self._leg(self.backup, race.backup_token, *args, **kwargs)
+        if result:
+            race.claim("backup")
+        return result
+
+    def _start_backup(self, race: _HedgeRace, context, run_token: Optional[CancellationToken], *args, **kwargs):
+        """Called on the event loop once the primary leg is slow; must not block"""
+        with race.lock:
+            if race.settled or race.winner is not None or not self.budget.try_acquire():
+                return
+            logger.info(f"Hedging slow {self.primary.model} call to {self.backup.model}")
+            race.backup_token = CancellationToken(run_token)
+            race.backup = hedge_executor.submit(context.run, self._backup_leg, race, *args, **kwargs)
+
+    def call(self, messages, tools: Optional[List[dict]] = None, callbacks=None,
+             available_functions: Optional[Dict] = None, *args, **kwargs):
+        self.budget.count_call()
+        # Calls that execute tools themselves must not run twice
+        if available_functions:
+            return self._timed_call(self.primary, messages, tools, callbacks, available_functions, *args, **kwargs)
+
+        run_token = current_token.get()
+        race = _HedgeRace(CancellationToken(run_token))
+        leg_args = (messages, tools, callbacks, None) + args
+        loop = llm_loop.loop
+        loop.call_soon_threadsafe(loop.call_later, self._threshold(), partial(
+            self._start_backup, race, copy_context(), run_token, *leg_args, **kwargs))
+
+        result, error = None, None
+        try:
+            result = copy_context().run(self._leg, self.primary, race.primary_token, *leg_args, **kwargs)
+        except RunCancelled as e:
+            # Lost to the backup, or the run itself was cancelled
+            error = e
+        except Exception as e:
+            error = e
+        with race.lock:
+            race.settled = True
+        if result and race.claim("primary"):
+            return result
+
+        backup = race.backup
+        if backup is None:
+            if error is not None:
+                raise error
+            return result
+        try:
+            backup_result = backup.result() if run_token is None else self._wait(backup, run_token)
+        except Exception:
+            if error is not None and not result:
+                raise error
+            return result
+        if backup_result:
+            self.budget.record_win()
+            return backup_result
+        if error is not None and not result:
+            raise error
+        return result or backup_result
+
+    @staticmethod
+    def _wait(future: Future, token: CancellationToken, poll: float = 0.25):
+        while True:
+            try:
+                return future.result(timeout=poll)
+            except FutureTimeout:
+                token.raise_if_cancelled()
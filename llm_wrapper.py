@@ -0,0 +1,37 @@
+from typing import List, Optional
+
+from crewai import LLM
+
+
+class WrappedLLM(LLM):
+    """Base of the LLMs that wrap another LLM and pass its calls through.
+
+    CrewAI configures the outermost LLM object of an agent; the agent executor,
+    for one, adds its "Observation:" stop words to ``llm.stop``. ``stop`` is
+    therefore read from and written to the wrapped LLMs, so the stop words reach
+    the provider request however many wrappers sit in between.
+    """
+
+    def __init__(self, inner: LLM):
+        super().__init__(model=inner.model, temperature=inner.temperature)
+        self.inner = inner
+
+    def wrapped(self) -> List[LLM]:
+        """LLMs this one may send a call to"""
+        return [self.inner]
+
+    @property
+    def stop(self) -> List[str]:
+        inner = self.__dict__.get("inner")
+        return inner.stop if inner is not None else []
+
+    @stop.setter
+    def stop(self, value: Optional[List[str]]):
+        # LLM.__init__ assigns a default before the wrapped LLM is known; that one is not ours to keep
+        if "inner" not in self.__dict__:
+            return
+        for llm in self.wrapped():
+            llm.stop = list(value or [])
+
+    def call(self, messages, tools: Optional[List[dict]] = None, *args, **kwargs):
+        return self.inner.call(messages, tools, *args, **kwargs)
@@ -0,0 +1,540 @@
+import io
+import os
+import sys
+import json
+import time
+import uuid
+import shutil
+import socket
+import asyncio
+import logging
+import tarfile
+import argparse
+import tempfile
+import subprocess
+import urllib.request
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+from tornado.httpclient import AsyncHTTPClient
+from tornado.websocket import websocket_connect
+from streamlit.proto.Alert_pb2 import Alert
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+try:
+    import psutil
+except ImportError:  # Fall back to /proc when psutil is not installed
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+APP = os.path.join(APP_DIR, "example.py")
+# Widget labels the session flows interact with
+INPUT_METHOD = "Select input method:"
+DIRECTORY_OPTION = "Enter Directory Path"
+DIRECTORY_INPUT = "📁 Enter Directory Path"
+UPLOADER = "📂 Upload code files, or a zip/tar archive of a project"
+GENERATE = "🌟 Generate Documentation"
+FLOWS = ("directory", "upload", "mixed")
+
+
+class FlowError(Exception):
+    """A session step failed: the app raised, showed an error, or never finished"""
+
+
+def percentile(samples: List[float], p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))] if ordered else 0.0
+
+
+def make_project(root: str, files: int, salt: str) -> str:
+    """Small mixed-language project; ``salt`` makes its content unique so runs are not shared"""
+    os.makedirs(root, exist_ok=True)
+    for i in range(files):
+        kind = i % 4
+        if kind == 0:
+            imports = f"import os\nfrom module_{i - 4} import *\n" if i >= 4 else "import os\n"
+            name, text = f"module_{i}.py", (
+                f'"""Module {i} ({salt})"""\n{imports}\n\n'
+                f"class Handler{i}:\n    def __init__(self, path):\n        self.path = path\n\n"
+                f"    def run(self, retries=3):\n        return os.path.exists(self.path)\n\n\n"
+                f"def helper_{i}(value):\n    return value * {i}\n"
+            )
+        elif kind == 1:
+            name, text = f"widget_{i}.js", (
+                f"// Widget {i} ({salt})\nimport {{ render }} from './render.js';\n\n"
+                f"export class Widget{i} {{\n  constructor(el) {{ this.el = el; }}\n"
+                f"  mount() {{ render(this.el); }}\n}}\n\n"
+                f"export const format{i} = (value) => `${{value}}-{i}`;\n"
+            )
+        elif kind == 2:
+            name, text = f"style_{i}.css", (
+                f"/* Style {i} ({salt}) */\n:root {{ --accent-{i}: #3366ff; }}\n"
+                f".card-{i} {{ color: var(--accent-{i}); padding: {i}px; }}\n"
+                f"@media (max-width: 600px) {{ .card-{i} {{ padding: 0; }} }}\n"
+            )
+        else:
+            name, text = f"page_{i}.html", (
+                f"<!DOCTYPE html>\n<html>\n<head><title>Page {i} ({salt})</title>\n"
+                f'<link rel="stylesheet" href="style_{i - 1}.css"></head>\n'
+                f'<body>\n<form action="/submit/{i}" method="post">\n'
+                f'<input name="email" type="email"><button id="send-{i}">Send</button>\n</form>\n'
+                f'<script src="widget_{max(i - 2, 1)}.js"></script>\n</body>\n</html>\n'
+            )
+        with open(os.path.join(root, name), "w", encoding="utf-8") as f:
+            f.write(text)
+    return root
+
+
+def make_archive(project: str) -> bytes:
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        archive.add(project, arcname=os.path.basename(project))
+    return buffer.getvalue()
+
+
+class ProcessStats:
+    """CPU, memory and thread samples of the server process"""
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self._process = psutil.Process(pid) if psutil else None
+        self._last: Optional[Tuple[float, float]] = None
+
+    def _read(self) -> Tuple[float, int, int]:
+        """(CPU seconds, RSS bytes, threads)"""
+        if self._process:
+            with self._process.oneshot():
+                times = self._process.cpu_times()
+                return times.user + times.system, self._process.memory_info().rss, self._process.num_threads()
+        with open(f"/proc/{self.pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        cpu = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+        status = {}
+        with open(f"/proc/{self.pid}/status") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                status[key] = value.split()
+        return cpu, int(status["VmRSS"][0]) * 1024, int(status["Threads"][0])
+
+    def sample(self) -> Optional[Dict]:
+        try:
+            cpu, rss, threads = self._read()
+        except (OSError, KeyError, IndexError) as e:
+            logger.debug(f"Could not sample process {self.pid}: {e}")
+            return None
+        now = time.monotonic()
+        cpu_percent = None
+        if self._last:
+            cpu_percent = 100.0 * (cpu - self._last[1]) / max(now - self._last[0], 1e-6)
+        self._last = (now, cpu)
+        return {"time": now, "cpu_percent": cpu_percent, "rss_bytes": rss, "threads": threads}
+
+
+class AppServer:
+    """The app under test, run by ``streamlit run`` in a scratch working directory"""
+
+    def __init__(self, workdir: str, port: int, env: Dict[str, str]):
+        self.workdir = workdir
+        self.port = port
+        self.env = env
+        self.url = f"http://127.0.0.1:{port}"
+        self.process: Optional[subprocess.Popen] = None
+
+    def start(self, timeout: float = 120.0):
+        logo = os.path.join(APP_DIR, "LOGO.png")
+        if os.path.exists(logo):
+            shutil.copy(logo, self.workdir)
+        log = open(os.path.join(self.workdir, "server.log"), "wb")
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "streamlit", "run", APP,
+             "--server.headless", "true",
+             "--server.port", str(self.port),
+             "--server.fileWatcherType", "none",
+             # The harness uploads without a browser cookie
+             "--server.enableXsrfProtection", "false",
+             "--browser.gatherUsageStats", "false"],
+            cwd=self.workdir, env={**os.environ, **self.env}, stdout=log, stderr=subprocess.STDOUT,
+        )
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Server exited with {self.process.returncode}, see {log.name}")
+            try:
+                with urllib.request.urlopen(f"{self.url}/_stcore/health", timeout=2) as response:
+                    if response.status == 200:
+                        return
+            except OSError:
+                time.sleep(0.5)
+        self.stop()
+        raise RuntimeError(f"Server did not become healthy within {timeout:.0f}s")
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+class AppSession:
+    """One headless browser session, speaking Streamlit's websocket protocol.
+
+    Each rerun sends the current widget values like the frontend does and waits
+    for the script run to finish; exceptions and error alerts fail the step.
+    """
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self.session_id = ""
+        # Label -> widget element of the latest script run
+        self.widgets: Dict[str, object] = {}
+        # Widget id -> value sent with every rerun
+        self.states: Dict[str, WidgetState] = {}
+        self.errors: List[str] = []
+        self._cache: Dict[str, ForwardMsg] = {}
+        self._finished: Optional[asyncio.Future] = None
+        self._file_urls: Dict[str, asyncio.Future] = {}
+        self._conn = None
+        self._reader: Optional[asyncio.Task] = None
+
+    async def connect(self):
+        url = "ws" + self.base_url[len("http"):] + "/_stcore/stream"
+        self._conn = await websocket_connect(url, subprotocols=["streamlit"], max_message_size=512 * 1024 * 1024)
+        self._reader = asyncio.ensure_future(self._read())
+
+    async def close(self):
+        if self._conn:
+            self._conn.close()
+        if self._reader:
+            await asyncio.gather(self._reader, return_exceptions=True)
+
+    async def _read(self):
+        while (data := await self._conn.read_message()) is not None:
+            msg = ForwardMsg()
+            msg.ParseFromString(data)
+            self._handle(msg)
+        pending = [self._finished, *self._file_urls.values()]
+        for future in pending:
+            if future and not future.done():
+                future.set_exception(FlowError("websocket closed by the server"))
+
+    def _handle(self, msg: ForwardMsg):
+        kind = msg.WhichOneof("type")
+        if kind == "ref_hash":
+            # The server sent this message before and only refers to it now
+            msg = self._cache.get(msg.ref_hash)
+            if msg is None:
+                return
+            kind = msg.WhichOneof("type")
+        elif msg.metadata.cacheable:
+            self._cache[msg.hash] = msg
+
+        if kind == "new_session":
+            self.session_id = msg.new_session.initialize.session_id
+        elif kind == "delta" and msg.delta.WhichOneof("type") == "new_element":
+            self._element(msg.delta.new_element)
+        elif kind == "script_finished":
+            done = msg.script_finished in (ForwardMsg.FINISHED_SUCCESSFULLY, ForwardMsg.FINISHED_WITH_COMPILE_ERROR)
+            if done and self._finished and not self._finished.done():
+                self._finished.set_result(msg.script_finished)
+        elif kind == "file_urls_response":
+            future = self._file_urls.pop(msg.file_urls_response.response_id, None)
+            if future and not future.done():
+                future.set_result(msg.file_urls_response)
+
+    def _element(self, element):
+        kind = element.WhichOneof("type")
+        if kind == "exception":
+            self.errors.append(f"{element.exception.type}: {element.exception.message}")
+        elif kind == "alert" and element.alert.format == Alert.ERROR:
+            self.errors.append(element.alert.body)
+        elif kind:
+            widget = getattr(element, kind)
+            if getattr(widget, "id", "") and getattr(widget, "label", ""):
+                self.widgets[widget.label] = widget
+
+    async def rerun(self, timeout: float, triggers: Tuple[WidgetState, ...] = ()) -> float:
+        """Run the script with the current widget values; returns the seconds it took"""
+        self.widgets, self.errors = {}, []
+        self._finished = asyncio.get_running_loop().create_future()
+        msg = BackMsg()
+        msg.rerun_script.widget_states.widgets.extend([*self.states.values(), *triggers])
+        started = time.perf_counter()
+        await self._conn.write_message(msg.SerializeToString(), binary=True)
+        try:
+            status = await asyncio.wait_for(self._finished, timeout)
+        except asyncio.TimeoutError:
+            raise FlowError(f"script run did not finish within {timeout:.0f}s")
+        if status == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+            raise FlowError("script failed to compile")
+        if self.errors:
+            raise FlowError("; ".join(self.errors[:3]))
+        return time.perf_counter() - started
+
+    def widget(self, label: str):
+        try:
+            return self.widgets[label]
+        except KeyError:
+            raise FlowError(f"no widget labelled {label!r} on the page")
+
+    def choose(self, label: str, option: str):
+        widget = self.widget(label)
+        self.states[widget.id] = WidgetState(id=widget.id, int_value=list(widget.options).index(option))
+
+    def type_text(self, label: str, text: str):
+        widget = self.widget(label)
+        self.states[widget.id] = WidgetState(id=widget.id, string_value=text)
+
+    def click(self, label: str) -> WidgetState:
+        """Button press to pass to the next rerun; triggers only last for one run"""
+        return WidgetState(id=self.widget(label).id, trigger_value=True)
+
+    async def upload(self, label: str, name: str, data: bytes, timeout: float = 60.0):
+        """Upload ``data`` through the file uploader labelled ``label``"""
+        widget = self.widget(label)
+        request_id = uuid.uuid4().hex
+        future = self._file_urls[request_id] = asyncio.get_running_loop().create_future()
+        msg = BackMsg()
+        msg.file_urls_request.request_id = request_id
+        msg.file_urls_request.session_id = self.session_id
+        msg.file_urls_request.file_names.append(name)
+        await self._conn.write_message(msg.SerializeToString(), binary=True)
+        response = await asyncio.wait_for(future, timeout)
+        if response.error_msg:
+            raise FlowError(f"upload refused: {response.error_msg}")
+        urls = response.file_urls[0]
+
+        boundary = uuid.uuid4().hex
+        body = (f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{name}"\r\n'
+                "Content-Type: application/octet-stream\r\n\r\n").encode() + data + f"\r\n--{boundary}--\r\n".encode()
+        await AsyncHTTPClient().fetch(urljoin(self.base_url, urls.upload_url), method="PUT", body=body,
+                                      headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+                                      request_timeout=timeout)
+        state = WidgetState(id=widget.id)
+        info = state.file_uploader_state_value.uploaded_file_info.add(file_id=urls.file_id, name=name, size=len(data))
+        info.file_urls.CopyFrom(urls)
+        self.states[widget.id] = state
+
+
+@dataclass
+class LoadReport:
+    sessions: int = 0
+    flows: Dict[str, int] = field(default_factory=dict)
+    # Step name -> seconds per successful request
+    steps: Dict[str, List[float]] = field(default_factory=dict)
+    # (session, step, reason)
+    failures: List[Tuple[str, str, str]] = field(default_factory=list)
+    resources: List[Dict] = field(default_factory=list)
+    # Latency of the server's health endpoint, i.e. how long its event loop took to get to a request
+    loop_lag: List[float] = field(default_factory=list)
+    seconds: float = 0.0
+
+    def record(self, step: str, seconds: float):
+        self.steps.setdefault(step, []).append(seconds)
+
+    @property
+    def requests(self) -> int:
+        return sum(len(v) for v in self.steps.values()) + len(self.failures)
+
+    def as_dict(self) -> Dict:
+        cpu = [s["cpu_percent"] for s in self.resources if s["cpu_percent"] is not None]
+        return {
+            "sessions": self.sessions,
+            "flows": self.flows,
+            "seconds": round(self.seconds, 2),
+            "requests": self.requests,
+            "failure_rate": len(self.failures) / max(self.requests, 1),
+            "steps": {name: {"count": len(v), "p50": percentile(v, 0.5), "p90": percentile(v, 0.9),
+                             "p99": percentile(v, 0.99), "max": max(v)}
+                      for name, v in self.steps.items()},
+            "failures": [{"session": s, "step": step, "reason": r} for s, step, r in self.failures],
+            "server": {
+                "cpu_percent_avg": sum(cpu) / len(cpu) if cpu else None,
+                "cpu_percent_peak": max(cpu, default=None),
+                "rss_bytes_start": self.resources[0]["rss_bytes"] if self.resources else None,
+                "rss_bytes_peak": max((s["rss_bytes"] for s in self.resources), default=None),
+                "threads_peak": max((s["threads"] for s in self.resources), default=None),
+            },
+            "loop_lag": {"p50": percentile(self.loop_lag, 0.5), "p99": percentile(self.loop_lag, 0.99),
+                         "max": max(self.loop_lag, default=0.0)},
+        }
+
+    def render(self) -> str:
+        data = self.as_dict()
+        flows = ", ".join(f"{name} {count}" for name, count in self.flows.items())
+        lines = [
+            f"Sessions: {self.sessions} ({flows}) in {self.seconds:.1f}s",
+            f"Requests: {data['requests']}, failed {len(self.failures)} ({data['failure_rate']:.1%})",
+            "",
+            f"{'Step':<12}{'n':>6}{'p50 s':>10}{'p90 s':>10}{'p99 s':>10}{'max s':>10}",
+        ]
+        for name, s in data["steps"].items():
+            lines.append(f"{name:<12}{s['count']:>6}{s['p50']:>10.2f}{s['p90']:>10.2f}{s['p99']:>10.2f}{s['max']:>10.2f}")
+        server = data["server"]
+        if server["rss_bytes_peak"] is not None:
+            cpu_avg = f"{server['cpu_percent_avg']:.0f}%" if server["cpu_percent_avg"] is not None else "n/a"
+            cpu_peak = f"{server['cpu_percent_peak']:.0f}%" if server["cpu_percent_peak"] is not None else "n/a"
+            lines += ["", f"Server CPU: avg {cpu_avg}, peak {cpu_peak}",
+                      f"Server RSS: start {server['rss_bytes_start'] / 2 ** 20:.0f} MiB, "
+                      f"peak {server['rss_bytes_peak'] / 2 ** 20:.0f} MiB",
+                      f"Server threads: peak {server['threads_peak']}"]
+        lag = data["loop_lag"]
+        lines.append(f"Event loop lag (health check): p50 {lag['p50'] * 1000:.0f} ms, "
+                     f"p99 {lag['p99'] * 1000:.0f} ms, max {lag['max'] * 1000:.0f} ms")
+        if self.failures:
+            lines += ["", "Failures:"] + [f"  {s} {step}: {reason}" for s, step, reason in self.failures[:20]]
+        return "\n".join(lines)
+
+
+async def directory_flow(session: AppSession, project: str, iterations: int, timeout: float, step):
+    await step("load", session.rerun(30))
+    session.choose(INPUT_METHOD, DIRECTORY_OPTION)
+    await step("select", session.rerun(30))
+    session.type_text(DIRECTORY_INPUT, project)
+    # Shows the preflight estimate
+    await step("preflight", session.rerun(120))
+    for _ in range(iterations):
+        await step("generate", session.rerun(timeout, (session.click(GENERATE),)))
+
+
+async def upload_flow(session: AppSession, project: str, iterations: int, timeout: float, step):
+    archive = make_archive(project)
+    await step("load", session.rerun(30))
+    await step("upload", session.upload(UPLOADER, os.path.basename(project) + ".tar.gz", archive))
+    await step("select", session.rerun(30))
+    for _ in range(iterations):
+        await step("generate", session.rerun(timeout, (session.click(GENERATE),)))
+
+
+async def run_session(name: str, flow: str, base_url: str, project: str, report: LoadReport,
+                      iterations: int, timeout: float, delay: float):
+    await asyncio.sleep(delay)
+    session = AppSession(base_url)
+
+    async def step(step_name: str, request):
+        started = time.perf_counter()
+        try:
+            await request
+        except Exception as e:
+            raise FlowError(f"{step_name}: {e}") from e
+        report.record(step_name, time.perf_counter() - started)
+
+    try:
+        started = time.perf_counter()
+        await session.connect()
+        report.record("connect", time.perf_counter() - started)
+        flows = {"directory": directory_flow, "upload": upload_flow}
+        await flows[flow](session, project, iterations, timeout, step)
+    except Exception as e:
+        step_name, _, reason = str(e).partition(": ") if isinstance(e, FlowError) else ("connect", "", str(e))
+        report.failures.append((name, step_name, reason or str(e)))
+        logger.warning(f"Session {name} failed: {e}")
+    finally:
+        await session.close()
+
+
+async def monitor(base_url: str, stats: Optional[ProcessStats], report: LoadReport, stop: asyncio.Event,
+                  interval: float = 0.5):
+    client = AsyncHTTPClient()
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            await client.fetch(f"{base_url}/_stcore/health", request_timeout=30)
+            report.loop_lag.append(time.perf_counter() - started)
+        except Exception as e:
+            logger.warning(f"Health check failed: {e}")
+        if stats:
+            sample = stats.sample()
+            if sample:
+                report.resources.append(sample)
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run_load_test(base_url: str, workdir: str, sessions: int, flow: str, files: int, iterations: int,
+                        ramp_up: float, timeout: float, shared_project: bool, pid: Optional[int]) -> LoadReport:
+    report = LoadReport(sessions=sessions)
+    stop = asyncio.Event()
+    watcher = asyncio.ensure_future(monitor(base_url, ProcessStats(pid) if pid else None, report, stop))
+    shared = make_project(os.path.join(workdir, "projects", "shared"), files, "shared") if shared_project else None
+    tasks = []
+    for i in range(sessions):
+        session_flow = ("directory", "upload")[i % 2] if flow == "mixed" else flow
+        report.flows[session_flow] = report.flows.get(session_flow, 0) + 1
+        project = shared or make_project(os.path.join(workdir, "projects", f"session-{i}"), files, f"session-{i}")
+        tasks.append(run_session(f"session-{i}", session_flow, base_url, project, report,
+                                 iterations, timeout, ramp_up * i / max(sessions, 1)))
+    started = time.perf_counter()
+    await asyncio.gather(*tasks)
+    report.seconds = time.perf_counter() - started
+    stop.set()
+    await watcher
+    return report
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def cli(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point: ``python loadtest.py --sessions 20 --flow mixed``"""
+    parser = argparse.ArgumentParser(description="Drive concurrent headless sessions against the app")
+    parser.add_argument("--sessions", type=int, default=10, help="number of simultaneous sessions")
+    parser.add_argument("--flow", choices=FLOWS, default="mixed", help="session flow; mixed alternates them")
+    parser.add_argument("--files", type=int, default=12, help="code files in each generated project")
+    parser.add_argument("--iterations", type=int, default=1, help="documentation runs per session")
+    parser.add_argument("--ramp-up", type=float, default=5.0, help="seconds over which sessions start")
+    parser.add_argument("--timeout", type=float, default=900.0, help="seconds a documentation run may take")
+    parser.add_argument("--shared-project", action="store_true",
+                        help="give every session the same project, to measure shared results")
+    parser.add_argument("--latency", type=float, default=1.0, help="fake LLM seconds per call")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of fake LLM calls that fail")
+    parser.add_argument("--url", help="test an already running server instead of starting one")
+    parser.add_argument("--pid", type=int, help="process to sample when using --url")
+    parser.add_argument("--workdir", help="scratch directory for the server and projects (default: temporary)")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="doc-loadtest-")
+    os.makedirs(workdir, exist_ok=True)
+    server = None
+    if args.url:
+        base_url, pid = args.url.rstrip("/"), args.pid
+    else:
+        server = AppServer(workdir, free_port(), {
+            "DOC_FAKE_LLM": "1",
+            "DOC_FAKE_LLM_LATENCY": str(args.latency),
+            "DOC_FAKE_LLM_FAILURE_RATE": str(args.failure_rate),
+            "DOC_SEARCH_INDEX": os.path.join(workdir, "search.db"),
+            "DOC_UPLOAD_DIR": os.path.join(workdir, "uploads"),
+        })
+        server.start()
+        base_url, pid = server.url, server.process.pid
+    logger.info(f"Load testing {base_url} with {args.sessions} sessions, scratch files in {workdir}")
+
+    try:
+        report = asyncio.run(run_load_test(base_url, workdir, args.sessions, args.flow, args.files,
+                                           args.iterations, args.ramp_up, args.timeout, args.shared_project, pid))
+    finally:
+        if server:
+            server.stop()
+    print(report.render())
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report.as_dict(), f, indent=2)
+    return 1 if report.failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(cli())
@@ -0,0 +1,194 @@
+import os
+import re
+import json
+import math
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from array import array
+from typing import Any, List, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_]+|\d+")
+SUFFIXES = ("ing", "ed", "es", "s")
+
+
+class HashingVectorizer:
+    """Dependency-free text vectorizer using signed feature hashing"""
+
+    def __init__(self, dimensions: int = 1024):
+        self.dimensions = dimensions
+
+    @staticmethod
+    def _stem(word: str) -> str:
+        for suffix in SUFFIXES:
+            if len(word) > len(suffix) + 2 and word.endswith(suffix):
+                return word[:-len(suffix)]
+        return word
+
+    def _tokens(self, text: str) -> List[str]:
+        words = [self._stem(w.lower()) for w in TOKEN_PATTERN.findall(text)]
+        # Word bigrams give a little phrase sensitivity
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def vectorize(self, text: str) -> array:
+        vector = array("f", [0.0]) * self.dimensions
+        for token in self._tokens(text):
+            digest = hashlib.blake2b(token.encode(), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dimensions
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector))
+        if norm:
+            for i in range(self.dimensions):
+                vector[i] /= norm
+        return vector
+
+    @staticmethod
+    def similarity(a: array, b: array) -> float:
+        return sum(x * y for x, y in zip(a, b))
+
+
+class LocalMemoryStore:
+    """SQLite-backed memory with size- and age-based eviction"""
+
+    def __init__(self, path: Optional[str] = None, max_entries: Optional[int] = None,
+                 max_bytes: Optional[int] = None, max_age_seconds: Optional[float] = None,
+                 dimensions: int = 1024):
+        self.path = path or os.getenv("DOC_MEMORY_PATH", os.path.join(".crew_memory", "memory.db"))
+        self.max_entries = max_entries or int(os.getenv("DOC_MEMORY_MAX_ENTRIES", 2000))
+        self.max_bytes = max_bytes or int(os.getenv("DOC_MEMORY_MAX_BYTES", 20 * 1024 * 1024))
+        self.max_age_seconds = max_age_seconds or float(os.getenv("DOC_MEMORY_MAX_AGE", 24 * 3600))
+        self.vectorizer = HashingVectorizer(dimensions)
+        self._lock = threading.Lock()
+
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS memories (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                namespace TEXT NOT NULL,
+                created REAL NOT NULL,
+                value TEXT NOT NULL,
+                metadata TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                size INTEGER NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_memories_ns ON memories(namespace, created)")
+        self._conn.commit()
+
+    def save(self, namespace: str, value: Any, metadata: Optional[Dict] = None):
+        text = value if isinstance(value, str) else json.dumps(value, default=str)
+        meta = json.dumps(metadata or {}, default=str)
+        vector = self.vectorizer.vectorize(text).tobytes()
+        size = len(text.encode()) + len(meta) + len(vector)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO memories (namespace, created, value, metadata, vector, size) VALUES (?, ?, ?, ?, ?, ?)",
+                (namespace, time.time(), text, meta, vector, size),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def search(self, namespace: str, query: str, limit: int = 3, score_threshold: float = 0.0,
+               max_chars: int = 1000) -> List[Dict]:
+        """Return the most similar entries in ``namespace``, each truncated to ``max_chars``"""
+        query_vector = self.vectorizer.vectorize(query)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, value, metadata, vector FROM memories WHERE namespace = ? AND created >= ?",
+                (namespace, time.time() - self.max_age_seconds),
+            ).fetchall()
+
+        scored = []
+        for row_id, value, metadata, blob in rows:
+            vector = array("f")
+            vector.frombytes(blob)
+            score = self.vectorizer.similarity(query_vector, vector)
+            if score >= score_threshold:
+                scored.append((score, row_id, value, metadata))
+        scored.sort(reverse=True)
+
+        return [
+            {"id": row_id, "metadata": json.loads(metadata), "context": value[:max_chars], "score": score}
+            for score, row_id, value, metadata in scored[:limit]
+        ]
+
+    def reset(self, namespace: Optional[str] = None):
+        with self._lock:
+            if namespace is None:
+                self._conn.execute("DELETE FROM memories")
+            else:
+                self._conn.execute("DELETE FROM memories WHERE namespace = ? OR namespace LIKE ?",
+                                   (namespace, f"{namespace}/%"))
+            self._conn.commit()
+
+    def _evict(self):
+        """Drop expired entries, then the oldest ones until within the size limits"""
+        self._conn.execute("DELETE FROM memories WHERE created < ?", (time.time() - self.max_age_seconds,))
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM memories").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        excess_rows = max(0, count - self.max_entries)
+        excess_bytes = total - self.max_bytes
+        doomed = []
+        for row_id, size in self._conn.execute("SELECT id, size FROM memories ORDER BY created, id"):
+            if excess_rows <= 0 and excess_bytes <= 0:
+                break
+            doomed.append((row_id,))
+            excess_rows -= 1
+            excess_bytes -= size
+        self._conn.executemany("DELETE FROM memories WHERE id = ?", doomed)
+        logger.info(f"Evicted {len(doomed)} memory entries")
+
+    def footprint(self) -> Dict:
+        """Entry count and stored bytes per namespace, plus the database file size"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT namespace, COUNT(*), SUM(size) FROM memories GROUP BY namespace"
+            ).fetchall()
+        namespaces = {ns: {"entries": n, "bytes": b} for ns, n, b in rows}
+        file_bytes = os.path.getsize(self.path) if self.path != ":memory:" and os.path.exists(self.path) else 0
+        return {
+            "entries": sum(v["entries"] for v in namespaces.values()),
+            "bytes": sum(v["bytes"] for v in namespaces.values()),
+            "file_bytes": file_bytes,
+            "namespaces": namespaces,
+        }
+
+
+class NamespacedStorage:
+    """CrewAI memory storage bound to one namespace of a LocalMemoryStore"""
+
+    def __init__(self, store: LocalMemoryStore, namespace: str):
+        self.store = store
+        self.namespace = namespace
+
+    def save(self, value: Any, metadata: Dict[str, Any]) -> None:
+        self.store.save(self.namespace, value, metadata)
+
+    def search(self, query: str, limit: int = 3, filter: Optional[dict] = None,
+               score_threshold: float = 0.35) -> List[Any]:
+        # Hashed bag-of-words scores run well below embedding similarities,
+        # so CrewAI's default threshold would filter out nearly everything
+        return self.store.search(self.namespace, query, limit=limit, score_threshold=min(score_threshold, 0.1))
+
+    def reset(self) -> None:
+        self.store.reset(self.namespace)
+
+
+def crew_memory(store: LocalMemoryStore, namespace: str) -> Dict:
+    """Crew keyword arguments that enable memory backed by ``store``"""
+    from crewai.memory import EntityMemory, ShortTermMemory
+
+    return {
+        "memory": True,
+        "short_term_memory": ShortTermMemory(storage=NamespacedStorage(store, f"{namespace}/short_term")),
+        "entity_memory": EntityMemory(storage=NamespacedStorage(store, f"{namespace}/entities")),
+    }
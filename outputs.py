@@ -0,0 +1,182 @@
+import os
+import re
+import json
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from typing import List, Dict, Iterator, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: stores of one process still serialise on the thread lock
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "index.json"
+LOCK_FILE = "index.lock"
+
+# One lock per root, shared by every store of this process on that root
+_root_locks: Dict[str, threading.Lock] = {}
+_root_locks_guard = threading.Lock()
+
+
+def _root_lock(root: str) -> threading.Lock:
+    with _root_locks_guard:
+        return _root_locks.setdefault(os.path.abspath(root), threading.Lock())
+
+
+def safe_name(key: str) -> str:
+    """Filesystem-safe name for a task or source path"""
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", key.strip(os.sep)).strip("_") or "_"
+
+
+def key_dir(key: str) -> str:
+    """Readable, collision-free directory name for a source file key"""
+    return f"{safe_name(key)[-80:]}-{hashlib.sha1(key.encode()).hexdigest()[:8]}"
+
+
+class OutputStore:
+    """Full task outputs on disk, one directory per source file and one file per task.
+
+    Several stores (sessions, reruns, processes) may share a root: the index is
+    re-read and updated under a file lock, so one store never drops another's keys.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = _root_lock(root)
+        os.makedirs(root, exist_ok=True)
+        # Last index read from disk and the (mtime, size) it was read at
+        self._index: Dict[str, Dict] = {}
+        self._index_stamp: Optional[Tuple[int, int]] = None
+        # Objects with update(key, task, text, mtime) and remove(key), e.g. a search index
+        self._listeners: List = []
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def _notify(self, method: str, *args):
+        for listener in self._listeners:
+            try:
+                getattr(listener, method)(*args)
+            except Exception as e:
+                logger.error(f"Output store listener failed: {str(e)}")
+
+    def _load_index(self) -> Dict[str, Dict]:
+        """Current index on disk; re-read only when another store has changed it"""
+        path = os.path.join(self.root, INDEX_FILE)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            self._index, self._index_stamp = {}, None
+            return self._index
+        stamp = (st.st_mtime_ns, st.st_size)
+        if stamp != self._index_stamp:
+            with open(path, "r", encoding="utf-8") as f:
+                self._index = json.load(f)
+            self._index_stamp = stamp
+        return self._index
+
+    def _save_index(self, index: Dict[str, Dict]):
+        path = os.path.join(self.root, INDEX_FILE)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(index, f, indent=1)
+        os.replace(tmp, path)
+        # Force a re-read next time rather than trusting a same-size rewrite within the mtime granularity
+        self._index, self._index_stamp = index, None
+
+    @contextmanager
+    def _locked_index(self) -> Iterator[Dict[str, Dict]]:
+        """Fresh copy of the index to modify; saved when the block exits"""
+        with self._lock, open(os.path.join(self.root, LOCK_FILE), "a") as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            index = json.loads(json.dumps(self._load_index()))
+            yield index
+            self._save_index(index)
+
+    def path_for(self, key: str, task: str) -> str:
+        return os.path.join(self.root, key_dir(key), f"{safe_name(task)}.md")
+
+    def json_path_for(self, key: str, task: str) -> str:
+        return os.path.join(self.root, key_dir(key), f"{safe_name(task)}.json")
+
+    def write(self, key: str, task: str, text: str) -> str:
+        path = self.path_for(key, task)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        with self._locked_index() as index:
+            tasks = index.setdefault(key, {"dir": key_dir(key), "tasks": []})["tasks"]
+            if task not in tasks:
+                tasks.append(task)
+        self._notify("update", key, task, text, os.path.getmtime(path))
+        return path
+
+    def append(self, key: str, task: str, text: str, truncate: bool = False):
+        """Append streamed text to a section; the final write() replaces it and indexes it"""
+        path = self.path_for(key, task)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w" if truncate else "a", encoding="utf-8") as f:
+            f.write(text)
+
+    def write_json(self, key: str, task: str, data: Dict) -> str:
+        """Store the structured form of a section; its rendered markdown goes through write()"""
+        path = self.json_path_for(key, task)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, path)
+        return path
+
+    def read_json(self, key: str, task: str) -> Optional[Dict]:
+        path = self.json_path_for(key, task)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def read(self, key: str, task: str) -> Optional[str]:
+        path = self.path_for(key, task)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def files(self) -> List[str]:
+        with self._lock:
+            return list(self._load_index())
+
+    def tasks(self, key: str) -> List[str]:
+        with self._lock:
+            return list(self._load_index().get(key, {}).get("tasks", []))
+
+    def sections(self, key: str) -> Iterator[Tuple[str, str]]:
+        """(task, text) pairs for one source file, read lazily"""
+        for task in self.tasks(key):
+            text = self.read(key, task)
+            if text is not None:
+                yield task, text
+
+    def remove(self, key: str):
+        with self._locked_index() as index:
+            entry = index.pop(key, None)
+        if entry:
+            for task in entry["tasks"]:
+                for path in (self.path_for(key, task), self.json_path_for(key, task)):
+                    if os.path.exists(path):
+                        os.remove(path)
+        self._notify("remove", key)
+
+    def consolidate(self, path: str, keys: Optional[List[str]] = None) -> str:
+        """Stream all sections into one markdown document at ``path`` without holding it in memory"""
+        with open(path, "w", encoding="utf-8") as out:
+            for key in keys or self.files():
+                out.write(f"# {key}\n\n")
+                for task, text in self.sections(key):
+                    out.write(f"## {task}\n\n{text}\n\n")
+        return path
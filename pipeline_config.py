@@ -0,0 +1,166 @@
+import os
+import json
+import fnmatch
+import logging
+from dataclasses import dataclass, field, fields
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CONFIG_FILE = "pipeline.json"
+
+
+class PipelineConfigError(ValueError):
+    """pipeline.json is malformed; the message names the offending key"""
+
+
+def _str_list(value: Any) -> bool:
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+
+def _optional_int(value: Any) -> bool:
+    return value is None or (isinstance(value, int) and not isinstance(value, bool))
+
+
+def _model_name(value: Any) -> bool:
+    return isinstance(value, str) and bool(value.strip())
+
+
+# Rule key -> check of its JSON value
+RULE_CHECKS: Dict[str, Callable[[Any], bool]] = {
+    "extensions": _str_list,
+    "paths": _str_list,
+    "min_bytes": _optional_int,
+    "max_bytes": _optional_int,
+    # An empty list would give a crew with no tasks; leave a file type out of the run with paths instead
+    "tasks": lambda value: value is None or (_str_list(value) and bool(value)),
+    "model": lambda value: value is None or _model_name(value),
+    "models": lambda value: isinstance(value, dict),
+}
+
+
+@dataclass
+class PipelineRule:
+    """Tasks and models for files matching every condition given; the first matching rule wins"""
+    extensions: List[str] = field(default_factory=list)
+    paths: List[str] = field(default_factory=list)
+    min_bytes: Optional[int] = None
+    max_bytes: Optional[int] = None
+    tasks: Optional[List[str]] = None
+    model: Optional[str] = None
+    # Per-task model overrides, e.g. a cheaper model for analysis
+    models: Dict[str, str] = field(default_factory=dict)
+
+    def matches(self, rel_path: str, size: int) -> bool:
+        if self.extensions and not rel_path.lower().endswith(tuple(e.lower() for e in self.extensions)):
+            return False
+        if self.paths and not any(fnmatch.fnmatch(rel_path, pattern) for pattern in self.paths):
+            return False
+        if self.min_bytes is not None and size < self.min_bytes:
+            return False
+        if self.max_bytes is not None and size > self.max_bytes:
+            return False
+        return True
+
+    @classmethod
+    def from_dict(cls, data: Any, index: int = 0) -> "PipelineRule":
+        """Rule from its pipeline.json form, rejecting unknown keys and wrongly typed values"""
+        if not isinstance(data, dict):
+            raise PipelineConfigError(f"rules[{index}] must be an object, got {type(data).__name__}")
+        known = {f.name for f in fields(cls)}
+        for key, value in data.items():
+            if key not in known:
+                raise PipelineConfigError(f"Unknown key '{key}' in rules[{index}]; expected one of {', '.join(sorted(known))}")
+            if not RULE_CHECKS[key](value):
+                raise PipelineConfigError(f"Invalid value for '{key}' in rules[{index}]: {value!r}")
+        return cls(**data)
+
+
+@dataclass
+class FilePipeline:
+    tasks: List[str]
+    model: str
+    task_models: Dict[str, str] = field(default_factory=dict)
+
+    def model_for(self, task: str) -> str:
+        return self.task_models.get(task, self.model)
+
+
+# Used when neither the project nor DOC_PIPELINE_CONFIG provides a pipeline.json
+DEFAULT_RULES = [
+    # Empty or near-empty modules such as bare __init__.py files
+    PipelineRule(max_bytes=200, tasks=["documentation"]),
+    # Stylesheets have no entities to clean and nothing worth inline comments
+    PipelineRule(extensions=[".css"], tasks=["analysis", "documentation"]),
+    PipelineRule(extensions=[".html"], tasks=["analysis", "insight", "documentation"]),
+]
+
+
+class PipelineSpec:
+    """Declarative choice of tasks (and so agents) and models per file type, path and size"""
+
+    def __init__(self, default_tasks: List[str], default_model: str,
+                 rules: Optional[List[PipelineRule]] = None, root: str = "."):
+        self.default_tasks = list(default_tasks)
+        self.default_model = default_model
+        self.rules = DEFAULT_RULES if rules is None else rules
+        self.root = os.path.abspath(root)
+
+    @classmethod
+    def load(cls, root: str, default_tasks: List[str], default_model: str,
+             known_tasks: Iterable[str]) -> "PipelineSpec":
+        """Spec from DOC_PIPELINE_CONFIG or ``root``/pipeline.json, falling back to the built-in rules"""
+        path = os.getenv("DOC_PIPELINE_CONFIG") or os.path.join(root, CONFIG_FILE)
+        if not os.path.exists(path):
+            return cls(default_tasks, default_model, root=root)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except json.JSONDecodeError as e:
+            raise PipelineConfigError(f"{path} is not valid JSON: {e}") from e
+        if not isinstance(data, dict) or not isinstance(data.get("default", {}), dict) \
+                or not isinstance(data.get("rules", []), list):
+            raise PipelineConfigError(f"{path} must be an object with a 'default' object and a 'rules' list")
+        default = data.get("default", {})
+        if not _str_list(default.get("tasks", default_tasks)) or not default.get("tasks", default_tasks):
+            raise PipelineConfigError(f"Invalid value for 'default.tasks': {default['tasks']!r}")
+        if not _model_name(default.get("model", default_model)):
+            raise PipelineConfigError(f"Invalid value for 'default.model': {default['model']!r}")
+        spec = cls(
+            default.get("tasks", default_tasks),
+            default.get("model", default_model),
+            [PipelineRule.from_dict(rule, i) for i, rule in enumerate(data.get("rules", []))],
+            root,
+        )
+        spec.validate(known_tasks)
+        logger.info(f"Loaded pipeline config {path} with {len(spec.rules)} rule(s)")
+        return spec
+
+    def validate(self, known_tasks: Iterable[str]):
+        known = set(known_tasks)
+        for tasks in [self.default_tasks] + [rule.tasks or [] for rule in self.rules]:
+            unknown = set(tasks) - known
+            if unknown:
+                raise PipelineConfigError(f"Unknown task(s) in pipeline config: {', '.join(sorted(unknown))}")
+        for rule in self.rules:
+            unknown = set(rule.models) - known
+            if unknown:
+                raise PipelineConfigError(f"Model override for unknown task(s): {', '.join(sorted(unknown))}")
+            for task, model in rule.models.items():
+                if not _model_name(model):
+                    raise PipelineConfigError(f"Invalid model for 'models.{task}': {model!r}")
+
+    def resolve(self, file_path: str) -> FilePipeline:
+        rel_path = os.path.relpath(os.path.abspath(file_path), self.root).replace(os.sep, "/")
+        try:
+            size = os.path.getsize(file_path)
+        except OSError:
+            size = 0
+        for rule in self.rules:
+            if rule.matches(rel_path, size):
+                return FilePipeline(
+                    tasks=list(rule.tasks if rule.tasks is not None else self.default_tasks),
+                    model=rule.model or self.default_model,
+                    task_models=dict(rule.models),
+                )
+        return FilePipeline(list(self.default_tasks), self.default_model)
@@ -0,0 +1,264 @@
+import os
+import sys
+import json
+import time
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from llm_wrapper import WrappedLLM
+
+logger = logging.getLogger(__name__)
+
+# Threads that serve every run and never enter a stage themselves
+SHARED_THREADS = ("llm-loop",)
+
+
+def profiling_enabled() -> bool:
+    return os.getenv("DOC_PROFILE", "0").lower() in ("1", "true", "yes")
+
+
+def sample_interval() -> float:
+    return float(os.getenv("DOC_PROFILE_INTERVAL", 0.01))
+
+
+def _thread_clock(ident: int) -> Optional[int]:
+    """Per-thread CPU clock, where the platform has one"""
+    try:
+        return time.pthread_getcpuclockid(ident)
+    except (AttributeError, OSError):
+        return None
+
+
+@dataclass
+class StageStats:
+    calls: int = 0
+    wall: float = 0.0
+    # Wall time minus time spent in nested stages
+    self_wall: float = 0.0
+    # CPU time of the thread the stage ran on, minus nested stages; None for stages that span coroutines
+    cpu: Optional[float] = 0.0
+
+
+class _Timer:
+    def __init__(self, name: str):
+        self.name = name
+        self.thread = threading.get_ident()
+        self.child_wall = 0.0
+        # CPU of nested stages on this timer's own thread, which its thread_time() includes
+        self.child_cpu = 0.0
+        self._lock = threading.Lock()
+
+    def add_child(self, seconds: float, cpu: Optional[float] = None):
+        with self._lock:
+            self.child_wall += seconds
+            if cpu is not None and threading.get_ident() == self.thread:
+                self.child_cpu += cpu
+
+
+# Innermost running stage; copied into worker threads along with the rest of the context
+_current_timer: ContextVar[Optional[_Timer]] = ContextVar("current_timer", default=None)
+
+
+class RunProfile:
+    """Stage timings and periodic stack samples of one documentation run.
+
+    Stages are timed by wall clock and by CPU time of the thread they run on,
+    so time spent waiting (on providers, locks or the fair scheduler) shows up
+    as the difference. A sampler thread records the Python stacks of the
+    run's threads and whether each thread used CPU since the previous sample.
+    Worker pools are shared, so concurrent runs in other sessions can show up
+    in the samples too.
+    """
+
+    def __init__(self, run_id: str, interval: Optional[float] = None):
+        self.run_id = run_id
+        self.interval = interval or sample_interval()
+        self.stages: Dict[str, StageStats] = {}
+        # (state, collapsed stack) -> samples
+        self.samples: Counter = Counter()
+        self.threads: set = set()
+        self.started = self.finished = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    @contextmanager
+    def stage(self, name: str, cpu: bool = True):
+        """Time the enclosed block as ``name``; use ``cpu=False`` for blocks that await"""
+        self.threads.add(threading.get_ident())
+        parent = _current_timer.get()
+        timer = _Timer(name)
+        reset = _current_timer.set(timer)
+        wall_start, cpu_start = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu_time = time.thread_time() - cpu_start if cpu else None
+            _current_timer.reset(reset)
+            if parent:
+                parent.add_child(wall, cpu_time)
+            with self._lock:
+                stats = self.stages.setdefault(name, StageStats(cpu=0.0 if cpu else None))
+                stats.calls += 1
+                stats.wall += wall
+                stats.self_wall += max(0.0, wall - timer.child_wall)
+                if stats.cpu is not None and cpu_time is not None:
+                    stats.cpu += max(0.0, cpu_time - timer.child_cpu)
+
+    def start(self) -> "RunProfile":
+        self.started = time.perf_counter()
+        self._sampler = threading.Thread(target=self._sample_loop, name="profiler", daemon=True)
+        self._sampler.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._sampler:
+            self._sampler.join()
+        self.finished = time.perf_counter()
+
+    def _sample_loop(self):
+        me = threading.get_ident()
+        clocks: Dict[int, Optional[int]] = {}
+        last: Dict[int, Tuple[float, float]] = {}
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            now = time.perf_counter()
+            for ident, frame in sys._current_frames().items():
+                name = names.get(ident, "thread")
+                if ident == me or not (ident in self.threads or name.startswith(SHARED_THREADS)):
+                    continue
+                if ident not in clocks:
+                    clocks[ident] = _thread_clock(ident)
+                state = "sampled"
+                if clocks[ident] is not None:
+                    try:
+                        cpu = time.clock_gettime(clocks[ident])
+                    except OSError:
+                        continue
+                    previous = last.get(ident)
+                    last[ident] = (now, cpu)
+                    if previous is None:
+                        continue
+                    # The thread was on CPU for most of the interval, or mostly blocked
+                    busy = (cpu - previous[1]) / max(now - previous[0], 1e-6)
+                    state = "cpu" if busy >= 0.5 else "wait"
+                self.samples[(state, self._collapse(name, frame))] += 1
+
+    @staticmethod
+    def _collapse(thread_name: str, frame) -> str:
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}".replace(";", ":").replace(" ", "_"))
+            frame = frame.f_back
+        # Pool threads are numbered; group them by pool
+        group = thread_name.rstrip("0123456789").rstrip("_-") or thread_name
+        return ";".join([group.replace(" ", "_")] + stack[::-1])
+
+    @property
+    def seconds(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+    def rows(self) -> List[Dict]:
+        """Stage table, slowest self time first"""
+        with self._lock:
+            stages = list(self.stages.items())
+        total = sum(s.self_wall for _, s in stages) or 1.0
+        rows = []
+        for name, s in sorted(stages, key=lambda item: -item[1].self_wall):
+            wait = max(0.0, s.self_wall - s.cpu) if s.cpu is not None else None
+            rows.append({
+                "stage": name,
+                "calls": s.calls,
+                "wall_s": round(s.wall, 3),
+                "self_s": round(s.self_wall, 3),
+                "cpu_s": round(s.cpu, 3) if s.cpu is not None else None,
+                "wait_s": round(wait, 3) if wait is not None else None,
+                "share": round(s.self_wall / total, 3),
+            })
+        return rows
+
+    def summary(self, top: int = 15) -> Dict:
+        by_state = Counter()
+        leaves = Counter()
+        for (state, stack), count in self.samples.items():
+            by_state[state] += count
+            if state != "wait":
+                leaves[stack.rsplit(";", 1)[-1]] += count
+        return {
+            "run_id": self.run_id,
+            "seconds": round(self.seconds, 3),
+            "interval": self.interval,
+            "samples": dict(by_state),
+            "hot_frames": leaves.most_common(top),
+            "stages": self.rows(),
+        }
+
+    def folded(self) -> str:
+        """Collapsed stacks for flamegraph.pl or speedscope, rooted at cpu / wait"""
+        return "\n".join(f"{state};{stack} {count}" for (state, stack), count in sorted(self.samples.items()))
+
+    def write(self, directory: str) -> str:
+        """Write ``<run_id>.folded`` and ``<run_id>.json`` to ``directory``; returns the folded path"""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self.run_id}.folded")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.folded() + "\n")
+        with open(os.path.join(directory, f"{self.run_id}.json"), "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2)
+        logger.info(f"Wrote profile of run {self.run_id} to {path}")
+        return path
+
+
+# Profile of the run the current task or thread belongs to
+current_profile: ContextVar[Optional[RunProfile]] = ContextVar("current_profile", default=None)
+
+
+@contextmanager
+def stage(name: str, cpu: bool = True):
+    """Time a block in the current run's profile; does nothing when the run is not profiled"""
+    profile = current_profile.get()
+    if profile is None:
+        yield
+        return
+    with profile.stage(name, cpu):
+        yield
+
+
+def timed(name: str, fn: Optional[Callable]) -> Optional[Callable]:
+    """``fn`` timed as stage ``name`` on every call"""
+    if fn is None:
+        return None
+
+    def call(*args, **kwargs):
+        with stage(name):
+            return fn(*args, **kwargs)
+    return call
+
+
+def profile_tool(tool):
+    """Time a CrewAI tool's ``_run`` as stage ``tool:<name>``"""
+    run = tool._run
+
+    def _run(*args, **kwargs):
+        with stage(f"tool:{tool.name}"):
+            return run(*args, **kwargs)
+
+    # BaseTool is a pydantic model, so bypass its attribute validation
+    object.__setattr__(tool, "_run", _run)
+    return tool
+
+
+class ProfiledLLM(WrappedLLM):
+    """LLM whose calls are timed as stage ``llm:<model>``; wall time beyond CPU is provider wait"""
+
+    def call(self, messages, tools: Optional[List[dict]] = None, *args, **kwargs):
+        with stage(f"llm:{self.model}"):
+            return self.inner.call(messages, tools, *args, **kwargs)
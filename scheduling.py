@@ -0,0 +1,124 @@
+import os
+import heapq
+import logging
+from typing import Callable, List, Optional, Set
+
+from budget import estimate_file
+from dependency_graph import DependencyGraph
+
+logger = logging.getLogger(__name__)
+
+ENTRY_POINT_NAMES = {
+    "__init__.py", "__main__.py", "main.py", "app.py", "cli.py", "manage.py", "setup.py",
+    "index.js", "main.js", "app.js", "index.html",
+}
+MAIN_GUARDS = ('if __name__ == "__main__"', "if __name__ == '__main__'")
+
+
+def _is_entry_point(file_path: str) -> bool:
+    if os.path.basename(file_path) in ENTRY_POINT_NAMES:
+        return True
+    if not file_path.endswith(".py"):
+        return False
+    try:
+        with open(file_path, "r", encoding="utf-8", errors="replace") as f:
+            head = f.read(64 * 1024)
+    except OSError:
+        return False
+    return any(guard in head for guard in MAIN_GUARDS)
+
+
+def _size(file_path: str) -> int:
+    try:
+        return os.path.getsize(file_path)
+    except OSError:
+        return 0
+
+
+def _mtime(file_path: str) -> float:
+    try:
+        return os.path.getmtime(file_path)
+    except OSError:
+        return 0.0
+
+
+def build_priority(policy: str, files: List[str], graph: Optional[DependencyGraph], model: str) -> Callable[[str], tuple]:
+    """Sort key for ``policy``; files with smaller keys are processed first"""
+    order = {f: i for i, f in enumerate(files)}
+
+    if policy == "shortest_job":
+        tokens = {f: estimate_file(f, ["analysis", "documentation"], model).total_tokens for f in files}
+        return lambda f: (tokens[f], order[f])
+    if policy == "entry_points":
+        entry = {f: _is_entry_point(f) for f in files}
+        dependents = {f: len(graph.dependents(f)) if graph else 0 for f in files}
+        return lambda f: (not entry[f], -dependents[f], _size(f), order[f])
+    if policy == "recent":
+        mtimes = {f: _mtime(f) for f in files}
+        return lambda f: (-mtimes[f], order[f])
+    if policy == "dependency":
+        return lambda f: (order[f],)
+    raise ValueError(f"Unknown scheduling policy: {policy}")
+
+
+class DirectoryScheduler:
+    """Hands out files by priority, optionally only once their dependencies are done"""
+
+    POLICIES = ["dependency", "shortest_job", "entry_points", "recent"]
+
+    def __init__(self, files: List[str], graph: Optional[DependencyGraph] = None,
+                 policy: str = "dependency", model: str = "", respect_dependencies: bool = True):
+        if policy == "dependency" and graph:
+            files = graph.topological_order()
+        self.graph = graph
+        self.respect_dependencies = respect_dependencies and graph is not None
+        self.key = build_priority(policy, files, graph, model)
+        self.files: Set[str] = set(files)
+        self.pending: Set[str] = set(files)
+        self.finished: Set[str] = set()
+        self.running = 0
+        self.stopped = False
+        self._heap = [(self.key(f), f) for f in files]
+        heapq.heapify(self._heap)
+
+    def _ready(self, file_path: str) -> bool:
+        if not self.respect_dependencies:
+            return True
+        deps = self.graph.dependencies.get(file_path, ())
+        return all(d in self.finished or d not in self.files for d in deps)
+
+    def next_file(self) -> Optional[str]:
+        """Highest-priority ready file, or None if nothing can start right now"""
+        if self.stopped:
+            return None
+        skipped = []
+        chosen = None
+        while self._heap:
+            item = heapq.heappop(self._heap)
+            if self._ready(item[1]):
+                chosen = item[1]
+                break
+            skipped.append(item)
+        for item in skipped:
+            heapq.heappush(self._heap, item)
+
+        # Nothing ready and nothing running means an import cycle: release the best candidate
+        if chosen is None and self.running == 0 and self._heap:
+            chosen = heapq.heappop(self._heap)[1]
+            logger.info(f"Import cycle detected, processing {chosen} early")
+
+        if chosen is not None:
+            self.pending.discard(chosen)
+            self.running += 1
+        return chosen
+
+    def mark_done(self, file_path: str):
+        self.running -= 1
+        self.finished.add(file_path)
+
+    def stop(self):
+        self.stopped = True
+
+    @property
+    def exhausted(self) -> bool:
+        return self.stopped or not self._heap
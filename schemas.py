@@ -0,0 +1,262 @@
+import re
+import logging
+from abc import ABC, abstractmethod
+from typing import ClassVar, Dict, List, Optional, Tuple, Type, get_args, get_origin
+
+from pydantic import BaseModel, Field, ValidationError
+
+logger = logging.getLogger(__name__)
+
+JSON_FENCE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL)
+
+
+class Entry(BaseModel):
+    """One item of a list in a task output; ``key_fields`` identify it across runs"""
+    key_fields: ClassVar[Tuple[str, ...]] = ("name",)
+
+    def key(self) -> Tuple:
+        return tuple(getattr(self, f) for f in self.key_fields)
+
+    def symbol_name(self) -> str:
+        return getattr(self, self.key_fields[0])
+
+
+class Component(Entry):
+    name: str = Field(description="Name of the class, function, constant or other symbol")
+    kind: str = Field(default="", description="class, function, method, constant, selector, element, ...")
+    line: Optional[int] = Field(default=None, description="Line the symbol is defined on")
+    description: str = Field(default="", description="What it does and how it fits in, one or two sentences")
+    depends_on: List[str] = Field(default_factory=list, description="Other components or modules it uses")
+
+
+class Dependency(Entry):
+    name: str = Field(description="Imported module, package or linked resource")
+    kind: str = Field(default="external", description="internal, external or standard library")
+    purpose: str = Field(default="", description="What the file uses it for")
+
+
+class Insight(Entry):
+    key_fields: ClassVar[Tuple[str, ...]] = ("symbol", "category")
+    symbol: str = Field(default="", description="Symbol the insight is about, empty for the whole file")
+    category: str = Field(description="functionality, pattern, complexity, maintainability or error handling")
+    note: str = Field(description="The insight, one or two sentences")
+
+
+class Technology(Entry):
+    name: str = Field(description="Library, framework, language feature or service")
+    used_for: str = Field(default="", description="What the file uses it for")
+    best_practices: List[str] = Field(default_factory=list)
+    references: List[str] = Field(default_factory=list, description="Links to official documentation")
+
+
+class Parameter(BaseModel):
+    name: str
+    type: str = ""
+    description: str = ""
+
+
+class SymbolDoc(Entry):
+    name: str = Field(description="Public class, function, method, constant, selector or element id")
+    kind: str = Field(default="")
+    signature: str = Field(default="", description="Signature as written in the source")
+    description: str = Field(default="")
+    parameters: List[Parameter] = Field(default_factory=list)
+    returns: str = Field(default="")
+    example: str = Field(default="", description="Short usage example as code")
+
+
+class ConfigOption(Entry):
+    name: str = Field(description="Environment variable, setting or constant")
+    default: str = ""
+    description: str = ""
+
+
+class TaskOutput(BaseModel, ABC):
+    """Base of the task schemas; ``to_markdown`` renders an output locally, without the LLM"""
+
+    @abstractmethod
+    def to_markdown(self) -> str:
+        """Markdown section for the viewer, search and the consolidated document"""
+
+
+def _bullets(items: List[str]) -> List[str]:
+    return [f"- {item}" for item in items if item]
+
+
+class AnalysisOutput(TaskOutput):
+    overview: str = Field(description="Overall structure and architecture of the file")
+    components: List[Component] = Field(default_factory=list)
+    dependencies: List[Dependency] = Field(default_factory=list)
+    patterns: List[str] = Field(default_factory=list, description="Design patterns and architectural decisions")
+    recommendations: List[str] = Field(default_factory=list)
+
+    def to_markdown(self) -> str:
+        lines = ["## Code Structure Overview", "", self.overview, ""]
+        if self.components:
+            lines += ["## Component Analysis", ""]
+        for c in self.components:
+            lines += [f"### `{c.name}`", ""]
+            meta = " ".join(filter(None, [f"*{c.kind}*" if c.kind else "", f"(line {c.line})" if c.line else ""]))
+            if meta:
+                lines += [meta, ""]
+            if c.description:
+                lines += [c.description, ""]
+            if c.depends_on:
+                lines += ["Uses: " + ", ".join(f"`{d}`" for d in c.depends_on), ""]
+        if self.dependencies:
+            lines += ["## Dependency Map", ""]
+            lines += [f"- `{d.name}` ({d.kind}){': ' + d.purpose if d.purpose else ''}" for d in self.dependencies]
+            lines.append("")
+        if self.patterns:
+            lines += ["## Design Pattern Identification", ""] + _bullets(self.patterns) + [""]
+        if self.recommendations:
+            lines += ["## Architecture Recommendations", ""] + _bullets(self.recommendations)
+        return "\n".join(lines).strip() + "\n"
+
+
+class InsightOutput(TaskOutput):
+    summary: str = Field(description="Key functionality of the file in a few sentences")
+    insights: List[Insight] = Field(default_factory=list)
+    maintainability: str = Field(default="", description="Overall complexity and maintainability assessment")
+
+    def to_markdown(self) -> str:
+        lines = ["## Summary", "", self.summary, ""]
+        categories: Dict[str, List[Insight]] = {}
+        for insight in self.insights:
+            categories.setdefault(insight.category.strip().capitalize() or "Other", []).append(insight)
+        for category, insights in categories.items():
+            lines += [f"## {category}", ""]
+            lines += [f"- {'`' + i.symbol + '`: ' if i.symbol else ''}{i.note}" for i in insights]
+            lines.append("")
+        if self.maintainability:
+            lines += ["## Maintainability", "", self.maintainability]
+        return "\n".join(lines).strip() + "\n"
+
+
+class ResearchOutput(TaskOutput):
+    technologies: List[Technology] = Field(default_factory=list)
+    notes: str = Field(default="", description="Community insights and anything else worth knowing")
+
+    def to_markdown(self) -> str:
+        lines = ["## Technologies", ""]
+        for t in self.technologies:
+            lines += [f"### {t.name}", ""]
+            if t.used_for:
+                lines += [t.used_for, ""]
+            if t.best_practices:
+                lines += ["Best practices:"] + _bullets(t.best_practices) + [""]
+            if t.references:
+                lines += ["References:"] + _bullets(t.references) + [""]
+        if self.notes:
+            lines += ["## Notes", "", self.notes]
+        return "\n".join(lines).strip() + "\n"
+
+
+class DocumentationOutput(TaskOutput):
+    title: str = Field(description="Short title of the file or module")
+    overview: str = Field(description="Purpose and overview")
+    installation: str = Field(default="", description="Installation or setup instructions")
+    usage: List[str] = Field(default_factory=list, description="Usage examples as code")
+    api: List[SymbolDoc] = Field(default_factory=list, description="One entry per public symbol")
+    configuration: List[ConfigOption] = Field(default_factory=list)
+
+    def to_markdown(self) -> str:
+        lines = [f"# {self.title}", "", "## Overview", "", self.overview, ""]
+        if self.installation:
+            lines += ["## Installation", "", self.installation, ""]
+        if self.usage:
+            lines += ["## Usage", ""]
+            for example in self.usage:
+                lines += ["```", example.strip("`\n"), "```", ""]
+        if self.api:
+            lines += ["## API", ""]
+            for s in self.api:
+                lines += [f"### `{s.name}`", ""]
+                if s.signature:
+                    lines += ["```", s.signature, "```", ""]
+                if s.description:
+                    lines += [s.description, ""]
+                if s.parameters:
+                    lines += ["| Parameter | Type | Description |", "| --- | --- | --- |"]
+                    lines += [f"| `{p.name}` | {p.type} | {p.description} |" for p in s.parameters]
+                    lines.append("")
+                if s.returns:
+                    lines += [f"Returns: {s.returns}", ""]
+                if s.example:
+                    lines += ["```", s.example.strip("`\n"), "```", ""]
+        if self.configuration:
+            lines += ["## Configuration", ""]
+            lines += [f"- `{c.name}`{' (default `' + c.default + '`)' if c.default else ''}: {c.description}"
+                      for c in self.configuration]
+        return "\n".join(lines).strip() + "\n"
+
+    def summary(self, max_chars: int = 600) -> str:
+        """Purpose plus the public API, for the prompts of files that import this one"""
+        text = self.overview.split("\n", 1)[0]
+        if self.api:
+            text += "\nAPI: " + "; ".join(s.signature or s.name for s in self.api[:12])
+        return text[:max_chars]
+
+
+# Task name -> output schema; cleaning and commenting produce code files and stay free-form
+TASK_SCHEMAS: Dict[str, Type[TaskOutput]] = {
+    "analysis": AnalysisOutput,
+    "insight": InsightOutput,
+    "research": ResearchOutput,
+    "documentation": DocumentationOutput,
+}
+
+
+def parse_output(schema: Type[TaskOutput], raw: str) -> Optional[TaskOutput]:
+    """Validated output from an LLM answer, tolerating code fences and prose around the JSON"""
+    fenced = JSON_FENCE.search(raw)
+    text = fenced.group(1) if fenced else raw
+    start, end = text.find("{"), text.rfind("}")
+    if start < 0 or end < start:
+        return None
+    try:
+        return schema.model_validate_json(text[start:end + 1])
+    except (ValidationError, ValueError) as e:
+        logger.warning(f"Output does not match {schema.__name__}: {str(e)[:200]}")
+        return None
+
+
+def _entry_type(annotation) -> Optional[Type[Entry]]:
+    if get_origin(annotation) in (list, List):
+        args = get_args(annotation)
+        if args and isinstance(args[0], type) and issubclass(args[0], Entry):
+            return args[0]
+    return None
+
+
+def _still_defined(symbol: str, source: Optional[str]) -> bool:
+    name = symbol.split(".")[-1].strip("`() ")
+    if not name:
+        return False
+    return source is None or re.search(rf"(?<![\w$-]){re.escape(name)}(?![\w$-])", source) is not None
+
+
+def merge_outputs(schema: Type[TaskOutput], old: Dict, new: Dict, source: Optional[str] = None) -> Dict:
+    """``new`` plus the entries of ``old`` it left out, matched by their key fields.
+
+    For patch runs, which only have to describe the symbols that changed; entries
+    for the rest carry over, as long as their symbol still occurs in ``source``.
+    """
+    merged = dict(new)
+    for name, field in schema.model_fields.items():
+        entry_type = _entry_type(field.annotation)
+        if entry_type is None:
+            continue
+        try:
+            fresh = [entry_type.model_validate(e) for e in new.get(name, [])]
+            previous = [entry_type.model_validate(e) for e in old.get(name, [])]
+        except ValidationError:
+            continue
+        seen = {e.key() for e in fresh}
+        kept = [e for e in previous if e.key() not in seen and _still_defined(e.symbol_name(), source)]
+        merged[name] = [e.model_dump() for e in fresh + kept]
+    return merged
+
+
+def render_markdown(schema: Type[TaskOutput], data: Dict) -> str:
+    return schema.model_validate(data).to_markdown()
@@ -0,0 +1,198 @@
+import os
+import re
+import sqlite3
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+HEADING = re.compile(r"^(#{1,6})\s+(.*)$")
+SYMBOL_PATTERNS = [
+    re.compile(r"`([A-Za-z_$][\w$.]*)(?:\(\))?`"),
+    re.compile(r"\b(?:class|def|function|const|let|var)\s+([A-Za-z_$][\w$]*)"),
+    re.compile(r"\b([A-Za-z_$][\w$.]*)\(\)"),
+]
+QUERY_TERM = re.compile(r"[\w$.]+")
+
+
+@dataclass
+class SearchHit:
+    file: str
+    task: str
+    symbol: str
+    heading: str
+    snippet: str
+    score: float
+
+
+def heading_symbol(heading: str) -> str:
+    """Code symbol a section heading is about, e.g. ``FileProcessor`` in '### Class `FileProcessor`'"""
+    for pattern in SYMBOL_PATTERNS:
+        match = pattern.search(heading)
+        if match:
+            return match.group(1)
+    return ""
+
+
+def split_sections(text: str) -> Iterator[Tuple[str, str]]:
+    """(heading, body) chunks of a markdown document, split at headings outside code blocks"""
+    heading, lines, in_code = "", [], False
+    for line in text.splitlines():
+        if line.lstrip().startswith("```"):
+            in_code = not in_code
+        match = None if in_code else HEADING.match(line)
+        if match:
+            if any(l.strip() for l in lines):
+                yield heading, "\n".join(lines).strip()
+            heading, lines = match.group(2).strip(), []
+        else:
+            lines.append(line)
+    if heading or any(l.strip() for l in lines):
+        yield heading, "\n".join(lines).strip()
+
+
+class SearchIndex:
+    """Incremental full-text index over generated documentation sections.
+
+    Uses SQLite FTS5 with BM25 ranking when available and falls back to
+    LIKE matching otherwise. Each (file, task) section is re-indexed on its
+    own whenever it is written, so the index never needs a full rebuild.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("DOC_SEARCH_INDEX", os.path.join("documentation_output", "search.db"))
+        self._lock = threading.Lock()
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS indexed (
+                file TEXT NOT NULL,
+                task TEXT NOT NULL,
+                mtime REAL NOT NULL,
+                PRIMARY KEY (file, task)
+            )"""
+        )
+        # Row ids of each section's chunks, so re-indexing one section never scans the whole index
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS chunks (
+                id INTEGER PRIMARY KEY,
+                file TEXT NOT NULL,
+                task TEXT NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_file ON chunks(file, task)")
+        try:
+            self._conn.execute(
+                """CREATE VIRTUAL TABLE IF NOT EXISTS sections USING fts5(
+                    file UNINDEXED, task UNINDEXED, symbol, heading, body,
+                    tokenize = 'porter unicode61'
+                )"""
+            )
+            self.fts = True
+        except sqlite3.OperationalError:
+            logger.warning("SQLite FTS5 is not available, search falls back to LIKE matching")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sections (file TEXT, task TEXT, symbol TEXT, heading TEXT, body TEXT)"
+            )
+            self.fts = False
+        self._conn.commit()
+
+    def update(self, file: str, task: str, text: str, mtime: Optional[float] = None):
+        """Replace the indexed chunks of one section"""
+        with self._lock:
+            self._delete("file = ? AND task = ?", (file, task))
+            for heading, body in split_sections(text):
+                rowid = self._conn.execute("INSERT INTO chunks (file, task) VALUES (?, ?)", (file, task)).lastrowid
+                self._conn.execute(
+                    "INSERT INTO sections (rowid, file, task, symbol, heading, body) VALUES (?, ?, ?, ?, ?, ?)",
+                    (rowid, file, task, heading_symbol(heading), heading, body),
+                )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO indexed (file, task, mtime) VALUES (?, ?, ?)",
+                (file, task, mtime or 0.0),
+            )
+            self._conn.commit()
+
+    def _delete(self, where: str, params: Tuple):
+        ids = [(row[0],) for row in self._conn.execute(f"SELECT id FROM chunks WHERE {where}", params)]
+        self._conn.executemany("DELETE FROM sections WHERE rowid = ?", ids)
+        self._conn.execute(f"DELETE FROM chunks WHERE {where}", params)
+
+    def remove(self, file: str):
+        with self._lock:
+            self._delete("file = ?", (file,))
+            self._conn.execute("DELETE FROM indexed WHERE file = ?", (file,))
+            self._conn.commit()
+
+    def sync(self, store) -> int:
+        """Index sections of ``store`` that changed on disk since they were last indexed"""
+        with self._lock:
+            known = {(f, t): m for f, t, m in self._conn.execute("SELECT file, task, mtime FROM indexed")}
+        updated = 0
+        for key in store.files():
+            for task in store.tasks(key):
+                path = store.path_for(key, task)
+                try:
+                    mtime = os.path.getmtime(path)
+                except OSError:
+                    continue
+                if known.get((key, task), -1) < mtime:
+                    text = store.read(key, task)
+                    if text is not None:
+                        self.update(key, task, text, mtime)
+                        updated += 1
+        return updated
+
+    def _match_expression(self, query: str) -> str:
+        # Quote every term so user input can never be parsed as FTS5 syntax; the last one matches as a prefix
+        terms = ['"' + t.replace('"', '""') + '"' for t in QUERY_TERM.findall(query)]
+        if terms:
+            terms[-1] += "*"
+        return " ".join(terms)
+
+    def search(self, query: str, limit: int = 20, task: Optional[str] = None,
+               file: Optional[str] = None) -> List[SearchHit]:
+        """Best matching sections for ``query``, optionally limited to one task type or file"""
+        filters, params = "", []
+        if task:
+            filters += " AND task = ?"
+            params.append(task)
+        if file:
+            filters += " AND file = ?"
+            params.append(file)
+
+        if self.fts:
+            expression = self._match_expression(query)
+            if not expression:
+                return []
+            # bm25 weights: symbol and heading hits count more than body hits
+            sql = (
+                "SELECT file, task, symbol, heading, snippet(sections, 4, '**', '**', ' … ', 24), "
+                "bm25(sections, 0, 0, 10.0, 4.0, 1.0) AS rank FROM sections "
+                f"WHERE sections MATCH ?{filters} ORDER BY rank LIMIT ?"
+            )
+            params = [expression] + params + [limit]
+        else:
+            terms = QUERY_TERM.findall(query)
+            if not terms:
+                return []
+            likes = " AND ".join("(symbol || ' ' || heading || ' ' || body) LIKE ?" for _ in terms)
+            sql = (
+                "SELECT file, task, symbol, heading, substr(body, 1, 200), 0 FROM sections "
+                f"WHERE {likes}{filters} LIMIT ?"
+            )
+            params = [f"%{t}%" for t in terms] + params + [limit]
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [SearchHit(*row[:5], score=-row[5]) for row in rows]
+
+    def stats(self):
+        with self._lock:
+            sections = self._conn.execute("SELECT COUNT(*) FROM indexed").fetchone()[0]
+            chunks = self._conn.execute("SELECT COUNT(*) FROM sections").fetchone()[0]
+        return {"sections": sections, "chunks": chunks, "fts": self.fts}
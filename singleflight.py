@@ -0,0 +1,180 @@
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Type
+
+from cancellation import CancellationToken, RunCancelled
+
+logger = logging.getLogger(__name__)
+
+
+class _Abandoned(Exception):
+    """Handed to followers when the leader's task was cancelled before finishing"""
+
+
+def content_key(*parts: Any) -> str:
+    """Stable hash of the inputs that determine a result"""
+    digest = hashlib.sha256()
+    for part in parts:
+        data = part if isinstance(part, (bytes, memoryview)) else str(part).encode()
+        digest.update(len(data).to_bytes(8, "little"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class SingleFlight:
+    """Process-wide deduplication: identical concurrent requests share one execution.
+
+    Finished results are kept in a small LRU cache so later identical requests,
+    from any session, are served without running again.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.executions = 0
+        self.shared = 0
+        self._in_flight: Dict[str, Future] = {}
+        self._results: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _claim(self, key: str) -> Tuple[Future, bool]:
+        """Future for ``key`` and whether the caller is the leader that must execute it"""
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                self.shared += 1
+                future = Future()
+                future.set_result(self._results[key])
+                return future, False
+            if key in self._in_flight:
+                self.shared += 1
+                return self._in_flight[key], False
+            future = Future()
+            self._in_flight[key] = future
+            self.executions += 1
+            return future, True
+
+    def _finish(self, key: str, future: Future, result: Any = None, error: BaseException = None):
+        with self._lock:
+            self._in_flight.pop(key, None)
+            if error is None and result is not None:
+                self._results[key] = result
+                while len(self._results) > self.max_entries:
+                    self._results.popitem(last=False)
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(error)
+
+    async def run_async(self, key: str, fn: Callable[[], Any],
+                        retry_on: Tuple[Type[BaseException], ...] = (),
+                        runner: Callable[[Callable], Awaitable] = asyncio.to_thread,
+                        token: Optional[CancellationToken] = None, poll: float = 0.2) -> Any:
+        """Run blocking ``fn`` through ``runner`` unless an identical run is in flight or cached.
+
+        Followers whose leader failed with one of ``retry_on`` (for example because
+        the leader's own run was cancelled), or whose leader's task was cancelled,
+        try again instead of inheriting the error. A follower stops waiting with
+        RunCancelled as soon as its own ``token`` is cancelled.
+        """
+        while True:
+            future, leader = self._claim(key)
+            if leader:
+                try:
+                    result = await runner(fn)
+                except asyncio.CancelledError:
+                    # Only the leader's task was cancelled: release the key for the followers
+                    self._finish(key, future, error=_Abandoned())
+                    raise
+                except BaseException as e:
+                    self._finish(key, future, error=e)
+                    raise
+                self._finish(key, future, result)
+                return result
+            try:
+                return await self._follow(future, token, poll)
+            except (_Abandoned,) + tuple(retry_on):
+                logger.info(f"Shared run {key[:12]} was abandoned by its leader, retrying")
+
+    @staticmethod
+    async def _follow(future: Future, token: Optional[CancellationToken], poll: float) -> Any:
+        # asyncio.wait leaves the shared future alone when this follower gives up or is cancelled
+        waiter = asyncio.wrap_future(future)
+        try:
+            while not waiter.done():
+                if token:
+                    token.raise_if_cancelled()
+                await asyncio.wait({waiter}, timeout=poll if token else None)
+        finally:
+            if not waiter.done():
+                # Retrieve the outcome later so an error is not reported as unhandled
+                waiter.add_done_callback(lambda f: f.cancelled() or f.exception())
+        return waiter.result()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"executions": self.executions, "shared": self.shared,
+                    "in_flight": len(self._in_flight), "cached": len(self._results)}
+
+
+class FairScheduler:
+    """Round-robin slots across users, so one large job cannot starve the others"""
+
+    def __init__(self, max_concurrent: int = 6):
+        self.max_concurrent = max_concurrent
+        self.running = 0
+        self._queues: Dict[str, deque] = {}
+        self._rotation: deque = deque()
+        self._cond = threading.Condition()
+
+    def _next_ticket(self):
+        return self._queues[self._rotation[0]][0] if self._rotation else None
+
+    def acquire(self, user: str, token: Optional[CancellationToken] = None, poll: float = 0.25):
+        ticket = object()
+        with self._cond:
+            self._queues.setdefault(user, deque()).append(ticket)
+            if user not in self._rotation:
+                self._rotation.append(user)
+            while self.running >= self.max_concurrent or self._next_ticket() is not ticket:
+                if token is not None and token.cancelled:
+                    self._withdraw(user, ticket)
+                    raise RunCancelled(token.reason)
+                self._cond.wait(poll if token is not None else None)
+            # Served: send this user to the back of the line
+            queue = self._queues[user]
+            queue.popleft()
+            self._rotation.popleft()
+            if queue:
+                self._rotation.append(user)
+            else:
+                del self._queues[user]
+            self.running += 1
+            self._cond.notify_all()
+
+    def _withdraw(self, user: str, ticket: object):
+        """Drop a cancelled ticket from its queue; called with the condition held"""
+        queue = self._queues[user]
+        queue.remove(ticket)
+        if not queue:
+            del self._queues[user]
+            self._rotation.remove(user)
+        # The ticket may have been next in line
+        self._cond.notify_all()
+
+    def release(self):
+        with self._cond:
+            self.running -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, user: str, token: Optional[CancellationToken] = None):
+        self.acquire(user, token)
+        try:
+            yield
+        finally:
+            self.release()
@@ -0,0 +1,254 @@
+import os
+import re
+import ast
+import bisect
+import logging
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+LICENSE_WORDS = re.compile(
+    r"\b(copyright|licen[sc]ed?|spdx-license-identifier|all rights reserved|permission is hereby granted)\b",
+    re.IGNORECASE,
+)
+# A line holding nothing but literal values, e.g. a row of a JSON-like table
+DATA_LINE = re.compile(
+    r"""^\s*[\[{(]?\s*(?:(?:"[^"]*"|'[^']*'|-?\d[\d_.]*(?:e-?\d+)?|0x[\da-f]+|true|false|null|None|True|False)\s*[:,]?\s*)+[\]})]*[,;]?\s*$""",
+    re.IGNORECASE,
+)
+# "line 12", "lines 12-15", "Line 3 to 7", "L42"
+LINE_REFERENCE = re.compile(r"\b([Ll]ines?\s+|L)(\d+)(?:(\s*(?:-|–|to)\s*)(\d+))?\b")
+# `"line": 12` fields of structured (JSON) answers
+JSON_LINE_FIELD = re.compile(r'("line"\s*:\s*)(\d+)')
+# `L12` markers of locally extracted outlines
+OUTLINE_LINE = re.compile(r"\bL(\d+)\b")
+
+COMMENT_STYLES = {
+    "py": ("# ", ""),
+    "js": ("// ", ""),
+    "css": ("/* ", " */"),
+    "html": ("<!-- ", " -->"),
+}
+
+
+def compaction_enabled() -> bool:
+    return os.getenv("DOC_COMPACT_SOURCE", "1").lower() not in ("0", "false", "no")
+
+
+@dataclass
+class CompactSource:
+    text: str
+    # Original (first, last) line numbers behind each compacted line
+    spans: List[Tuple[int, int]]
+    original_chars: int
+
+    @property
+    def saved_ratio(self) -> float:
+        return 1 - len(self.text) / max(self.original_chars, 1)
+
+    def original_line(self, line: int, end: bool = False) -> Optional[int]:
+        if 1 <= line <= len(self.spans):
+            return self.spans[line - 1][1 if end else 0]
+        return None
+
+    def compacted_line(self, line: int) -> Optional[int]:
+        """Compacted line showing original ``line``, or the next one shown when it was elided"""
+        index = bisect.bisect_left([last for _, last in self.spans], line)
+        return index + 1 if index < len(self.spans) else None
+
+
+Lines = List[Tuple[int, int, str]]
+
+
+def _marker(language: str, text: str) -> str:
+    prefix, suffix = COMMENT_STYLES.get(language, ("# ", ""))
+    return f"{prefix}[{text}]{suffix}"
+
+
+def _strip_license(lines: Lines, language: str) -> Lines:
+    """Replace a leading comment block that mentions a license with a one-line marker"""
+    i = 0
+    # Keep a shebang or encoding line
+    while i < len(lines) and (lines[i][2].startswith("#!") or
+                              (lines[i][2].startswith("#") and "coding" in lines[i][2][:30])):
+        i += 1
+    start = i
+    if language == "py":
+        while i < len(lines) and (lines[i][2].lstrip().startswith("#") or not lines[i][2].strip()):
+            i += 1
+    elif language == "js" and lines[i:] and lines[i][2].lstrip().startswith("//"):
+        while i < len(lines) and (lines[i][2].lstrip().startswith("//") or not lines[i][2].strip()):
+            i += 1
+    else:
+        opener, closer = ("<!--", "-->") if language == "html" else ("/*", "*/")
+        while i < len(lines) and not lines[i][2].strip():
+            i += 1
+        if i < len(lines) and lines[i][2].lstrip().startswith(opener):
+            while i < len(lines) and closer not in lines[i][2]:
+                i += 1
+            i += 1
+
+    block = lines[start:i]
+    if len(block) < 2 or not LICENSE_WORDS.search("\n".join(text for _, _, text in block)):
+        return lines
+    first, last = block[0][0], block[-1][1]
+    marker = _marker(language, f"license header removed: lines {first}-{last}")
+    return lines[:start] + [(first, last, marker)] + lines[i:]
+
+
+def _is_data(node: ast.AST) -> bool:
+    if isinstance(node, ast.Constant):
+        return True
+    if isinstance(node, ast.UnaryOp):
+        return isinstance(node.operand, ast.Constant)
+    if isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+        return all(_is_data(e) for e in node.elts)
+    if isinstance(node, ast.Dict):
+        return all(k is None or _is_data(k) for k in node.keys) and all(_is_data(v) for v in node.values)
+    return False
+
+
+def _python_literal_spans(source: str, min_lines: int) -> List[Tuple[int, int]]:
+    """Line ranges of large data literals, outermost only, docstrings excluded"""
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return []
+    docstrings = set()
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Module, ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)) and node.body:
+            first = node.body[0]
+            if isinstance(first, ast.Expr) and isinstance(first.value, ast.Constant):
+                docstrings.add(id(first.value))
+
+    candidates = []
+    for node in ast.walk(tree):
+        if (isinstance(node, (ast.List, ast.Tuple, ast.Set, ast.Dict, ast.Constant))
+                and id(node) not in docstrings and node.end_lineno - node.lineno + 1 >= min_lines
+                and _is_data(node)):
+            candidates.append((node.lineno, node.end_lineno))
+    spans, covered = [], 0
+    for start, end in sorted(candidates):
+        if start > covered:
+            spans.append((start, end))
+            covered = end
+    return spans
+
+
+def _data_line_spans(lines: Lines, min_lines: int) -> List[Tuple[int, int]]:
+    """Runs of consecutive lines that hold nothing but literal values"""
+    spans, run_start = [], None
+    for index, (first, _, text) in enumerate(lines + [(0, 0, "")]):
+        if text.strip() and DATA_LINE.match(text):
+            run_start = first if run_start is None else run_start
+            continue
+        if run_start is not None:
+            end = lines[index - 1][1]
+            if end - run_start + 1 >= min_lines:
+                # Keep the row before and after as they usually open and close the literal
+                spans.append((run_start - 1, end + 1))
+            run_start = None
+    return spans
+
+
+def _collapse(lines: Lines, spans: List[Tuple[int, int]], language: str, keep: int = 2) -> Lines:
+    """Keep the first ``keep`` rows of each span's body and replace the rest with a marker"""
+    result: Lines = []
+    spans = iter(sorted(spans))
+    span = next(spans, None)
+    elided: List[Tuple[int, int, str]] = []
+    for line in lines:
+        number = line[0]
+        while span and number > span[1]:
+            span = next(spans, None)
+        inside = span and span[0] + keep < number < span[1]
+        if inside:
+            elided.append(line)
+            continue
+        if elided:
+            indent = re.match(r"\s*", elided[0][2]).group()
+            text = f"... {len(elided)} more lines of data elided"
+            result.append((elided[0][0], elided[-1][1], indent + _marker(language, text)))
+            elided = []
+        result.append(line)
+    return result
+
+
+def _normalize_whitespace(lines: Lines) -> Lines:
+    """Strip trailing whitespace and fold runs of blank lines into one"""
+    result: Lines = []
+    for first, last, text in lines:
+        text = text.rstrip()
+        if not text and result and not result[-1][2]:
+            result[-1] = (result[-1][0], last, "")
+            continue
+        result.append((first, last, text))
+    while result and not result[0][2]:
+        result.pop(0)
+    return result
+
+
+def compact_source(source: str, language: str, min_literal_lines: int = 8) -> CompactSource:
+    """Token-lean copy of ``source`` with a map from its lines back to the original.
+
+    Drops license banners, collapses large data literals and normalizes
+    whitespace. Code itself is never rewritten.
+    """
+    language = {"jsx": "js", "ts": "js", "tsx": "js", "htm": "html"}.get(language, language)
+    lines: Lines = [(n, n, text) for n, text in enumerate(source.splitlines(), 1)]
+    lines = _strip_license(lines, language)
+    if language == "py":
+        spans = _python_literal_spans(source, min_literal_lines)
+    else:
+        spans = _data_line_spans(lines, min_literal_lines)
+    lines = _collapse(lines, spans, language)
+    lines = _normalize_whitespace(lines)
+    return CompactSource(
+        text="\n".join(text for _, _, text in lines),
+        spans=[(first, last) for first, last, _ in lines],
+        original_chars=len(source),
+    )
+
+
+def remap_line_references(text: str, compacted: CompactSource) -> str:
+    """Rewrite line numbers that refer to the compacted listing to original line numbers"""
+    def replace(match: re.Match) -> str:
+        prefix, start, separator, end = match.groups()
+        first = compacted.original_line(int(start))
+        if first is None:
+            return match.group(0)
+        if end is None:
+            last = compacted.original_line(int(start), end=True)
+            if last != first and prefix.lower().startswith("line"):
+                return f"lines {first}-{last}"
+            return f"{prefix}{first}"
+        last = compacted.original_line(int(end), end=True)
+        return f"{prefix}{first}{separator}{last if last is not None else end}"
+    def replace_field(match: re.Match) -> str:
+        line = compacted.original_line(int(match.group(2)))
+        return match.group(0) if line is None else f"{match.group(1)}{line}"
+
+    return JSON_LINE_FIELD.sub(replace_field, LINE_REFERENCE.sub(replace, text))
+
+
+def renumber_outline(outline: str, compacted: CompactSource) -> str:
+    """Outline with its original line numbers turned into lines of the compacted listing.
+
+    Prompts that show the compacted source must use its numbering throughout, since
+    ``remap_line_references`` maps every line number in the answer back from it.
+    """
+    def replace(match: re.Match) -> str:
+        line = compacted.compacted_line(int(match.group(1)))
+        return match.group(0) if line is None else f"L{line}"
+    return OUTLINE_LINE.sub(replace, outline)
+
+
+def remapping_callback(callback: Optional[Callable], compacted: CompactSource) -> Callable:
+    """Task callback that maps line references in the output back before ``callback`` sees it"""
+    def remap(output):
+        if output.raw:
+            output.raw = remap_line_references(output.raw, compacted)
+        if callback:
+            callback(output)
+    return remap
@@ -0,0 +1,218 @@
+import os
+import time
+import logging
+import threading
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import litellm
+
+from async_runner import ensure_http_client, llm_loop
+from cancellation import current_token
+from llm_wrapper import WrappedLLM
+from outputs import OutputStore
+
+logger = logging.getLogger(__name__)
+
+FINAL_ANSWER = "Final Answer:"
+# Connection settings copied from the wrapped LLM onto the streaming request
+LLM_SETTINGS = ("api_key", "base_url", "api_base", "api_version", "max_tokens", "timeout", "top_p")
+
+
+class StreamUnavailable(Exception):
+    """The provider refused a streaming request before producing any output"""
+
+
+def streaming_enabled() -> bool:
+    return os.getenv("DOC_STREAM", "1").lower() not in ("0", "false", "no")
+
+
+def stream_max_chars() -> int:
+    return int(os.getenv("DOC_STREAM_MAX_CHARS", 60000))
+
+
+@dataclass
+class StopRule:
+    """When to cut a runaway streaming answer short"""
+    max_chars: Optional[int] = None
+
+    def cut(self, text: str) -> Optional[int]:
+        """Offset to truncate ``text`` at, or None to keep generating"""
+        start = text.rfind(FINAL_ANSWER)
+        base = start + len(FINAL_ANSWER) if start >= 0 else 0
+        if self.max_chars and len(text) - base > self.max_chars:
+            limit = base + self.max_chars
+            newline = text.rfind("\n", base, limit)
+            return newline if newline > base else limit
+        return None
+
+
+class StreamSink:
+    """Receives a file's streamed completions, writes them to the running task's output file
+    and forwards them to an optional UI callback.
+
+    Tasks run sequentially, so the sink follows along by advancing on each task callback.
+    """
+
+    def __init__(self, store: OutputStore, key: str, task_names: List[str],
+                 rules: Optional[Dict[str, StopRule]] = None,
+                 on_chunk: Optional[Callable[[str, str, str], None]] = None, min_interval: float = 0.25):
+        self.store = store
+        self.key = key
+        self.task_names = task_names
+        self.rules = rules or {}
+        self.on_chunk = on_chunk
+        self.min_interval = min_interval
+        self.task_index = 0
+        self._call = 0
+        self._last_push = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def task(self) -> str:
+        return self.task_names[min(self.task_index, len(self.task_names) - 1)]
+
+    def rule(self) -> StopRule:
+        return self.rules.get(self.task, StopRule(max_chars=stream_max_chars()))
+
+    def attach(self, tasks: List):
+        """Chain onto each task's callback so the sink moves on when a task finishes"""
+        for task in tasks:
+            task.callback = self._advancing(task.callback)
+
+    def _advancing(self, callback: Optional[Callable]) -> Callable:
+        def advance(output):
+            with self._lock:
+                self.task_index += 1
+            if callback:
+                callback(output)
+        return advance
+
+    def begin(self) -> int:
+        """Start a new completion; only the latest one (e.g. not a losing hedge) is written"""
+        with self._lock:
+            self._call += 1
+            self.store.append(self.key, self.task, "", truncate=True)
+            return self._call
+
+    def write(self, call_id: int, delta: str, text: str, final: bool = False):
+        with self._lock:
+            if call_id != self._call:
+                return
+            task = self.task
+            if delta:
+                self.store.append(self.key, task, delta)
+            now = time.monotonic()
+            push = self.on_chunk and (final or now - self._last_push >= self.min_interval)
+            if push:
+                self._last_push = now
+        if push:
+            try:
+                self.on_chunk(self.key, task, text)
+            except Exception as e:
+                logger.error(f"Stream callback failed: {str(e)}")
+
+
+# Sink of the file the current thread is processing; copied into LLM worker threads
+current_stream: ContextVar[Optional[StreamSink]] = ContextVar("current_stream", default=None)
+
+
+class StreamingLLM(WrappedLLM):
+    """LLM that streams plain completions token by token into the current StreamSink.
+
+    Streams run as coroutines on the shared event loop over a pooled HTTP client.
+    Calls that pass tools, or run with no sink, go through the wrapped LLM unchanged.
+    Streaming also lets cancellation and early-stop rules end a generation mid-way.
+    """
+
+    def _request(self, messages) -> Dict:
+        if isinstance(messages, str):
+            messages = [{"role": "user", "content": messages}]
+        request = {"model": self.inner.model, "messages": messages, "stream": True,
+                   "stream_options": {"include_usage": True}, "temperature": self.inner.temperature}
+        if self.stop:
+            request["stop"] = self.stop
+        for name in LLM_SETTINGS:
+            value = getattr(self.inner, name, None)
+            if value is not None:
+                request[name] = value
+        return request
+
+    async def _astream(self, request: Dict, sink: StreamSink, call_id: int, rule: StopRule) -> Tuple[str, Any]:
+        """Stream the answer into ``sink``; returns its text and the provider's usage, if it sent one"""
+        await ensure_http_client()
+        try:
+            response = await litellm.acompletion(**request)
+        except Exception as e:
+            raise StreamUnavailable(str(e)) from e
+        text, checked, usage = "", 0, None
+        try:
+            async for chunk in response:
+                # With include_usage the provider sends the totals in a last, choice-less chunk
+                usage = getattr(chunk, "usage", None) or usage
+                delta = (chunk.choices[0].delta.content or "") if chunk.choices else ""
+                if not delta:
+                    continue
+                text += delta
+                # Headings complete at a newline; otherwise only re-check the length now and then
+                if "\n" not in delta and len(text) - checked < 1000:
+                    sink.write(call_id, delta, text)
+                    continue
+                checked = len(text)
+                cut = rule.cut(text)
+                if cut is not None:
+                    logger.info(f"Stopped {sink.task} generation for {sink.key} early at {cut} chars")
+                    delta = delta[:max(0, len(delta) - (len(text) - cut))]
+                    text = text[:cut]
+                    sink.write(call_id, delta, text)
+                    break
+                sink.write(call_id, delta, text)
+        finally:
+            # Closing the stream (also on cancellation) releases the pooled connection
+            close = getattr(response, "aclose", None)
+            if close:
+                try:
+                    await close()
+                except Exception:
+                    pass
+        sink.write(call_id, "", text, final=True)
+        return text, usage
+
+    @staticmethod
+    def _report_usage(callbacks, request: Dict, text: str, usage, started: datetime):
+        """Hand the call's token usage to the callbacks (CrewAI's token counter) like a non-streamed call"""
+        if usage is None:
+            # Cut short by a stop rule, or the provider does not report usage for streams
+            prompt = litellm.token_counter(model=request["model"], messages=request["messages"])
+            completion = litellm.token_counter(model=request["model"], text=text)
+            usage = litellm.Usage(prompt_tokens=prompt, completion_tokens=completion,
+                                  total_tokens=prompt + completion)
+        for callback in callbacks or []:
+            log = getattr(callback, "log_success_event", None)
+            if log is None:
+                continue
+            try:
+                log(request, {"usage": usage}, started, datetime.now())
+            except Exception as e:
+                logger.error(f"Usage callback failed: {str(e)}")
+
+    def call(self, messages, tools: Optional[List[dict]] = None, callbacks=None,
+             available_functions: Optional[Dict] = None, *args, **kwargs):
+        sink = current_stream.get()
+        if sink is None or tools or available_functions:
+            return self.inner.call(messages, tools, callbacks, available_functions, *args, **kwargs)
+
+        call_id = sink.begin()
+        request = self._request(messages)
+        started = datetime.now()
+        coroutine = self._astream(request, sink, call_id, sink.rule())
+        try:
+            # Runs on the shared event loop; this thread only waits, and cancellation aborts the request
+            text, usage = llm_loop.run(coroutine, current_token.get())
+        except StreamUnavailable as e:
+            logger.warning(f"Streaming request failed, retrying without streaming: {str(e)}")
+            return self.inner.call(messages, tools, callbacks, available_functions, *args, **kwargs)
+        self._report_usage(callbacks, request, text, usage, started)
+        return text
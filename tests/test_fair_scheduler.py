@@ -0,0 +1,33 @@
+import threading
+
+import pytest
+
+pytest.importorskip("crewai")
+
+from cancellation import CancellationToken, RunCancelled
+from singleflight import FairScheduler
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    scheduler = FairScheduler(max_concurrent=1)
+    scheduler.acquire("alice")
+    token = CancellationToken()
+    errors = []
+
+    def wait_for_slot():
+        try:
+            scheduler.acquire("bob", token, poll=0.01)
+        except RunCancelled as e:
+            errors.append(e)
+
+    waiter = threading.Thread(target=wait_for_slot)
+    waiter.start()
+    token.cancel("stop")
+    waiter.join(timeout=2)
+    assert not waiter.is_alive()
+    assert len(errors) == 1
+
+    # Bob's withdrawn ticket does not hold up the next user
+    scheduler.release()
+    scheduler.acquire("carol", CancellationToken(), poll=0.01)
+    assert scheduler.running == 1
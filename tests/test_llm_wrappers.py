@@ -0,0 +1,34 @@
+import pytest
+
+pytest.importorskip("crewai")
+pytest.importorskip("litellm")
+
+from crewai import LLM
+
+from cancellation import CancellableLLM
+from hedging import HedgeBudget, HedgedLLM, HedgePolicy
+from profiling import ProfiledLLM
+from streaming import StreamingLLM
+
+OBSERVATION = "\nObservation:"
+
+
+def test_stop_set_on_outer_wrapper_reaches_provider_request():
+    streaming = StreamingLLM(LLM(model="gpt-4o-mini"))
+    outer = CancellableLLM(ProfiledLLM(streaming))
+
+    # What CrewAI's agent executor does to the agent's LLM
+    outer.stop = list(set(outer.stop + [OBSERVATION]))
+
+    assert outer.stop == [OBSERVATION]
+    assert streaming._request([{"role": "user", "content": "hi"}])["stop"] == [OBSERVATION]
+
+
+def test_hedged_llm_forwards_stop_to_both_legs():
+    primary, backup = LLM(model="gpt-4o-mini"), LLM(model="gpt-4o")
+    hedged = CancellableLLM(HedgedLLM(primary, backup, HedgePolicy(), HedgeBudget(HedgePolicy())))
+
+    hedged.stop = [OBSERVATION]
+
+    assert primary.stop == [OBSERVATION]
+    assert backup.stop == [OBSERVATION]
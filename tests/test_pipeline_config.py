@@ -0,0 +1,33 @@
+import json
+
+import pytest
+
+from pipeline_config import PipelineConfigError, PipelineRule, PipelineSpec
+
+TASKS = ["analysis", "documentation"]
+
+
+def load(tmp_path, config):
+    (tmp_path / "pipeline.json").write_text(json.dumps(config))
+    return PipelineSpec.load(str(tmp_path), TASKS, "gpt-4o-mini", TASKS)
+
+
+def test_rule_with_empty_task_list_is_rejected(tmp_path):
+    with pytest.raises(PipelineConfigError, match="'tasks'"):
+        load(tmp_path, {"rules": [{"extensions": [".css"], "tasks": []}]})
+
+
+def test_default_with_empty_task_list_is_rejected(tmp_path):
+    with pytest.raises(PipelineConfigError, match="default.tasks"):
+        load(tmp_path, {"default": {"tasks": []}})
+
+
+def test_unknown_rule_key_names_the_key():
+    with pytest.raises(PipelineConfigError, match="'extension'"):
+        PipelineRule.from_dict({"extension": [".py"]})
+
+
+def test_valid_rule_resolves(tmp_path):
+    (tmp_path / "style.css").write_text("body { color: red; }")
+    spec = load(tmp_path, {"rules": [{"extensions": [".css"], "tasks": ["documentation"]}]})
+    assert spec.resolve(str(tmp_path / "style.css")).tasks == ["documentation"]
@@ -0,0 +1,39 @@
+import re
+
+from extractors import extract_outline
+from source_compaction import compact_source, remap_line_references, renumber_outline
+
+SOURCE = '''# Copyright (c) 2024 Example Corp.
+# Licensed under the MIT License.
+# Permission is hereby granted, free of charge, to any person obtaining a copy.
+
+
+
+import os
+
+
+def bar():
+    return os.getcwd()
+
+
+
+def baz(x):
+    return x
+'''
+
+
+def test_outline_line_numbers_survive_compaction_round_trip():
+    compacted = compact_source(SOURCE, "py")
+    assert compacted.saved_ratio > 0
+    original = {name: int(line) for name, line in re.findall(r"(\w+)\(.*?\) L(\d+)", extract_outline("m.py", SOURCE).render())}
+    assert original == {"bar": 10, "baz": 15}
+
+    # The prompt shows the compacted listing next to the renumbered outline ...
+    outline = renumber_outline(extract_outline("m.py", SOURCE).render(), compacted)
+    for name, line in re.findall(r"(\w+)\(.*?\) L(\d+)", outline):
+        assert compacted.text.splitlines()[int(line) - 1].startswith(f"def {name}(")
+        # ... and an answer citing the outline maps back to the original line
+        answer = f'`{name}` is defined at L{line}, see {{"line": {line}}}'
+        remapped = remap_line_references(answer, compacted)
+        assert f"L{original[name]}" in remapped
+        assert f'"line": {original[name]}' in remapped
@@ -0,0 +1,61 @@
+import io
+import os
+import tarfile
+import zipfile
+
+import pytest
+
+from uploads import UploadError, UploadJob
+
+SOURCE = b"def main():\n    return 42\n" * 200
+
+
+@pytest.fixture(autouse=True)
+def scratch_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("DOC_UPLOAD_DIR", str(tmp_path))
+    return tmp_path
+
+
+def tar_bytes(mode: str = "w:gz") -> bytes:
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode=mode) as archive:
+        info = tarfile.TarInfo("project/main.py")
+        info.size = len(SOURCE)
+        archive.addfile(info, io.BytesIO(SOURCE))
+    return buffer.getvalue()
+
+
+def zip_bytes() -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as archive:
+        archive.writestr("project/main.py", SOURCE)
+    return buffer.getvalue()
+
+
+def test_truncated_tar_is_an_upload_error_and_removes_the_job(scratch_dir):
+    # Cut inside the member's data, past a complete header
+    data = tar_bytes("w")[:512 + len(SOURCE) // 2]
+    with UploadJob([".py"]) as job:
+        root = job.root
+        with pytest.raises(UploadError, match="Could not extract"):
+            job.add("project.tar", io.BytesIO(data))
+        assert not os.path.exists(root)
+
+
+def test_zip_with_bad_crc_is_an_upload_error_and_removes_the_job(scratch_dir):
+    data = bytearray(zip_bytes())
+    # Flip a byte of the stored member's content, leaving the headers intact
+    offset = data.index(SOURCE[:20]) + 5
+    data[offset] ^= 0xFF
+    with UploadJob([".py"]) as job:
+        root = job.root
+        with pytest.raises(UploadError, match="Could not extract"):
+            job.add("project.zip", io.BytesIO(bytes(data)))
+        assert not os.path.exists(root)
+
+
+def test_intact_archives_extract(scratch_dir):
+    for name, data in (("project.tar.gz", tar_bytes()), ("project.zip", zip_bytes())):
+        with UploadJob([".py"]) as job:
+            job.add(name, io.BytesIO(data))
+            assert [os.path.relpath(f, job.root) for f in job.files] == [os.path.join("project", "main.py")]
@@ -0,0 +1,218 @@
+import os
+import time
+import stat
+import shutil
+import hashlib
+import tarfile
+import zipfile
+import zlib
+import logging
+import tempfile
+from dataclasses import dataclass
+from typing import BinaryIO, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+CHUNK_BYTES = 64 * 1024
+JOB_PREFIX = "job-"
+# What zipfile and tarfile raise on archives they cannot read
+ARCHIVE_ERRORS = (tarfile.TarError, zipfile.BadZipFile, zipfile.LargeZipFile, RuntimeError,
+                  NotImplementedError, EOFError, zlib.error)
+
+
+class UploadError(Exception):
+    """Raised when an upload breaks a limit or contains an unsafe entry"""
+
+
+@dataclass
+class UploadLimits:
+    max_total_bytes: int = 50 * 1024 * 1024
+    max_file_bytes: int = 5 * 1024 * 1024
+    max_files: int = 500
+    # Uncompressed / compressed size above which a zip entry is treated as a bomb
+    max_ratio: float = 100.0
+
+    @classmethod
+    def from_env(cls) -> "UploadLimits":
+        return cls(
+            max_total_bytes=int(os.getenv("DOC_UPLOAD_MAX_BYTES", cls.max_total_bytes)),
+            max_file_bytes=int(os.getenv("DOC_UPLOAD_MAX_FILE_BYTES", cls.max_file_bytes)),
+            max_files=int(os.getenv("DOC_UPLOAD_MAX_FILES", cls.max_files)),
+            max_ratio=float(os.getenv("DOC_UPLOAD_MAX_RATIO", cls.max_ratio)),
+        )
+
+
+def scratch_root() -> str:
+    return os.getenv("DOC_UPLOAD_DIR", os.path.join(tempfile.gettempdir(), "doc-uploads"))
+
+
+def cleanup_stale_jobs(max_age: float = 6 * 3600) -> int:
+    """Remove scratch directories left behind by jobs of a process that died"""
+    root, removed = scratch_root(), 0
+    if not os.path.isdir(root):
+        return 0
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        if name.startswith(JOB_PREFIX) and time.time() - os.path.getmtime(path) > max_age:
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+    return removed
+
+
+def upload_digest(uploads: Iterable[Tuple[str, BinaryIO]]) -> str:
+    """Stable name for a set of uploads; each source is read in chunks and rewound"""
+    digest = hashlib.sha256()
+    for name, source in uploads:
+        digest.update(name.encode() + b"\0")
+        while chunk := source.read(CHUNK_BYTES):
+            digest.update(chunk)
+        source.seek(0)
+        digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+
+def is_archive(name: str) -> bool:
+    return name.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+class UploadJob:
+    """Per-job scratch directory that uploads are streamed into, removed when the job ends.
+
+    Use as a context manager; ``root`` can then be fed to the directory pipeline.
+    Only files with one of ``extensions`` are kept, everything else is skipped.
+    With a ``name`` (see ``upload_digest``) the directory is the same for every
+    upload of the same content, so output keys and prompts do not change between
+    runs; only when an identical job is still running does it get a random one.
+    """
+
+    def __init__(self, extensions: Iterable[str], limits: Optional[UploadLimits] = None,
+                 name: Optional[str] = None):
+        self.extensions = tuple(extensions)
+        self.limits = limits or UploadLimits.from_env()
+        self.name = name
+        self.root: Optional[str] = None
+        self.files: List[str] = []
+        self.skipped = 0
+        self.total_bytes = 0
+
+    def __enter__(self) -> "UploadJob":
+        os.makedirs(scratch_root(), exist_ok=True)
+        if self.name:
+            root = os.path.join(scratch_root(), JOB_PREFIX + self.name)
+            try:
+                os.mkdir(root, 0o700)
+                self.root = root
+                return self
+            except FileExistsError:
+                logger.info(f"Upload directory {root} is in use, extracting to a private one")
+        self.root = tempfile.mkdtemp(prefix=JOB_PREFIX, dir=scratch_root())
+        return self
+
+    def __exit__(self, *exc):
+        self.cleanup()
+        return False
+
+    def cleanup(self):
+        if self.root:
+            shutil.rmtree(self.root, ignore_errors=True)
+            logger.info(f"Removed upload scratch directory {self.root}")
+            self.root = None
+
+    def _target(self, name: str) -> Optional[str]:
+        """Safe destination for an archive member, or None if it should be skipped"""
+        normalized = name.replace("\\", "/")
+        parts = [p for p in normalized.split("/") if p not in ("", ".")]
+        if normalized.startswith("/") or ".." in parts or (parts and ":" in parts[0]):
+            raise UploadError(f"Unsafe path in upload: {name}")
+        if not parts or not parts[-1].endswith(self.extensions):
+            self.skipped += 1
+            return None
+        if len(self.files) >= self.limits.max_files:
+            raise UploadError(f"Upload has more than {self.limits.max_files} code files")
+        path = os.path.realpath(os.path.join(self.root, *parts))
+        if not path.startswith(os.path.realpath(self.root) + os.sep):
+            raise UploadError(f"Unsafe path in upload: {name}")
+        return path
+
+    def _write(self, source: BinaryIO, path: str, name: str):
+        """Copy in chunks, enforcing limits on the bytes actually read rather than declared sizes"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        written = 0
+        try:
+            # O_EXCL: never follow or overwrite anything already at the destination
+            with os.fdopen(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), "wb") as out:
+                while chunk := source.read(CHUNK_BYTES):
+                    written += len(chunk)
+                    if written > self.limits.max_file_bytes:
+                        raise UploadError(f"{name} is larger than {self.limits.max_file_bytes} bytes")
+                    if self.total_bytes + written > self.limits.max_total_bytes:
+                        raise UploadError(f"Upload is larger than {self.limits.max_total_bytes} bytes")
+                    out.write(chunk)
+        except FileExistsError:
+            raise UploadError(f"Duplicate path in upload: {name}")
+        except BaseException:
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+        self.total_bytes += written
+        self.files.append(path)
+
+    def add_file(self, name: str, source: BinaryIO):
+        path = self._target(os.path.basename(name))
+        if path:
+            self._write(source, path, name)
+
+    def add_zip(self, source: BinaryIO):
+        try:
+            archive = zipfile.ZipFile(source)
+        except zipfile.BadZipFile as e:
+            raise UploadError(f"Not a valid zip archive: {e}")
+        with archive:
+            for info in archive.infolist():
+                mode = info.external_attr >> 16
+                if info.is_dir() or stat.S_ISLNK(mode):
+                    continue
+                if info.file_size > self.limits.max_file_bytes:
+                    raise UploadError(f"{info.filename} is larger than {self.limits.max_file_bytes} bytes")
+                if info.file_size > self.limits.max_ratio * max(info.compress_size, 1) and info.file_size > CHUNK_BYTES:
+                    raise UploadError(f"{info.filename} has a suspicious compression ratio")
+                path = self._target(info.filename)
+                if path:
+                    with archive.open(info) as member:
+                        self._write(member, path, info.filename)
+
+    def add_tar(self, source: BinaryIO):
+        try:
+            # Stream mode reads members in order without seeking or loading the archive
+            archive = tarfile.open(fileobj=source, mode="r|*")
+        except tarfile.TarError as e:
+            raise UploadError(f"Not a valid tar archive: {e}")
+        with archive:
+            for member in archive:
+                # Links, devices and fifos are never extracted
+                if not member.isfile():
+                    continue
+                if member.size > self.limits.max_file_bytes:
+                    raise UploadError(f"{member.name} is larger than {self.limits.max_file_bytes} bytes")
+                path = self._target(member.name)
+                if path:
+                    self._write(archive.extractfile(member), path, member.name)
+
+    def add(self, name: str, source: BinaryIO):
+        """Add an uploaded code file or archive; a broken archive removes the job directory"""
+        lower = name.lower()
+        try:
+            if lower.endswith(".zip"):
+                self.add_zip(source)
+            elif is_archive(lower):
+                self.add_tar(source)
+            else:
+                self.add_file(name, source)
+        except ARCHIVE_ERRORS as e:
+            # Truncated or corrupt data, encrypted members, unsupported compression
+            self.cleanup()
+            raise UploadError(f"Could not extract {name}: {e}") from e
+        except UploadError:
+            self.cleanup()
+            raise
@@ -0,0 +1,134 @@
+import os
+import logging
+from typing import Dict, List, Optional
+
+import streamlit as st
+
+from outputs import OutputStore
+
+logger = logging.getLogger(__name__)
+
+PAGE_CHARS = int(os.getenv("DOC_VIEWER_PAGE_CHARS", 20000))
+FILES_PER_PAGE = 50
+
+
+def paginate_markdown(text: str, page_chars: int = PAGE_CHARS) -> List[str]:
+    """Split markdown into pages at line boundaries, closing and reopening code fences across breaks"""
+    pages, lines, size, fence = [], [], 0, None
+    for line in text.splitlines():
+        if size + len(line) > page_chars and lines:
+            if fence is not None:
+                lines.append("```")
+            pages.append("\n".join(lines))
+            lines, size = ([fence] if fence is not None else []), 0
+        if line.lstrip().startswith("```"):
+            fence = None if fence is not None else line.strip()
+        lines.append(line)
+        size += len(line) + 1
+    if lines:
+        pages.append("\n".join(lines))
+    return pages or [""]
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _load_pages(path: str, mtime: float, page_chars: int) -> List[str]:
+    with open(path, "r", encoding="utf-8") as f:
+        return paginate_markdown(f.read(), page_chars)
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _load_bytes(path: str, mtime: float) -> bytes:
+    # Keyed by mtime so reruns (and the watch fragment's refreshes) only re-read a file that changed
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def show_preview(text: str, file_name: str, key: str, page_chars: int = PAGE_CHARS):
+    """Render the first page of ``text`` and offer the whole of it as a download"""
+    pages = paginate_markdown(text, page_chars)
+    st.markdown(pages[0])
+    if len(pages) > 1:
+        st.caption(f"Showing page 1 of {len(pages)}; download for the full text.")
+        st.download_button("⬇️ Download", text, file_name=file_name, key=key)
+
+
+class DocumentationViewer:
+    """Browses documentation from the on-disk OutputStore one section page at a time.
+
+    Only the selected file's selected section is read and rendered, so the
+    page stays responsive however large the whole document is.
+    """
+
+    def __init__(self, store: OutputStore, keys: List[str], labels: Optional[Dict[str, str]] = None,
+                 download_path: Optional[str] = None, widget_key: str = "viewer"):
+        self.store = store
+        self.keys = [key for key in keys if store.tasks(key)]
+        self.labels = labels or self._relative_labels(self.keys)
+        self.download_path = download_path
+        self.widget_key = widget_key
+
+    @staticmethod
+    def _relative_labels(keys: List[str]) -> Dict[str, str]:
+        if len(keys) < 2:
+            return {key: os.path.basename(key) for key in keys}
+        try:
+            root = os.path.commonpath(keys)
+        except ValueError:
+            return {key: key for key in keys}
+        return {key: os.path.relpath(key, root) for key in keys}
+
+    def _key(self, name: str) -> str:
+        return f"{self.widget_key}_{name}"
+
+    def _select_file(self) -> Optional[str]:
+        query = st.text_input("Filter files", key=self._key("filter")).strip().lower()
+        keys = sorted((k for k in self.keys if query in self.labels[k].lower()), key=lambda k: self.labels[k])
+        if not keys:
+            st.caption("No matching files")
+            return None
+
+        directories = sorted({os.path.dirname(self.labels[k]) for k in keys})
+        if len(directories) > 1:
+            directory = st.selectbox("Directory", directories, key=self._key("dir"),
+                                     format_func=lambda d: d or "(root)")
+            keys = [k for k in keys if os.path.dirname(self.labels[k]) == directory]
+
+        page_count = (len(keys) - 1) // FILES_PER_PAGE + 1
+        if page_count > 1:
+            page = st.number_input("File page", 1, page_count, key=self._key("file_page"))
+            keys = keys[(page - 1) * FILES_PER_PAGE:page * FILES_PER_PAGE]
+        return st.radio("File", keys, key=self._key("file"),
+                        format_func=lambda k: os.path.basename(self.labels[k]))
+
+    def _show_section(self, key: str):
+        tasks = self.store.tasks(key)
+        task = st.radio("Section", tasks, horizontal=True, key=self._key(f"section_{key}"))
+        path = self.store.path_for(key, task)
+        if not os.path.exists(path):
+            st.warning("This section is no longer on disk.")
+            return
+        pages = _load_pages(path, os.path.getmtime(path), PAGE_CHARS)
+        page = 1
+        if len(pages) > 1:
+            page = st.number_input(f"Page (of {len(pages)})", 1, len(pages), key=self._key(f"page_{key}_{task}"))
+        st.markdown(pages[page - 1])
+        st.download_button(f"⬇️ Download {task}", _load_bytes(path, os.path.getmtime(path)),
+                           file_name=os.path.basename(path), key=self._key(f"download_{key}_{task}"))
+
+    def render(self):
+        if not self.keys:
+            st.info("No documentation on disk yet.")
+            return
+        if self.download_path and os.path.exists(self.download_path):
+            # Streamlit serves the file through its media endpoint, not inside the page message
+            data = _load_bytes(self.download_path, os.path.getmtime(self.download_path))
+            st.download_button("⬇️ Download Complete Documentation", data,
+                               file_name=os.path.basename(self.download_path),
+                               key=self._key("download_all"))
+        nav, content = st.columns([1, 3])
+        with nav:
+            key = self._select_file()
+        with content:
+            if key:
+                st.markdown(f"#### {self.labels[key]}")
+                self._show_section(key)
@@ -0,0 +1,212 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import CancelledError, Future
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Set
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # Fall back to polling when watchdog is not installed
+    FileSystemEventHandler = object
+    Observer = None
+
+logger = logging.getLogger(__name__)
+
+IGNORED_DIRS = {".git", "__pycache__", "node_modules", ".venv", "venv", "documentation_output"}
+# Files the pipeline itself writes next to the sources; reacting to them would loop forever
+IGNORED_PREFIXES = ("analysis_", "cleaned_", "insights_", "research_", "commented_", "docs_")
+
+
+class _EventHandler(FileSystemEventHandler):
+    def __init__(self, watcher: "DirectoryWatcher"):
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+        self.watcher.notify(event.src_path)
+        dest = getattr(event, "dest_path", None)
+        if dest:
+            self.watcher.notify(dest)
+
+
+class DirectoryWatcher:
+    """Debounced change notifications for code files under a directory.
+
+    Uses inotify (or the platform equivalent) through watchdog when it is
+    installed, and otherwise polls modification times.
+    """
+
+    def __init__(self, root: str, extensions: Iterable[str], on_change: Callable[[Set[str]], None],
+                 debounce: float = 1.0, poll_interval: float = 1.0):
+        self.root = os.path.abspath(root)
+        self.extensions = tuple(extensions)
+        self.on_change = on_change
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self._pending: Set[str] = set()
+        self._last_event = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+        self._observer = None
+
+    def _relevant(self, path: str) -> bool:
+        parts = os.path.relpath(path, self.root).split(os.sep)
+        return (path.endswith(self.extensions) and not parts[-1].startswith(IGNORED_PREFIXES)
+                and not IGNORED_DIRS.intersection(parts))
+
+    def notify(self, path: str):
+        path = os.path.abspath(path)
+        if not self._relevant(path):
+            return
+        with self._lock:
+            self._pending.add(path)
+            self._last_event = time.monotonic()
+
+    def _snapshot(self) -> Dict[str, float]:
+        mtimes = {}
+        for root, dirs, filenames in os.walk(self.root):
+            dirs[:] = [d for d in dirs if d not in IGNORED_DIRS]
+            for filename in filenames:
+                path = os.path.join(root, filename)
+                if self._relevant(path):
+                    try:
+                        mtimes[path] = os.path.getmtime(path)
+                    except OSError:
+                        pass
+        return mtimes
+
+    def _poll(self):
+        previous = self._snapshot()
+        while not self._stop.wait(self.poll_interval):
+            current = self._snapshot()
+            for path in set(previous) | set(current):
+                if previous.get(path) != current.get(path):
+                    self.notify(path)
+            previous = current
+
+    def _flush(self):
+        while not self._stop.wait(0.1):
+            with self._lock:
+                quiet = time.monotonic() - self._last_event >= self.debounce
+                if not self._pending or not quiet:
+                    continue
+                batch, self._pending = self._pending, set()
+            try:
+                self.on_change(batch)
+            except Exception as e:
+                logger.error(f"Watch callback failed: {str(e)}")
+
+    def start(self):
+        if Observer is not None:
+            self._observer = Observer()
+            self._observer.schedule(_EventHandler(self), self.root, recursive=True)
+            self._observer.start()
+        else:
+            self._threads.append(threading.Thread(target=self._poll, daemon=True))
+        self._threads.append(threading.Thread(target=self._flush, daemon=True))
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"Watching {self.root} ({'events' if self._observer else 'polling'})")
+
+    def stop(self):
+        self._stop.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+        for thread in self._threads:
+            thread.join()
+
+
+class WatchSession:
+    """Runs a refresh coroutine in a background event loop for every debounced batch of changes.
+
+    ``stop`` cancels the refresh in flight instead of waiting for it, so it is
+    safe to call from a script thread or a session cleanup.
+    """
+
+    def __init__(self, root: str, extensions: Iterable[str],
+                 refresh: Callable[[Set[str]], Awaitable[None]], debounce: float = 1.0,
+                 on_stop: Optional[Callable[[], None]] = None):
+        self.refresh = refresh
+        # Called on stop, e.g. to cancel the work a refresh handed to other threads
+        self.on_stop = on_stop
+        self.version = 0
+        self.status = "starting"
+        self.last_changed: Set[str] = set()
+        self.last_update: Optional[float] = None
+        self._loop = asyncio.new_event_loop()
+        self._refresh_lock: Optional[asyncio.Lock] = None
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self.watcher = DirectoryWatcher(root, extensions, self._on_change, debounce)
+        # Refresh in flight, and whether stop() was called; both guarded by _state_lock
+        self._current: Optional[Future] = None
+        self._stopped = False
+        self._state_lock = threading.Lock()
+
+    def _submit(self, paths: Set[str]) -> Optional[Future]:
+        with self._state_lock:
+            if self._stopped:
+                return None
+            self._current = asyncio.run_coroutine_threadsafe(self._run(paths), self._loop)
+            return self._current
+
+    def _on_change(self, paths: Set[str]):
+        future = self._submit(paths)
+        if future is None:
+            return
+        # Block the flush thread so batches are refreshed one at a time, in order
+        try:
+            future.result()
+        except CancelledError:
+            logger.info("Watch refresh cancelled")
+
+    async def _run(self, paths: Set[str]):
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        async with self._refresh_lock:
+            self.status = f"refreshing {len(paths)} file(s)"
+            try:
+                await self.refresh(paths)
+                self.status = "up to date"
+            except Exception as e:
+                logger.error(f"Watch refresh failed: {str(e)}")
+                self.status = f"error: {e}"
+        self.last_changed = paths
+        self.last_update = time.time()
+        self.version += 1
+
+    def start(self, initial: Optional[Set[str]] = None):
+        self._thread.start()
+        if initial:
+            self._submit(initial)
+        else:
+            self.status = "up to date"
+        self.watcher.start()
+        return self
+
+    async def _shutdown(self):
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._loop.stop()
+
+    def stop(self):
+        with self._state_lock:
+            if self._stopped:
+                return
+            self._stopped = True
+            if self._current is not None:
+                self._current.cancel()
+        if self.on_stop:
+            self.on_stop()
+        # The flush thread is released by the cancellation, so joining it is quick
+        self.watcher.stop()
+        if self._thread.is_alive():
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop)
+        self.status = "stopped"